@@ -3,7 +3,7 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 from datetime import datetime
-from models.chat import db
+from models.chat import db, load_recent_messages
 from flask_migrate import Migrate
 
 # Load environment variables FIRST
@@ -26,6 +26,35 @@ def create_app(config_object='config.Config'):
     db.init_app(app)
     migrate = Migrate(app, db)
     
+    # Extend subject keywords before the engine starts classifying
+    if app.config.get('SUBJECT_KEYWORDS_FILE'):
+        try:
+            from utils.subject_classifier import use_keyword_file
+            use_keyword_file(app.config['SUBJECT_KEYWORDS_FILE'])
+            print(f"[OK] Subject keywords loaded from {app.config['SUBJECT_KEYWORDS_FILE']}")
+        except Exception as e:
+            print(f"[WARNING] Could not load subject keywords: {e}")
+    
+    # Load langdetect profiles up front so the first chat request isn't slow
+    from utils.language_detector import prewarm
+    prewarm()
+    
+    # Initialize the process-wide AI engine once instead of per request
+    def history_loader(session_id, limit):
+        with app.app_context():
+            return load_recent_messages(session_id, limit)
+    
+    try:
+        from models.ai_model import StudyBuddyAI
+        from routes.file_processing import get_file_storage
+        with app.app_context():
+            file_storage = get_file_storage()
+        app.extensions['study_buddy'] = StudyBuddyAI(app.config, history_loader=history_loader,
+                                                     file_storage=file_storage)
+        print("[OK] StudyBuddyAI engine initialized")
+    except Exception as e:
+        print(f"[WARNING] StudyBuddyAI engine not initialized: {e}")
+    
     # **FIXED CORS CONFIGURATION WITH CREDENTIALS**
     CORS(app, 
          origins=["http://localhost:3000"],
@@ -74,6 +103,10 @@ def create_app(config_object='config.Config'):
     except ImportError as e:
         print(f"[WARNING] Could not import health_bp: {e}")
     
+    # CLI maintenance commands (flask backfill-metadata)
+    from cli import register_commands
+    register_commands(app)
+    
     @app.route('/')
     def home():
         return jsonify({
@@ -102,9 +135,9 @@ def create_app(config_object='config.Config'):
 app = create_app()
 
 if __name__ == '__main__':
-    # Verify API key is loaded
+    # Verify API key is loaded (the offline stub backend doesn't need one)
     api_key = os.getenv('GEMINI_API_KEY')
-    if not api_key:
+    if not api_key and os.getenv('LLM_BACKEND', 'gemini') == 'gemini':
         print("[ERROR] GEMINI_API_KEY not found! Check your .env file")
         exit(1)
     
@@ -0,0 +1,147 @@
+"""DOCX/PPTX text extraction time and peak memory, python-docx/python-pptx vs the streaming reader.
+
+Writes a long thesis-like .docx (paragraphs with a table every few pages)
+and a large deck (title and bullet placeholders, a table every tenth slide),
+then extracts each with the object-model libraries and with utils.ooxml.
+Every run happens in a fresh interpreter, so peak RSS is that run's own
+high-water mark, interpreter and imports included.
+
+    cd backend && python -m benchmarks.ooxml_extract --paragraphs 20000 --slides 300
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+SENTENCE = 'The quick brown fox jumps over the lazy dog while studying chapter {n} of the course notes.'
+
+
+def write_docx(path, paragraphs, table_every=200):
+    """A .docx of paragraphs with a 20x4 table after every table_every of them"""
+    from docx import Document
+    document = Document()
+    for n in range(paragraphs):
+        if n % 50 == 0:
+            document.add_heading(f'Section {n // 50 + 1}', level=1)
+        document.add_paragraph(' '.join(SENTENCE.format(n=n) for _ in range(3)))
+        if n and n % table_every == 0:
+            table = document.add_table(rows=20, cols=4)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f'r{r}c{c} {n}'
+    document.save(path)
+
+
+def write_pptx(path, slides, table_every=10):
+    """A deck of title-and-content slides with a 6x3 table on every table_every-th"""
+    from pptx import Presentation
+    from pptx.util import Inches
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    for n in range(slides):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f'Lecture slide {n + 1}'
+        body = slide.placeholders[1].text_frame
+        body.text = SENTENCE.format(n=n)
+        for bullet in range(5):
+            body.add_paragraph().text = f'Point {bullet}: ' + SENTENCE.format(n=n)
+        if n % table_every == 0:
+            table = slide.shapes.add_table(6, 3, Inches(1), Inches(5), Inches(6), Inches(2)).table
+            for r in range(6):
+                for c in range(3):
+                    table.cell(r, c).text = f'{n}.{r}.{c}'
+    presentation.save(path)
+
+
+def extract_python_docx(path):
+    from docx import Document
+    document = Document(path)
+    texts = [paragraph.text for paragraph in document.paragraphs]
+    texts.extend(cell.text for table in document.tables for row in table.rows for cell in row.cells)
+    return sum(len(text) for text in texts)
+
+
+def extract_python_pptx(path):
+    from pptx import Presentation
+    return sum(len(shape.text) for slide in Presentation(path).slides for shape in slide.shapes
+               if hasattr(shape, 'text'))
+
+
+def extract_ooxml_docx(path):
+    from utils.ooxml import iter_docx
+    return sum(len(content) if unit == 'paragraph' else sum(len(cell) for row in content for cell in row)
+               for unit, content in iter_docx(path))
+
+
+def extract_ooxml_pptx(path):
+    from utils.ooxml import iter_pptx
+    return sum(len(text) for _, texts in iter_pptx(path) for text in texts)
+
+
+EXTRACTORS = {
+    'python-docx': extract_python_docx,
+    'ooxml-docx': extract_ooxml_docx,
+    'python-pptx': extract_python_pptx,
+    'ooxml-pptx': extract_ooxml_pptx
+}
+
+
+def peak_rss_kib():
+    """High-water RSS of this process. Linux carries ru_maxrss over from the parent across exec,
+    so VmHWM (reset by exec) is read where it exists."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_one(name, path):
+    """Child process: time one extraction and report it with this process's peak RSS"""
+    started = time.perf_counter()
+    chars = EXTRACTORS[name](path)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'seconds': elapsed, 'peak_mib': peak_rss_kib() / 1024, 'chars': chars}))
+
+
+def measure(name, path):
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.ooxml_extract', '--run', name, path],
+                            cwd=os.path.join(os.path.dirname(__file__), '..'),
+                            capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paragraphs', type=int, default=20000)
+    parser.add_argument('--slides', type=int, default=300)
+    parser.add_argument('--run', nargs=2, metavar=('EXTRACTOR', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_one(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        docx_path = os.path.join(directory, 'thesis.docx')
+        pptx_path = os.path.join(directory, 'deck.pptx')
+        write_docx(docx_path, args.paragraphs)
+        write_pptx(pptx_path, args.slides)
+        print(f"docx: {args.paragraphs} paragraphs, {os.path.getsize(docx_path) // 1024} KiB; "
+              f"pptx: {args.slides} slides, {os.path.getsize(pptx_path) // 1024} KiB")
+        print(f"{'extractor':>12} {'seconds':>9} {'peak MiB':>9} {'chars':>10}")
+        for name in EXTRACTORS:
+            result = measure(name, docx_path if name.endswith('docx') else pptx_path)
+            print(f"{name:>12} {result['seconds']:>9.2f} {result['peak_mib']:>9.1f} {result['chars']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""PDF text extraction time, serial vs split across worker processes.
+
+Writes a synthetic textbook (dense text pages, one content stream each) and
+extracts it with extract_pdf_pages at increasing worker counts. Speedup is
+relative to the single-process run; expect close to the core count once
+pages outnumber workers by a wide margin.
+
+    cd backend && python -m benchmarks.pdf_pages --pages 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.pdf_extract import extract_pdf_pages  # noqa: E402
+
+LINES_PER_PAGE = 45
+
+
+def write_text_pdf(path, page_count, lines_per_page=LINES_PER_PAGE):
+    """Write a minimal PDF whose pages each hold lines_per_page lines of Helvetica text"""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for page in range(page_count):
+        lines = [f'({page + 1}.{line} The quick brown fox jumps over the lazy dog while studying chapter {page}) Tj'
+                 for line in range(lines_per_page)]
+        stream = ('BT /F1 9 Tf 11 TL 40 800 Td ' + ' T* '.join(lines) + ' ET').encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects))
+        kids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % kid for kid in kids), page_count)
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        f.writelines(b'%010d 00000 n \n' % offset for offset in offsets)
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='*', help='worker counts to try (default 1..CPU count)')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = args.workers or sorted({1, 2, cores // 2, cores} - {0})
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'textbook.pdf')
+        write_text_pdf(path, args.pages)
+        print(f"{args.pages} pages, {os.path.getsize(path) // 1024} KiB, {cores} cores")
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+        baseline = None
+        for workers in counts:
+            started = time.perf_counter()
+            result = extract_pdf_pages(path, workers=workers)
+            elapsed = time.perf_counter() - started
+            assert len(result['pages']) == args.pages
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
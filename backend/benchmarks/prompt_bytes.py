@@ -0,0 +1,161 @@
+"""Prompt bytes sent per turn over a 20-turn session, inline vs system prompt mode.
+
+Runs StudyBuddyAI against the offline stub backend and records exactly what
+each turn hands to the model: the system instruction, the windowed history
+and the message. The 'original' column replays the inline prompts the way
+the per-session Gemini chat object used to keep them: every full prompt and
+reply stays in the history for the rest of the session.
+
+The 'wire' columns are the size of the generateContent request body each
+turn would post (system_instruction, contents, UTF-8 JSON), with no credit
+for provider-side caching. The run fails unless system mode sends fewer of
+them than inline mode.
+
+    cd backend && python -m benchmarks.prompt_bytes
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.ai_model import StudyBuddyAI  # noqa: E402
+from models.llm_backends import LLMBackend  # noqa: E402
+
+QUERIES = [
+    'Explain Python list comprehensions',
+    'How do I reverse a string in Python?',
+    'What is the difference between a list and a tuple?',
+    'Write a function that checks for prime numbers',
+    'Solve the quadratic equation x^2 - 5x + 6 = 0',
+    'What is the derivative of x^3?',
+    'Explain photosynthesis in plants',
+    'What does an enzyme do in a reaction?',
+    'How do I read a file in Python?',
+    'Explain recursion with an example',
+    'Calculate the integral of 2x',
+    'Who led the Indian independence movement?',
+    'What caused the partition of India?',
+    'Explain the theme of a poem I am studying',
+    'How does a SQL join work?',
+    'Explain big O notation for an algorithm',
+    'What is the probability of two heads in two coin tosses?',
+    'Explain Newton\'s second law of motion',
+    'How do git branches work?',
+    'Summarize what we covered today'
+]
+
+
+def wire_bytes(prompt, history, system):
+    """Size of the generateContent JSON body for one turn"""
+    body = {'contents': [{'role': turn['role'], 'parts': [{'text': part} for part in turn['parts']]}
+                         for turn in history] + [{'role': 'user', 'parts': [{'text': prompt}]}]}
+    if system:
+        body['system_instruction'] = {'parts': [{'text': system}]}
+    return len(json.dumps(body, ensure_ascii=False).encode('utf-8'))
+
+
+class RecordingBackend(LLMBackend):
+    """Records the bytes of every request before delegating"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.requests = []
+
+    def generate(self, prompt, history=None, system=None):
+        history = history or []
+        response = self.backend.generate(prompt, history, system)
+        self.requests.append({
+            'system': len((system or '').encode('utf-8')),
+            'wire': wire_bytes(prompt, history, system),
+            'history': sum(len(part.encode('utf-8')) for turn in history for part in turn['parts']),
+            'message': len(prompt.encode('utf-8')),
+            'prompt': prompt,
+            'response': response
+        })
+        return response
+
+
+def run(mode, turns):
+    engine = StudyBuddyAI({
+        'LLM_BACKEND': 'stub', 'STUB_LATENCY_MS': 0, 'STUB_OUTPUT_WORDS': 120,
+        'PROMPT_MODE': mode, 'RESPONSE_CACHE_SIZE': 0
+    })
+    recorder = RecordingBackend(engine.backend.backend)
+    engine.backend.backend = recorder
+    for query in (QUERIES * (turns // len(QUERIES) + 1))[:turns]:
+        engine.get_response(query, f'bench-{mode}')
+    return recorder.requests
+
+
+def original_totals(inline_requests):
+    """Bytes per turn when every full prompt and reply stayed in the chat history"""
+    totals = []
+    history = 0
+    for request in inline_requests:
+        totals.append(history + request['message'])
+        history += request['message'] + len(request['response'].encode('utf-8'))
+    return totals
+
+
+def compare(turns):
+    """One row per turn with the bytes of each mode"""
+    inline = run('inline', turns)
+    system = run('system', turns)
+    original = original_totals(inline)
+
+    rows = []
+    for turn, (before, after, legacy) in enumerate(zip(inline, system, original), start=1):
+        rows.append({
+            'turn': turn,
+            'original_total': legacy,
+            'inline_message': before['message'],
+            'inline_total': before['system'] + before['history'] + before['message'],
+            'system_message': after['message'],
+            'system_instruction': after['system'],
+            'system_total': after['system'] + after['history'] + after['message'],
+            'inline_wire': before['wire'],
+            'system_wire': after['wire']
+        })
+    return rows
+
+
+def mean(rows, key):
+    return sum(row[key] for row in rows) / len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    rows = compare(args.turns)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'turn':>4} {'original':>9} {'inline msg':>10} {'inline tot':>10} "
+          f"{'system msg':>10} {'sys instr':>9} {'system tot':>10} {'inline wire':>11} {'system wire':>11}")
+    for row in rows:
+        print(f"{row['turn']:>4} {row['original_total']:>9} {row['inline_message']:>10} {row['inline_total']:>10} "
+              f"{row['system_message']:>10} {row['system_instruction']:>9} {row['system_total']:>10} "
+              f"{row['inline_wire']:>11} {row['system_wire']:>11}")
+
+    distinct_systems = len({row['system_instruction'] for row in rows})
+    print()
+    print(f"mean per-turn message bytes: inline {mean(rows, 'inline_message'):.0f}, "
+          f"system {mean(rows, 'system_message'):.0f}")
+    print(f"mean bytes per request: original {mean(rows, 'original_total'):.0f}, "
+          f"inline {mean(rows, 'inline_total'):.0f}, system {mean(rows, 'system_total'):.0f} "
+          f"(of which {mean(rows, 'system_instruction'):.0f} is the system instruction; "
+          f"{distinct_systems} distinct sizes across {len(rows)} turns)")
+    print(f"mean request body on the wire: inline {mean(rows, 'inline_wire'):.0f}, "
+          f"system {mean(rows, 'system_wire'):.0f}")
+    assert mean(rows, 'system_wire') < mean(rows, 'inline_wire'), 'system mode sent no fewer bytes than inline'
+
+
+if __name__ == '__main__':
+    main()
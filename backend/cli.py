@@ -0,0 +1,57 @@
+import click
+from sqlalchemy import update
+
+from models.chat import db, Message
+from utils.bulk_analysis import classify_many, detect_language_many
+
+
+def register_commands(app):
+    """Attach maintenance commands to the `flask` CLI"""
+
+    @app.cli.command('backfill-metadata')
+    @click.option('--batch-size', default=5000, show_default=True, help='Rows loaded and updated per transaction.')
+    @click.option('--processes', default=None, type=int, help='Worker processes (default: one per CPU).')
+    @click.option('--all', 'recompute', is_flag=True, help='Recompute rows that already have both fields.')
+    @click.option('--dry-run', is_flag=True, help='Analyse rows without writing.')
+    def backfill_metadata(batch_size, processes, recompute, dry_run):
+        """Backfill subject_area and detected_language on user messages."""
+        last_id = 0
+        scanned = updated = 0
+
+        while True:
+            rows = (db.session.query(Message.id, Message.content, Message.meta_data)
+                    .filter(Message.type == 'user', Message.id > last_id)
+                    .order_by(Message.id)
+                    .limit(batch_size)
+                    .all())
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+
+            if not recompute:
+                rows = [row for row in rows
+                        if not row.meta_data or 'subject_area' not in row.meta_data
+                        or 'detected_language' not in row.meta_data]
+            if not rows:
+                continue
+
+            texts = [row.content for row in rows]
+            subjects = classify_many(texts, processes=processes)
+            languages = detect_language_many(texts, processes=processes)
+            changes = [
+                {
+                    'id': row.id,
+                    'meta_data': {**(row.meta_data or {}), 'subject_area': subject, 'detected_language': language}
+                }
+                for row, subject, language in zip(rows, subjects, languages)
+            ]
+
+            if not dry_run:
+                db.session.execute(update(Message), changes)
+                db.session.commit()
+            updated += len(changes)
+            click.echo(f"[INFO] Processed up to message {last_id}: {updated} updated of {scanned} scanned")
+
+        action = 'Would update' if dry_run else 'Updated'
+        click.echo(f"[OK] {action} {updated} of {scanned} user messages")
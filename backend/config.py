@@ -28,3 +28,110 @@ class Config:
     SESSION_COOKIE_DOMAIN = None  # Allow cookies on localhost
     SESSION_COOKIE_PATH = '/'
     SESSION_REFRESH_EACH_REQUEST = True
+    
+    # Chat session pool configuration
+    CHAT_SESSION_MAX = int(os.getenv('CHAT_SESSION_MAX', '1000'))
+    CHAT_SESSION_MAX_BYTES = int(os.getenv('CHAT_SESSION_MAX_BYTES', str(64 * 1024 * 1024)))
+    CHAT_SESSION_TTL = int(os.getenv('CHAT_SESSION_TTL', '3600'))  # idle seconds
+    
+    # Conversation history sent with each turn
+    CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '2000'))  # verbatim recent turns
+    CONTEXT_SUMMARY_TOKENS = int(os.getenv('CONTEXT_SUMMARY_TOKENS', '400'))  # rolling summary of older turns
+    CONTEXT_REHYDRATE_MESSAGES = int(os.getenv('CONTEXT_REHYDRATE_MESSAGES', '40'))  # rows loaded after a restart
+    
+    # Response cache for stateless queries
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '1000'))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '86400'))  # seconds
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH')  # SQLite file; unset keeps the cache in memory only
+    
+    # Coalescing of identical in-flight queries
+    SINGLE_FLIGHT_TIMEOUT = int(os.getenv('SINGLE_FLIGHT_TIMEOUT', '60'))  # seconds a duplicate request waits
+    
+    # Model backend: 'gemini' or 'stub' (offline, for load tests and benchmarks)
+    LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+    GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-lite')
+    STUB_LATENCY_DISTRIBUTION = os.getenv('STUB_LATENCY_DISTRIBUTION', 'lognormal')  # fixed | uniform | lognormal
+    STUB_LATENCY_MS = float(os.getenv('STUB_LATENCY_MS', '800'))  # median latency
+    STUB_LATENCY_SPREAD = float(os.getenv('STUB_LATENCY_SPREAD', '0.5'))
+    STUB_OUTPUT_WORDS = int(os.getenv('STUB_OUTPUT_WORDS', '250'))
+    STUB_FAILURE_RATE = float(os.getenv('STUB_FAILURE_RATE', '0'))
+    STUB_SEED = int(os.getenv('STUB_SEED', '0'))
+    
+    # Resilience around model calls
+    LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))  # per-attempt deadline, seconds
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+    LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '0.5'))
+    LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', '8'))
+    LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', '0') == '1'  # second request after p95 latency
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv('LLM_BREAKER_FAILURE_THRESHOLD', '5'))
+    LLM_BREAKER_RESET_TIMEOUT = float(os.getenv('LLM_BREAKER_RESET_TIMEOUT', '30'))
+    # Streams: seconds to the first chunk (defaults to LLM_TIMEOUT) and between later chunks
+    LLM_STREAM_FIRST_CHUNK_TIMEOUT = float(os.getenv('LLM_STREAM_FIRST_CHUNK_TIMEOUT', '0')) or None
+    LLM_STREAM_IDLE_TIMEOUT = float(os.getenv('LLM_STREAM_IDLE_TIMEOUT', '15'))
+    
+    # Batch chat endpoint
+    BATCH_MAX_QUERIES = int(os.getenv('BATCH_MAX_QUERIES', '500'))
+    BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '8'))
+    
+    # Optional JSON file of extra/reweighted subject keywords: {"subject": {"keyword": weight}}
+    SUBJECT_KEYWORDS_FILE = os.getenv('SUBJECT_KEYWORDS_FILE')
+    
+    # Content format guidelines (defaults to prompts/content_formats.md); polled for changes, 0 disables
+    CONTENT_FORMATS_PATH = os.getenv('CONTENT_FORMATS_PATH')
+    CONTENT_FORMATS_WATCH_INTERVAL = float(os.getenv('CONTENT_FORMATS_WATCH_INTERVAL', '5'))
+    
+    # 'system' sends persona/format rules as the system instruction; 'inline' repeats them in every message
+    PROMPT_MODE = os.getenv('PROMPT_MODE', 'system')
+    
+    # Document parsing job queue: worker processes, max unfinished jobs before uploads get 503,
+    # seconds finished results are kept, seconds between SSE keep-alives
+    PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', '2'))
+    PARSE_QUEUE_MAX = int(os.getenv('PARSE_QUEUE_MAX', '16'))
+    PARSE_JOB_TTL = int(os.getenv('PARSE_JOB_TTL', '900'))
+    PARSE_EVENTS_HEARTBEAT = int(os.getenv('PARSE_EVENTS_HEARTBEAT', '15'))
+    # Job state shared by every server process (defaults to <uploads>/parse_jobs), so status and
+    # events requests can land on any gunicorn worker
+    PARSE_JOB_DIR = os.getenv('PARSE_JOB_DIR')
+    
+    # PDF text extraction per parse job: processes splitting the pages (0 = CPU count / PARSE_WORKERS),
+    # pages read before the rest is skipped, seconds allowed per page
+    PDF_WORKERS = int(os.getenv('PDF_WORKERS', '0'))
+    PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '2000'))
+    PDF_PAGE_TIMEOUT = float(os.getenv('PDF_PAGE_TIMEOUT', '10'))
+    
+    # Image OCR per parse job: tesseract processes run at once (0 = CPU count / PARSE_WORKERS), resolution pages are
+    # scaled down to, frames read from multi-page TIFF/GIF, seconds allowed per tile, tesseract language
+    OCR_WORKERS = int(os.getenv('OCR_WORKERS', '0'))
+    OCR_TARGET_DPI = int(os.getenv('OCR_TARGET_DPI', '300'))
+    OCR_MAX_FRAMES = int(os.getenv('OCR_MAX_FRAMES', '20'))
+    OCR_TIMEOUT = float(os.getenv('OCR_TIMEOUT', '30'))
+    OCR_LANG = os.getenv('OCR_LANG', 'eng')
+    # OCR text cached by image hash (defaults to <uploads>/ocr_cache); 0 bytes disables it
+    OCR_CACHE_DIR = os.getenv('OCR_CACHE_DIR')
+    OCR_CACHE_MAX_BYTES = int(os.getenv('OCR_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+    
+    # Content-addressed cache of parse results (defaults to <uploads>/parse_cache); 0 bytes disables it
+    PARSE_CACHE_DIR = os.getenv('PARSE_CACHE_DIR')
+    PARSE_CACHE_MAX_BYTES = int(os.getenv('PARSE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    
+    # Parsed documents kept server-side by file_id (defaults to <uploads>/documents): seconds unused
+    # before removal, most pages per /pages request, characters of a document sent with a chat turn
+    DOCUMENT_STORE_DIR = os.getenv('DOCUMENT_STORE_DIR')
+    DOCUMENT_STORE_TTL = int(os.getenv('DOCUMENT_STORE_TTL', str(7 * 86400)))
+    DOCUMENT_PAGES_PER_REQUEST = int(os.getenv('DOCUMENT_PAGES_PER_REQUEST', '50'))
+    DOCUMENT_CONTEXT_CHARS = int(os.getenv('DOCUMENT_CONTEXT_CHARS', '2000'))
+    
+    # Spreadsheet columns kept for answering aggregate questions locally (defaults to <uploads>/tables):
+    # sheets with more rows are only summarized (0 disables), whether the model narrates the result,
+    # result rows shown
+    TABLE_STORE_DIR = os.getenv('TABLE_STORE_DIR')
+    TABLE_MAX_ROWS = int(os.getenv('TABLE_MAX_ROWS', '200000'))
+    TABLE_QUERY_NARRATE = os.getenv('TABLE_QUERY_NARRATE', 'true').lower() == 'true'
+    TABLE_RESULT_ROWS = int(os.getenv('TABLE_RESULT_ROWS', '30'))
+    
+    # Resumable chunked uploads (defaults to <uploads>/chunked); each chunk request stays under MAX_CONTENT_LENGTH
+    CHUNKED_UPLOAD_DIR = os.getenv('CHUNKED_UPLOAD_DIR')
+    CHUNKED_UPLOAD_MAX_BYTES = int(os.getenv('CHUNKED_UPLOAD_MAX_BYTES', str(512 * 1024 * 1024)))
+    CHUNKED_UPLOAD_CHUNK_BYTES = int(os.getenv('CHUNKED_UPLOAD_CHUNK_BYTES', str(8 * 1024 * 1024)))
+    CHUNKED_UPLOAD_TTL = int(os.getenv('CHUNKED_UPLOAD_TTL', '86400'))  # seconds before abandoned uploads are removed
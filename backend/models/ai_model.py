@@ -1,28 +1,68 @@
-import google.generativeai as genai
-import os
 from dotenv import load_dotenv
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
 from utils.language_detector import detect_language
 from utils.subject_classifier import classify_subject
+from utils.bulk_analysis import classify_many, detect_language_many
 from utils.content_formatter import ContentFormatter
+from utils.format_registry import DEFAULT_FORMATS_PATH, get_registry
+from models.session_pool import SessionPool
+from models.conversation_context import ConversationContext
+from models.llm_backends import create_backend
+from utils.response_cache import ResponseCache, make_cache_key
+from utils.single_flight import SingleFlight, SingleFlightTimeout
 import logging
 
 class StudyBuddyAI:
-    def __init__(self):
+    def __init__(self, config=None, history_loader=None, file_storage=None):
         # Load environment variables
         load_dotenv()
+        config = config or {}
         
-        self.api_key = os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
-        
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-lite')
-        self.chat_sessions = {}
+        # Model backend (Gemini by default; 'stub' runs offline)
+        self.backend = create_backend(config)
         self.logger = logging.getLogger(__name__)
         
-        # Initialize content formatter
-        self.formatter = ContentFormatter()
+        # Shared, bounded pool of per-session conversation contexts
+        self.chat_sessions = SessionPool(
+            max_sessions=config.get('CHAT_SESSION_MAX', 1000),
+            max_bytes=config.get('CHAT_SESSION_MAX_BYTES', 64 * 1024 * 1024),
+            idle_ttl=config.get('CHAT_SESSION_TTL', 3600)
+        )
+        self.context_token_budget = config.get('CONTEXT_TOKEN_BUDGET', 2000)
+        self.context_summary_tokens = config.get('CONTEXT_SUMMARY_TOKENS', 400)
+        
+        # Rebuilds a session's context from stored messages on a pool miss;
+        # called as history_loader(session_id, limit) -> [(type, content), ...]
+        self.history_loader = history_loader
+        self.rehydrate_messages = config.get('CONTEXT_REHYDRATE_MESSAGES', 40)
+        
+        # The app's FileStorage; a session's files are released when the session leaves the pool
+        self.file_storage = file_storage
+        self.chat_sessions.add_eviction_hook(self._on_session_evicted)
+        
+        # Content formatter over the shared, hot-reloaded format registry
+        self.formatter = ContentFormatter(get_registry(config.get('CONTENT_FORMATS_PATH') or DEFAULT_FORMATS_PATH))
+        self.formatter.registry.watch(config.get('CONTENT_FORMATS_WATCH_INTERVAL', 0))
+        
+        # Cache for stateless queries (no file content, no prior session history)
+        self.response_cache = ResponseCache(
+            max_entries=config.get('RESPONSE_CACHE_SIZE', 1000),
+            ttl=config.get('RESPONSE_CACHE_TTL', 86400),
+            path=config.get('RESPONSE_CACHE_PATH')
+        )
+        
+        # Identical stateless prompts in flight at the same time share one model call
+        self.single_flight = SingleFlight()
+        self.single_flight_timeout = config.get('SINGLE_FLIGHT_TIMEOUT', 60)
+        
+        # 'system': persona and the request's format rules go in the system instruction
+        # and each turn sends only the query (plus any document); 'inline': every message
+        # carries the full scaffolding, for backends without system instructions
+        self.prompt_mode = config.get('PROMPT_MODE', 'system')
+        if self.prompt_mode not in ('system', 'inline'):
+            raise ValueError(f"Unknown PROMPT_MODE: {self.prompt_mode}")
         
         # Indian languages mapping
         self.indian_languages = {
@@ -65,30 +105,161 @@ Provide a well-structured response following the format requirements above."""
         
         return prompt
 
-    def get_response(self, query, session_id, file_content=None):
+    def create_system_instruction(self, language='en', subject_area='general', file_content=None):
+        """Persona and the format rules of this request's content type; no larger than the inline scaffolding"""
+        format_instructions = self.formatter.get_format_instructions(subject_area)
+        
+        language_instruction = ""
+        if language != 'en':
+            lang_name = self.indian_languages.get(language, 'the detected language')
+            language_instruction = f"\nLANGUAGE: Respond in {lang_name} while maintaining the formatting structure."
+        
+        document_instruction = "\nAnalyze the DOCUMENT CONTENT sent with the USER QUERY." if file_content else ""
+        return f"""You are Nexus, a professional AI assistant that provides structured, copy-friendly responses.
+
+{format_instructions}{language_instruction}{document_instruction}"""
+
+    @staticmethod
+    def create_turn_message(query, file_content=None):
+        """Per-turn message for system mode: the query and any attached document, nothing else"""
+        if file_content:
+            return f"""DOCUMENT CONTENT:
+{file_content[:2000]}...
+
+USER QUERY: {query}"""
+        return query
+
+    def build_prompt(self, query, language='en', subject_area='general', file_content=None):
+        """(prompt, system) for one turn according to the prompt mode"""
+        if self.prompt_mode == 'inline':
+            return self.create_structured_prompt(query, language, subject_area, file_content), None
+        return (self.create_turn_message(query, file_content),
+                self.create_system_instruction(language, subject_area, file_content))
+
+    def analyze_query(self, query, file_content=None):
+        """Detect language and subject area for a query"""
+        detected_lang = detect_language(query)
+        subject_area = classify_subject(query)
+        
+        # Check for document analysis
+        if self._is_document_query(query, file_content):
+            subject_area = 'document_analysis'
+        
+        return detected_lang, subject_area
+
+    def analyze_many(self, queries, file_contents=None):
+        """Detect language and subject for many queries in one vectorized pass"""
+        file_contents = file_contents or [None] * len(queries)
+        languages = detect_language_many(queries)
+        subjects = classify_many(queries)
+        return [
+            (language, 'document_analysis' if self._is_document_query(query, file_content) else subject)
+            for query, file_content, language, subject in zip(queries, file_contents, languages, subjects)
+        ]
+
+    @staticmethod
+    def _is_document_query(query, file_content):
+        return bool(file_content) or 'file content:' in query.lower() or 'document content:' in query.lower()
+
+    def _new_context(self):
+        return ConversationContext(self.context_token_budget, self.context_summary_tokens)
+
+    def _get_context(self, session_id):
+        """Get the pooled conversation context, rehydrating it from storage on a miss"""
+        context = self.chat_sessions.get(session_id)
+        if context is None:
+            # Load outside the pool lock so a slow query doesn't block other sessions
+            context = self.chat_sessions.setdefault(session_id, self._load_context(session_id))
+        return context
+
+    def _load_context(self, session_id):
+        context = self._new_context()
+        if self.history_loader is None or not session_id:
+            return context
+        try:
+            context.load(self.history_loader(session_id, self.rehydrate_messages))
+        except Exception as e:
+            self.logger.error(f"Failed to rehydrate session {session_id}: {e}")
+        return context
+
+    @staticmethod
+    def _history_text(query, file_content=None):
+        """What a turn contributes to history: the query, not the formatted prompt"""
+        if file_content:
+            return f"{query}\n\n[Attached document excerpt]\n{file_content[:500]}"
+        return query
+
+    def estimate_prompt_tokens(self, session_id, prompt, system=None):
+        """Estimated tokens sent for a turn: system instruction, windowed history and the new prompt"""
+        context = self.chat_sessions.get(session_id)
+        system_tokens = self.backend.count_tokens(system) if system else 0
+        return self.backend.count_tokens(prompt) + system_tokens + (context.tokens if context else 0)
+
+    def _build_result(self, formatted_response, detected_lang, subject_area, session_id, cached=False,
+                      prompt_tokens=None):
+        return {
+            'response': formatted_response,
+            'detected_language': detected_lang,
+            'subject_area': subject_area,
+            'content_type': subject_area,
+            'available_formats': self.formatter.get_available_formats(),
+            'timestamp': datetime.now().isoformat(),
+            'success': True,
+            'cached': cached,
+            'prompt_tokens': prompt_tokens,
+            'session_id': session_id
+        }
+
+    def _response_cache_key(self, query, session_id, file_content, detected_lang, subject_area):
+        """Cache key for stateless queries, or None when the answer depends on context"""
+        if file_content:
+            return None
+        if not self._get_context(session_id).is_empty():
+            return None
+        return make_cache_key(query, detected_lang, subject_area, self.formatter.version, self.prompt_mode,
+                              f'{self.backend.name}/{self.backend.model_name}')
+
+    def _seed_session(self, session_id, user_text, raw_text):
+        """Start the session from a cached exchange so follow-up turns keep context"""
+        context = self._new_context()
+        context.add_turn(user_text, raw_text)
+        self.chat_sessions.put(session_id, context)
+
+    def _build_error(self, error, session_id):
+        return {
+            'response': "I encountered an error processing your request. Please try again.",
+            'error': str(error),
+            'success': False,
+            'timestamp': datetime.now().isoformat(),
+            'session_id': session_id
+        }
+
+    def get_response(self, query, session_id, file_content=None, analysis=None):
         """Clean response generation using content formatter"""
         try:
-            # Detect language and subject
-            detected_lang = detect_language(query)
-            subject_area = classify_subject(query)
-            
-            # Check for document analysis
-            if file_content or 'file content:' in query.lower() or 'document content:' in query.lower():
-                subject_area = 'document_analysis'
+            detected_lang, subject_area = analysis or self.analyze_query(query, file_content)
             
             # Create structured prompt using markdown file
-            prompt = self.create_structured_prompt(query, detected_lang, subject_area, file_content)
+            prompt, system = self.build_prompt(query, detected_lang, subject_area, file_content)
+            user_text = self._history_text(query, file_content)
             
-            # Get or create chat session
-            if session_id not in self.chat_sessions:
-                self.chat_sessions[session_id] = self.model.start_chat(history=[])
+            cache_key = self._response_cache_key(query, session_id, file_content, detected_lang, subject_area)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached:
+                    self._seed_session(session_id, user_text, cached['raw'])
+                    return self._build_result(cached['response'], detected_lang, subject_area, session_id,
+                                              cached=True, prompt_tokens=0)
             
-            chat = self.chat_sessions[session_id]
+            prompt_tokens = self.estimate_prompt_tokens(session_id, prompt, system)
+            self.logger.debug(f"Prompt for {session_id}: ~{prompt_tokens} tokens")
             
             # Generate response
             try:
-                response = chat.send_message(prompt)
-                raw_text = response.text
+                if cache_key:
+                    raw_text = self._send_coalesced(cache_key, session_id, user_text, prompt, subject_area, system)
+                else:
+                    raw_text = self._send(session_id, user_text, prompt, system)
             except Exception as ai_error:
                 self.logger.error(f"AI generation error: {ai_error}")
                 raw_text = "I encountered an issue generating a response. Please try rephrasing your question."
@@ -96,39 +267,153 @@ Provide a well-structured response following the format requirements above."""
             # Apply content-specific formatting using formatter
             formatted_response = self.formatter.format_response(raw_text, subject_area)
             
-            return {
-                'response': formatted_response,
-                'detected_language': detected_lang,
-                'subject_area': subject_area,
-                'content_type': subject_area,
-                'available_formats': self.formatter.get_available_formats(),
-                'timestamp': datetime.now().isoformat(),
-                'success': True,
-                'session_id': session_id
-            }
+            return self._build_result(formatted_response, detected_lang, subject_area, session_id,
+                                      prompt_tokens=prompt_tokens)
             
         except Exception as e:
             self.logger.error(f"AI response error: {e}")
-            return {
-                'response': "I encountered an error processing your request. Please try again.",
-                'error': str(e),
-                'success': False,
-                'timestamp': datetime.now().isoformat(),
-                'session_id': session_id
-            }
+            return self._build_error(e, session_id)
+
+    def record_local_answer(self, query, session_id, answer, file_content=None):
+        """Result for an answer computed without the model; the turn still joins the session history"""
+        detected_lang, subject_area = self.analyze_query(query, file_content)
+        self._get_context(session_id).add_turn(self._history_text(query, file_content), answer)
+        self.chat_sessions.refresh(session_id)
+        return self._build_result(answer, detected_lang, subject_area, session_id, prompt_tokens=0)
+
+    def _send(self, session_id, user_text, prompt, system=None):
+        """Send one turn with the session's windowed history and record it"""
+        context = self._get_context(session_id)
+        raw_text = self.backend.generate(prompt, history=context.history(), system=system)
+        context.add_turn(user_text, raw_text)
+        self.chat_sessions.refresh(session_id)
+        return raw_text
+
+    def _send_coalesced(self, cache_key, session_id, user_text, prompt, subject_area, system=None):
+        """Send a stateless prompt, sharing the upstream call with identical in-flight prompts"""
+        def generate():
+            raw_text = self._send(session_id, user_text, prompt, system)
+            # Cache before waiters are released so later arrivals hit the cache
+            self.response_cache.set(cache_key, {
+                'raw': raw_text,
+                'response': self.formatter.format_response(raw_text, subject_area)
+            })
+            return raw_text
+        
+        try:
+            raw_text, shared = self.single_flight.do(cache_key, generate, timeout=self.single_flight_timeout)
+        except SingleFlightTimeout as e:
+            self.logger.warning(f"{e}; sending independently")
+            return self._send(session_id, user_text, prompt, system)
+        
+        if shared:
+            self._seed_session(session_id, user_text, raw_text)
+        return raw_text
+
+    def iter_batch_responses(self, items, max_workers=8):
+        """Answer independent queries concurrently.
+        
+        items is a list of (query, file_content) pairs. Each query runs in its
+        own throwaway session so answers don't share context. Yields
+        (index, result) pairs in completion order.
+        """
+        analyses = self.analyze_many([query for query, _ in items], [content for _, content in items])
+        
+        def run(index, query, file_content, analysis):
+            session_id = f"batch-{uuid.uuid4().hex}"
+            # Pre-seed an empty context so no history lookup happens for throwaway sessions
+            self.chat_sessions.put(session_id, self._new_context())
+            try:
+                return index, self.get_response(query, session_id, file_content, analysis=analysis)
+            finally:
+                self.chat_sessions.discard(session_id)
+        
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chat-batch')
+        try:
+            futures = [
+                pool.submit(run, index, query, file_content, analysis)
+                for index, ((query, file_content), analysis) in enumerate(zip(items, analyses))
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Stop queued work if the consumer goes away early
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stream_response(self, query, session_id, file_content=None):
+        """Generate a response incrementally.
+        
+        Yields ('chunk', text) events with formatted text as soon as a block is
+        complete, then a final ('done', result) event shaped like get_response().
+        """
+        try:
+            detected_lang, subject_area = self.analyze_query(query, file_content)
+            prompt, system = self.build_prompt(query, detected_lang, subject_area, file_content)
+            user_text = self._history_text(query, file_content)
+            
+            cache_key = self._response_cache_key(query, session_id, file_content, detected_lang, subject_area)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached:
+                    self._seed_session(session_id, user_text, cached['raw'])
+                    yield 'chunk', cached['response']
+                    yield 'done', self._build_result(cached['response'], detected_lang, subject_area, session_id,
+                                                     cached=True, prompt_tokens=0)
+                    return
+            
+            prompt_tokens = self.estimate_prompt_tokens(session_id, prompt, system)
+            context = self._get_context(session_id)
+            history = context.history()
+            raw_parts = []
+            failed = []
+            
+            def raw_chunks():
+                try:
+                    for text in self.backend.stream(prompt, history=history, system=system):
+                        raw_parts.append(text)
+                        yield text
+                    context.add_turn(user_text, ''.join(raw_parts))
+                    self.chat_sessions.refresh(session_id)
+                except Exception as ai_error:
+                    self.logger.error(f"AI streaming error: {ai_error}")
+                    failed.append(ai_error)
+                    yield "\n\nI encountered an issue generating a response. Please try rephrasing your question."
+            
+            segments = []
+            for segment in self.formatter.format_stream(raw_chunks(), subject_area):
+                segments.append(segment)
+                yield 'chunk', segment
+            
+            formatted_response = ''.join(segments).strip()
+            if cache_key and not failed:
+                self.response_cache.set(cache_key, {'raw': ''.join(raw_parts), 'response': formatted_response})
+            yield 'done', self._build_result(formatted_response, detected_lang, subject_area, session_id,
+                                             prompt_tokens=prompt_tokens)
+            
+        except Exception as e:
+            self.logger.error(f"AI streaming response error: {e}")
+            yield 'error', self._build_error(e, session_id)
 
     def clear_session(self, session_id):
         """Clear chat session with logging"""
-        if session_id in self.chat_sessions:
-            del self.chat_sessions[session_id]
+        if self.chat_sessions.discard(session_id):
             self.logger.info(f"Session cleared: {session_id}")
         return True
 
+    def _on_session_evicted(self, session_id, context):
+        """Drop per-session state held outside the pool"""
+        if self.file_storage is not None:
+            self.file_storage.clear_session(session_id)
+
     def get_session_count(self):
         """Get current session count for monitoring"""
         return len(self.chat_sessions)
 
+    def get_session_stats(self):
+        """Get session pool occupancy for monitoring"""
+        return self.chat_sessions.stats()
+
     def reload_formats(self):
-        """Reload content formats from markdown file"""
-        self.formatter = ContentFormatter()
+        """Reload content formats from markdown file; requests in flight keep the old snapshot"""
+        self.formatter.registry.reload(force=True)
         return self.formatter.get_available_formats()
@@ -16,4 +16,21 @@ class Message(db.Model):
     type = db.Column(db.String(10), nullable=False)  # 'user' or 'bot'
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    meta_data = db.Column(db.JSON)
\ No newline at end of file
+    meta_data = db.Column(db.JSON)
+
+    __table_args__ = (
+        db.Index('ix_message_chat_id_id', 'chat_id', 'id'),
+    )
+
+def load_recent_messages(session_id, limit=40):
+    """Return the last `limit` (type, content) rows of a session, oldest first.
+    
+    Single indexed query selecting plain columns, so no ORM objects are built.
+    """
+    rows = (db.session.query(Message.type, Message.content)
+            .join(Chat, Chat.id == Message.chat_id)
+            .filter(Chat.session_id == session_id)
+            .order_by(Message.id.desc())
+            .limit(limit)
+            .all())
+    return [(row.type, row.content) for row in reversed(rows)]
@@ -0,0 +1,109 @@
+import re
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+_MARKDOWN_NOISE = re.compile(r'[#*`>|_]+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = ' '.join(_MARKDOWN_NOISE.sub(' ', text or '').split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+
+def _first_sentence(text: str) -> str:
+    text = ' '.join(_MARKDOWN_NOISE.sub(' ', text or '').split())
+    return _SENTENCE_END.split(text, 1)[0] if text else ''
+
+
+class _Turn:
+    __slots__ = ('user', 'model', 'tokens')
+
+    def __init__(self, user, model):
+        self.user = user
+        self.model = model
+        self.tokens = estimate_tokens(user) + estimate_tokens(model)
+
+
+class ConversationContext:
+    """Sliding window of recent turns kept under a token budget.
+
+    Turns pushed out of the window are compacted into a rolling extractive
+    summary (one line per turn) which is itself capped at summary_budget
+    tokens, so the history sent with each request stays bounded.
+    """
+
+    def __init__(self, token_budget: int = 2000, summary_budget: int = 400):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.turns = deque()
+        self.summary_lines = deque()
+        self.window_tokens = 0
+        self.summary_tokens = 0
+        self._lock = threading.Lock()
+
+    def add_turn(self, user_text: str, model_text: str):
+        with self._lock:
+            turn = _Turn(user_text, model_text)
+            self.turns.append(turn)
+            self.window_tokens += turn.tokens
+            # Keep at least the latest turn verbatim, even if it alone exceeds the budget
+            while len(self.turns) > 1 and self.window_tokens > self.token_budget:
+                self._compact(self.turns.popleft())
+
+    def load(self, messages: Iterable[Tuple[str, str]]):
+        """Rebuild the window from stored (type, content) rows, oldest first.
+        
+        Rows are paired user -> bot; unanswered user rows are skipped.
+        """
+        pending_user = None
+        for message_type, content in messages:
+            if message_type == 'user':
+                pending_user = content
+            elif message_type == 'bot' and pending_user is not None:
+                self.add_turn(pending_user, content)
+                pending_user = None
+        return self
+
+    def history(self) -> List[Dict]:
+        """Chat history for start_chat: summary pair first, then the window"""
+        with self._lock:
+            history = []
+            if self.summary_lines:
+                history.append({'role': 'user', 'parts': [
+                    'Summary of our earlier conversation:\n' + '\n'.join(self.summary_lines)
+                ]})
+                history.append({'role': 'model', 'parts': ['Noted, I will keep that context in mind.']})
+            for turn in self.turns:
+                history.append({'role': 'user', 'parts': [turn.user]})
+                history.append({'role': 'model', 'parts': [turn.model]})
+            return history
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of history re-sent with the next request"""
+        return self.window_tokens + self.summary_tokens
+
+    def is_empty(self) -> bool:
+        return not self.turns and not self.summary_lines
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return (sum(len(turn.user) + len(turn.model) for turn in self.turns) +
+                    sum(len(line) for line in self.summary_lines))
+
+    def _compact(self, turn: _Turn):
+        self.window_tokens -= turn.tokens
+        line = f"- Q: {_shorten(turn.user, 120)} A: {_shorten(_first_sentence(turn.model), 200)}"
+        self.summary_lines.append(line)
+        self.summary_tokens += estimate_tokens(line)
+        while len(self.summary_lines) > 1 and self.summary_tokens > self.summary_budget:
+            self.summary_tokens -= estimate_tokens(self.summary_lines.popleft())
@@ -1,27 +1,259 @@
+import json
+import os
+import shutil
+import time
+
+# Parse result keys holding document text; everything else is kept as metadata
+BULKY_KEYS = ('text_content', 'pages', 'slides', 'extracted_text')
+# Text without natural pages is cut into pages of roughly this many characters
+PAGE_CHARS = 4000
+OUTLINE_MAX_ENTRIES = 200
+PREVIEW_CHARS = 80
+
+
+def _preview(text):
+    for line in text.splitlines():
+        if line.strip():
+            return line.strip()[:PREVIEW_CHARS]
+    return ''
+
+
+def paginate_text(text, page_chars=PAGE_CHARS):
+    """Cut text into pages of about page_chars, breaking between paragraphs where possible"""
+    pages = []
+    current = []
+    size = 0
+    for paragraph in text.split('\n\n'):
+        while len(paragraph) > page_chars:
+            if current:
+                pages.append('\n\n'.join(current))
+                current, size = [], 0
+            pages.append(paragraph[:page_chars])
+            paragraph = paragraph[page_chars:]
+        if current and size + len(paragraph) > page_chars:
+            pages.append('\n\n'.join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 2
+    if current and any(part.strip() for part in current):
+        pages.append('\n\n'.join(current))
+    return pages
+
+
 class FileStorage:
-    def __init__(self):
+    """Per-session file list plus the server-side store of parsed documents.
+
+    A parsed document lives in <document_dir>/<file_id>/: meta.json holds the
+    parse metadata, an outline and the byte offset of every page and slide,
+    while the text itself sits in pages.jsonl / slides.jsonl, one JSON value
+    per line. A page range is read with one seek, so serving a few pages of a
+    long book doesn't load the rest of it. Documents untouched for ttl
+    seconds are removed.
+    """
+
+    def __init__(self, document_dir=None, ttl=7 * 86400):
         self.session_files = {}  # Maps session_id to list of processed files
-    
+        self.document_dir = document_dir
+        self.ttl = ttl
+        if document_dir:
+            os.makedirs(document_dir, exist_ok=True)
+
     def store_file_content(self, session_id, file_data):
         """Store processed file content for a session"""
         if session_id not in self.session_files:
             self.session_files[session_id] = []
-        
+
         self.session_files[session_id].append({
             'file_id': file_data['file_id'],
             'filename': file_data['filename'],
             'content': file_data['content'],
             'file_type': file_data['file_type']
         })
-    
+
     def get_session_files(self, session_id):
         """Get all files associated with a session"""
         return self.session_files.get(session_id, [])
-    
+
     def clear_session(self, session_id):
         """Clear files for a session"""
         if session_id in self.session_files:
             del self.session_files[session_id]
 
+    def store_document(self, file_id, filename, file_type, result):
+        """Persist a parse result under file_id; returns its metadata and outline"""
+        if not self.document_dir:
+            raise RuntimeError('FileStorage has no document directory')
+        self.sweep()
+        pages, slides = self._sections(result)
+        directory = self._document_path(file_id)
+        os.makedirs(directory, exist_ok=True)
+        offsets = {'pages': self._write_lines(os.path.join(directory, 'pages.jsonl'), pages),
+                   'slides': self._write_lines(os.path.join(directory, 'slides.jsonl'), slides)}
+
+        if slides:
+            outline = [{'slide': slide['slide_number'], 'title': _preview(slide.get('text', ''))}
+                       for slide in slides[:OUTLINE_MAX_ENTRIES]]
+        else:
+            outline = [{'page': number, 'preview': _preview(text), 'chars': len(text)}
+                       for number, text in enumerate(pages[:OUTLINE_MAX_ENTRIES], start=1)]
+        meta = {
+            'file_id': file_id,
+            'filename': filename,
+            'file_type': file_type,
+            'stored_at': time.time(),
+            'content': {key: value for key, value in result.items() if key not in BULKY_KEYS},
+            'page_count': len(pages),
+            'slide_count': len(slides),
+            # Blank slides are skipped by the parser, so numbers can have gaps
+            'slide_numbers': [slide['slide_number'] for slide in slides],
+            'outline': outline,
+            'outline_truncated': max(len(pages), len(slides)) > OUTLINE_MAX_ENTRIES,
+            'offsets': offsets
+        }
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, default=str)
+        return self.document_view(meta)
+
+    def get_document(self, file_id):
+        """Metadata and outline of a stored document, or None"""
+        meta = self._read_meta(file_id)
+        return self.document_view(meta) if meta else None
+
+    def get_pages(self, file_id, start, end):
+        """Pages start..end (1-based, inclusive) as [{'page', 'text'}], or None if unknown"""
+        meta = self._read_meta(file_id)
+        if meta is None:
+            return None
+        start = max(1, start)
+        end = min(end, meta['page_count'])
+        texts = self._read_lines(file_id, 'pages', meta, start - 1, end)
+        return [{'page': number, 'text': text} for number, text in enumerate(texts, start=start)]
+
+    def get_slide(self, file_id, number):
+        """Slide with this slide_number as stored by the parser, or None"""
+        meta = self._read_meta(file_id)
+        if meta is None or number not in meta['slide_numbers']:
+            return None
+        index = meta['slide_numbers'].index(number)
+        return self._read_lines(file_id, 'slides', meta, index, index + 1)[0]
+
+    def document_text(self, file_id, limit):
+        """Up to limit characters of the document's text for use as chat context, or None"""
+        meta = self._read_meta(file_id)
+        if meta is None:
+            return None
+        name = 'slides' if meta['slide_count'] else 'pages'
+        count = meta[name[:-1] + '_count']
+        parts = []
+        size = 0
+        index = 0
+        # Read a few entries at a time and stop once there is enough text
+        while size < limit and index < count:
+            for value in self._read_lines(file_id, name, meta, index, min(index + 8, count)):
+                index += 1
+                text = value.get('text', '') if name == 'slides' else value
+                if not text.strip():
+                    continue
+                if meta['file_type'] == 'pdf':
+                    text = f"--- Page {index} ---\n{text}"
+                parts.append(text)
+                size += len(text) + 2
+        return '\n\n'.join(parts)[:limit] or meta['content'].get('summary', '')
+
+    def delete_document(self, file_id):
+        path = self._document_path(file_id)
+        if path and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            return True
+        return False
+
+    def sweep(self):
+        """Remove documents not read for ttl seconds"""
+        if not self.document_dir:
+            return
+        cutoff = time.time() - self.ttl
+        for file_id in os.listdir(self.document_dir):
+            path = os.path.join(self.document_dir, file_id)
+            try:
+                touched = os.path.getmtime(os.path.join(path, 'meta.json'))
+            except OSError:
+                # Still being written, or left behind by a failed write
+                touched = os.path.getmtime(path) if os.path.isdir(path) else 0
+            if touched < cutoff:
+                self.delete_document(file_id)
+
+    @staticmethod
+    def document_view(meta):
+        file_id = meta['file_id']
+        view = {
+            **meta['content'],
+            'file_id': file_id,
+            'filename': meta['filename'],
+            'file_type': meta['file_type'],
+            'pages_available': meta['page_count'],
+            'outline': meta['outline'],
+            'outline_truncated': meta['outline_truncated']
+        }
+        if meta['page_count']:
+            view['pages_url'] = f'/api/files/{file_id}/pages'
+        if meta['slide_count']:
+            view['slide_count'] = meta['slide_count']
+            view['slides_url'] = f'/api/files/{file_id}/slides'
+        return view
+
+    @staticmethod
+    def _sections(result):
+        """(pages, slides) of a parse result; text-only results are paginated"""
+        slides = result.get('slides') or []
+        if 'pages' in result:
+            pages = list(result['pages'])
+        elif slides:
+            pages = []
+        else:
+            pages = paginate_text(result.get('text_content') or result.get('extracted_text') or '')
+        return pages, slides
+
+    def _document_path(self, file_id):
+        if not self.document_dir or not file_id or not all(c.isalnum() or c == '-' for c in file_id):
+            return None
+        return os.path.join(self.document_dir, file_id)
+
+    def _read_meta(self, file_id):
+        path = self._document_path(file_id)
+        if path is None:
+            return None
+        meta_path = os.path.join(path, 'meta.json')
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return meta
+
+    def _read_lines(self, file_id, name, meta, start, stop):
+        """Values start..stop-1 of a section file, read with one seek"""
+        offsets = meta['offsets'][name]
+        if start >= stop:
+            return []
+        with open(os.path.join(self._document_path(file_id), name + '.jsonl'), 'rb') as f:
+            f.seek(offsets[start])
+            data = f.read(offsets[stop] - offsets[start])
+        return [json.loads(line) for line in data.splitlines()]
+
+    @staticmethod
+    def _write_lines(path, values):
+        """Write one JSON value per line; returns the byte offset of each plus the end"""
+        offsets = [0]
+        with open(path, 'wb') as f:
+            for value in values:
+                line = json.dumps(value, default=str).encode('utf-8') + b'\n'
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        return offsets
+
 # Global instance
 file_storage = FileStorage()
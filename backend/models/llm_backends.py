@@ -0,0 +1,415 @@
+import hashlib
+import math
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+
+from models.conversation_context import estimate_tokens
+from utils.resilience import CircuitBreaker, LatencyTracker, backoff_delay, is_retryable
+
+
+class LLMBackendError(Exception):
+    """Raised by a backend when generation fails"""
+
+
+class LLMTimeoutError(LLMBackendError, TimeoutError):
+    """Raised when a call misses its deadline"""
+
+
+class LLMUnavailableError(LLMBackendError, ConnectionError):
+    """Raised when the upstream fails transiently and the call may be retried"""
+
+
+class LLMBackend:
+    """Interface every model backend implements"""
+
+    name = 'base'
+    model_name = ''
+
+    def generate(self, prompt: str, history: Optional[List[Dict]] = None,
+                 system: Optional[str] = None) -> str:
+        """Return the full model response for prompt, given prior chat history.
+        
+        system is a standing instruction (persona, format rules) kept apart
+        from the conversation so it is never repeated in the history.
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt: str, history: Optional[List[Dict]] = None,
+               system: Optional[str] = None) -> Iterator[str]:
+        """Yield the model response in chunks as they are produced"""
+        raise NotImplementedError
+
+    def count_tokens(self, text: str) -> int:
+        """Estimate the token count of text without a network call"""
+        return estimate_tokens(text)
+
+
+class GeminiBackend(LLMBackend):
+    name = 'gemini'
+    MAX_SYSTEM_MODELS = 64
+
+    def __init__(self, api_key: Optional[str] = None, model_name: str = 'gemini-2.0-flash-lite',
+                 request_timeout: Optional[float] = None):
+        import google.generativeai as genai
+
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY environment variable not set")
+
+        genai.configure(api_key=self.api_key)
+        self._genai = genai
+        self.model_name = model_name
+        # Enforced by the SDK, so an attempt abandoned at its deadline doesn't keep a pool thread
+        self.request_options = {'timeout': request_timeout} if request_timeout else None
+        self.model = genai.GenerativeModel(model_name)
+        # One model object per distinct system instruction (there are only a
+        # handful: persona x content type x language)
+        self._system_models = OrderedDict()
+        self._models_lock = threading.Lock()
+
+    def generate(self, prompt, history=None, system=None):
+        chat = self._model_for(system).start_chat(history=history or [])
+        return chat.send_message(prompt, request_options=self.request_options).text
+
+    def stream(self, prompt, history=None, system=None):
+        chat = self._model_for(system).start_chat(history=history or [])
+        for chunk in chat.send_message(prompt, stream=True, request_options=self.request_options):
+            text = getattr(chunk, 'text', '')
+            if text:
+                yield text
+
+    def count_tokens(self, text, exact=False):
+        """Local estimate by default; exact=True asks the API (one network round trip)"""
+        if exact:
+            return self.model.count_tokens(text).total_tokens
+        return super().count_tokens(text)
+
+    def _model_for(self, system):
+        if not system:
+            return self.model
+        with self._models_lock:
+            model = self._system_models.get(system)
+            if model is None:
+                model = self._genai.GenerativeModel(self.model_name, system_instruction=system)
+                self._system_models[system] = model
+                if len(self._system_models) > self.MAX_SYSTEM_MODELS:
+                    self._system_models.popitem(last=False)
+            else:
+                self._system_models.move_to_end(system)
+            return model
+
+
+class StubBackend(LLMBackend):
+    """Deterministic offline backend for load tests and benchmarks.
+
+    Response text depends only on the prompt. Latency and failures are drawn
+    from a seeded RNG, so a run with the same seed and request order is
+    reproducible.
+    """
+
+    name = 'stub'
+
+    _WORDS = (
+        'concept', 'example', 'function', 'value', 'step', 'result', 'method',
+        'data', 'structure', 'process', 'answer', 'detail', 'input', 'output',
+        'pattern', 'rule', 'case', 'model', 'system', 'note'
+    )
+
+    def __init__(self, latency_ms: float = 800, latency_spread: float = 0.5,
+                 distribution: str = 'lognormal', output_words: int = 250,
+                 failure_rate: float = 0.0, chunk_words: int = 20, seed: int = 0):
+        if distribution not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown stub latency distribution: {distribution}")
+        self.latency_ms = latency_ms
+        self.latency_spread = latency_spread
+        self.distribution = distribution
+        self.output_words = output_words
+        self.failure_rate = failure_rate
+        self.chunk_words = max(1, chunk_words)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, history=None, system=None):
+        latency, fail = self._draw()
+        time.sleep(latency)
+        if fail:
+            raise LLMUnavailableError("Stub backend injected failure")
+        return self._render(prompt)
+
+    def stream(self, prompt, history=None, system=None):
+        latency, fail = self._draw()
+        words = self._render(prompt).split(' ')
+        chunks = [' '.join(words[i:i + self.chunk_words]) for i in range(0, len(words), self.chunk_words)]
+        delay = latency / max(1, len(chunks))
+        for index, chunk in enumerate(chunks):
+            time.sleep(delay)
+            if fail and index == len(chunks) // 2:
+                raise LLMUnavailableError("Stub backend injected failure mid-stream")
+            yield chunk if index == 0 else ' ' + chunk
+
+    def _draw(self):
+        """Sample (latency seconds, should_fail) from the seeded RNG"""
+        with self._lock:
+            if self.distribution == 'fixed':
+                latency_ms = self.latency_ms
+            elif self.distribution == 'uniform':
+                spread = self.latency_ms * self.latency_spread
+                latency_ms = self._rng.uniform(self.latency_ms - spread, self.latency_ms + spread)
+            else:
+                # latency_ms is the median; latency_spread is sigma of the underlying normal
+                latency_ms = self.latency_ms * math.exp(self._rng.gauss(0, self.latency_spread))
+            fail = self._rng.random() < self.failure_rate
+        return max(0.0, latency_ms) / 1000.0, fail
+
+    def _render(self, prompt):
+        """Markdown-shaped text derived from a hash of the prompt"""
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        rng = random.Random(digest)
+        words = [rng.choice(self._WORDS) for _ in range(self.output_words)]
+        lines = ['## 🎯 RESPONSE', '']
+        for start in range(0, len(words), 25):
+            lines.append('- ' + ' '.join(words[start:start + 25]).capitalize() + '.')
+        return '\n'.join(lines)
+
+
+class ResilientBackend(LLMBackend):
+    """Wraps a backend with deadlines, retries, hedging and a circuit breaker.
+
+    Each generate() attempt runs on a bounded thread pool so a slow upstream
+    call can be abandoned at its deadline without pinning the request thread.
+    Retryable failures are retried with jittered exponential backoff. With
+    hedging enabled, a second identical request is sent once the first has
+    run longer than the recent p95 latency, and the first success wins.
+    stream() reads the upstream stream on the same pool and gives up when the
+    first chunk takes longer than first_chunk_timeout (default: timeout) or
+    the gap between chunks exceeds idle_timeout.
+    """
+
+    def __init__(self, backend: LLMBackend, timeout: float = 30, max_retries: int = 2,
+                 retry_base_delay: float = 0.5, retry_max_delay: float = 8.0,
+                 hedge: bool = False, hedge_min_samples: int = 20,
+                 breaker: Optional[CircuitBreaker] = None, max_workers: int = 32,
+                 first_chunk_timeout: Optional[float] = None, idle_timeout: float = 15):
+        self.backend = backend
+        self.name = backend.name
+        self.model_name = backend.model_name
+        self.timeout = timeout
+        self.first_chunk_timeout = first_chunk_timeout or timeout
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-call')
+        self._counters = {'calls': 0, 'retries': 0, 'hedges': 0, 'timeouts': 0, 'failures': 0}
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, history=None, system=None):
+        self._count('calls')
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call()
+            try:
+                result = self._attempt(prompt, history, system)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Upstream answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self._count('failures')
+                if attempt == self.max_retries:
+                    raise
+                self._count('retries')
+                time.sleep(backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay))
+            else:
+                self.breaker.record_success()
+                return result
+
+    def stream(self, prompt, history=None, system=None):
+        """Retry only until the first chunk arrives; later failures propagate"""
+        self._count('calls')
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call()
+            started = False
+            settled = False
+            start = time.monotonic()
+            chunks = self._timed_stream(prompt, history, system)
+            try:
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+            except Exception as e:
+                settled = True
+                if not is_retryable(e):
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self._count('failures')
+                if started or attempt == self.max_retries:
+                    raise
+                self._count('retries')
+                time.sleep(backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay))
+            else:
+                settled = True
+                self.breaker.record_success()
+                self.latency.record(time.monotonic() - start)
+                return
+            finally:
+                chunks.close()
+                if not settled:
+                    # Closed by the consumer (GeneratorExit): neither success nor failure,
+                    # but a half-open probe must not stay in flight forever
+                    self.breaker.release_probe()
+
+    def _timed_stream(self, prompt, history, system):
+        """The backend's stream read on the pool, with first-chunk and idle deadlines"""
+        chunks = queue.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def pump():
+            stream = self.backend.stream(prompt, history, system)
+            try:
+                for chunk in stream:
+                    if stop.is_set():
+                        break
+                    chunks.put((chunk, None))
+                chunks.put((done, None))
+            except Exception as e:
+                chunks.put((done, e))
+            finally:
+                close = getattr(stream, 'close', None)
+                if close:
+                    close()
+
+        self._executor.submit(pump)
+        started = False
+        try:
+            while True:
+                timeout = self.idle_timeout if started else self.first_chunk_timeout
+                try:
+                    chunk, error = chunks.get(timeout=timeout)
+                except queue.Empty:
+                    self._count('timeouts')
+                    waited = 'next chunk' if started else 'first chunk'
+                    raise LLMTimeoutError(f"{self.name} stream: no {waited} within {timeout}s")
+                if chunk is done:
+                    if error is not None:
+                        raise error
+                    return
+                started = True
+                yield chunk
+        finally:
+            stop.set()
+
+    def count_tokens(self, text):
+        return self.backend.count_tokens(text)
+
+    def stats(self):
+        p95 = self.latency.percentile(95)
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            'backend': self.name,
+            'circuit_breaker': self.breaker.snapshot(),
+            'p95_latency_ms': round(p95 * 1000) if p95 is not None else None,
+            'timeout': self.timeout,
+            'hedging': self.hedge,
+            **counters
+        }
+
+    def _attempt(self, prompt, history, system=None):
+        """One logical attempt: a deadline-bounded call, optionally hedged"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        hedge_after = self.latency.percentile(95, self.hedge_min_samples) if self.hedge else None
+        pending = {self._executor.submit(self.backend.generate, prompt, history, system)}
+        hedged = False
+        error = None
+
+        while pending:
+            now = time.monotonic()
+            remaining = deadline - now
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if hedge_after is not None and not hedged:
+                wait_for = min(remaining, max(0.0, start + hedge_after - now))
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                self.latency.record(time.monotonic() - start)
+                for other in pending:
+                    other.cancel()
+                return result
+
+            if not done and hedge_after is not None and not hedged:
+                hedged = True
+                self._count('hedges')
+                pending.add(self._executor.submit(self.backend.generate, prompt, history, system))
+
+        if pending:
+            for future in pending:
+                future.cancel()
+            self._count('timeouts')
+            raise LLMTimeoutError(f"{self.name} call exceeded {self.timeout}s deadline")
+        raise error
+
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+
+
+def create_backend(config=None) -> LLMBackend:
+    """Build the backend named by LLM_BACKEND in config, wrapped for resilience"""
+    config = config or {}
+    return ResilientBackend(
+        _create_base_backend(config),
+        timeout=config.get('LLM_TIMEOUT', 30),
+        max_retries=config.get('LLM_MAX_RETRIES', 2),
+        retry_base_delay=config.get('LLM_RETRY_BASE_DELAY', 0.5),
+        retry_max_delay=config.get('LLM_RETRY_MAX_DELAY', 8.0),
+        hedge=config.get('LLM_HEDGE_ENABLED', False),
+        hedge_min_samples=config.get('LLM_HEDGE_MIN_SAMPLES', 20),
+        first_chunk_timeout=config.get('LLM_STREAM_FIRST_CHUNK_TIMEOUT'),
+        idle_timeout=config.get('LLM_STREAM_IDLE_TIMEOUT', 15),
+        breaker=CircuitBreaker(
+            failure_threshold=config.get('LLM_BREAKER_FAILURE_THRESHOLD', 5),
+            reset_timeout=config.get('LLM_BREAKER_RESET_TIMEOUT', 30)
+        )
+    )
+
+
+def _create_base_backend(config) -> LLMBackend:
+    name = (config.get('LLM_BACKEND') or 'gemini').lower()
+
+    if name == 'gemini':
+        return GeminiBackend(
+            api_key=config.get('GEMINI_API_KEY'),
+            model_name=config.get('GEMINI_MODEL', 'gemini-2.0-flash-lite'),
+            request_timeout=config.get('LLM_TIMEOUT', 30)
+        )
+    if name == 'stub':
+        return StubBackend(
+            latency_ms=config.get('STUB_LATENCY_MS', 800),
+            latency_spread=config.get('STUB_LATENCY_SPREAD', 0.5),
+            distribution=config.get('STUB_LATENCY_DISTRIBUTION', 'lognormal'),
+            output_words=config.get('STUB_OUTPUT_WORDS', 250),
+            failure_rate=config.get('STUB_FAILURE_RATE', 0.0),
+            seed=config.get('STUB_SEED', 0)
+        )
+    raise ValueError(f"Unknown LLM_BACKEND: {name}")
@@ -0,0 +1,230 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+def estimate_size(value) -> int:
+    """Approximate memory held by a pooled value via its size_bytes() method, if any"""
+    size_bytes = getattr(value, 'size_bytes', None)
+    return size_bytes() if callable(size_bytes) else 0
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'last_access')
+
+    def __init__(self, value, size, last_access):
+        self.value = value
+        self.size = size
+        self.last_access = last_access
+
+
+class SessionPool:
+    """Thread-safe LRU pool of chat sessions bounded by count, memory and idle TTL"""
+
+    def __init__(self, max_sessions: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 idle_ttl: float = 3600, size_fn: Callable[[Any], int] = estimate_size):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.size_fn = size_fn
+        self.logger = logging.getLogger(__name__)
+
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._eviction_hooks: List[Callable[[str, Any], None]] = []
+        self._evictions = 0  # sessions pushed out by the limits or the idle TTL
+        self._discards = 0  # sessions removed on request
+
+    def add_eviction_hook(self, hook: Callable[[str, Any], None]):
+        """Register a callback run as hook(session_id, value) when a session leaves the pool"""
+        self._eviction_hooks.append(hook)
+
+    def get(self, session_id: str, default=None):
+        """Return a live session and mark it most recently used"""
+        removed = []
+        with self._lock:
+            value = self._get(session_id, removed)
+        self._run_hooks(removed)
+        return default if value is None else value
+
+    def get_or_create(self, session_id: str, factory: Callable[[], Any]):
+        """Return the pooled session, creating it with factory() on a miss"""
+        removed = []
+        with self._lock:
+            value = self._get(session_id, removed)
+            if value is None:
+                value = factory()
+                self._put(session_id, value, removed)
+        self._run_hooks(removed)
+        return value
+
+    def setdefault(self, session_id: str, value):
+        """Insert value unless a live session already exists; returns the pooled value"""
+        removed = []
+        with self._lock:
+            existing = self._get(session_id, removed)
+            if existing is None:
+                self._put(session_id, value, removed)
+        self._run_hooks(removed)
+        return value if existing is None else existing
+
+    def put(self, session_id: str, value):
+        """Insert or replace a session, then evict down to the configured limits"""
+        removed = []
+        with self._lock:
+            self._put(session_id, value, removed)
+        self._run_hooks(removed)
+
+    def refresh(self, session_id: str):
+        """Re-measure a session after its history has grown"""
+        removed = []
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            size = self._measure(entry.value)
+            self._total_bytes += size - entry.size
+            entry.size = size
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(session_id)
+            self._enforce_limits(removed, keep=session_id)
+        self._run_hooks(removed)
+
+    def discard(self, session_id: str) -> bool:
+        """Remove a session and run eviction hooks; returns True if it existed"""
+        removed = []
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id, removed, evicted=False)
+        self._run_hooks(removed)
+        return bool(removed)
+
+    def sweep(self) -> int:
+        """Evict every session idle for longer than the TTL"""
+        removed = []
+        with self._lock:
+            now = time.monotonic()
+            for session_id in [sid for sid, entry in self._entries.items() if self._is_expired(entry, now)]:
+                self._remove(session_id, removed)
+        self._run_hooks(removed)
+        return len(removed)
+
+    def clear(self):
+        removed = []
+        with self._lock:
+            for session_id in list(self._entries):
+                self._remove(session_id, removed, evicted=False)
+        self._run_hooks(removed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy for monitoring"""
+        with self._lock:
+            return {
+                'sessions': len(self._entries),
+                'max_sessions': self.max_sessions,
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'idle_ttl': self.idle_ttl,
+                'evictions': self._evictions,
+                'discards': self._discards
+            }
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id):
+        value = self.get(session_id)
+        if value is None:
+            raise KeyError(session_id)
+        return value
+
+    def __setitem__(self, session_id, value):
+        self.put(session_id, value)
+
+    def __delitem__(self, session_id):
+        if not self.discard(session_id):
+            raise KeyError(session_id)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _measure(self, value) -> int:
+        try:
+            return int(self.size_fn(value))
+        except Exception:
+            return 0
+
+    def _is_expired(self, entry: _Entry, now: float) -> bool:
+        return bool(self.idle_ttl) and now - entry.last_access > self.idle_ttl
+
+    def _get(self, session_id, removed):
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if self._is_expired(entry, now):
+            self._remove(session_id, removed)
+            return None
+        entry.last_access = now
+        self._entries.move_to_end(session_id)
+        return entry.value
+
+    def _put(self, session_id, value, removed):
+        if session_id in self._entries:
+            self._remove(session_id)
+        size = self._measure(value)
+        self._entries[session_id] = _Entry(value, size, time.monotonic())
+        self._total_bytes += size
+        self._enforce_limits(removed, keep=session_id)
+
+    def _expire_head(self, removed, keep: Optional[str] = None):
+        """Evict idle sessions from the LRU end, stopping at the first live one.
+
+        Every access moves a session to the tail, so the entries are ordered by
+        last_access and nothing behind a live head can have expired; this costs
+        only the evictions it makes, unlike a full sweep().
+        """
+        now = time.monotonic()
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if session_id == keep or not self._is_expired(entry, now):
+                break
+            self._remove(session_id, removed)
+
+    def _enforce_limits(self, removed, keep: Optional[str] = None):
+        self._expire_head(removed, keep)
+        while self._entries and (len(self._entries) > self.max_sessions or
+                                 (self.max_bytes and self._total_bytes > self.max_bytes)):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                # Never evict the session being written; a single oversized session is allowed
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(keep)
+                oldest = next(iter(self._entries))
+            self._remove(oldest, removed)
+
+    def _remove(self, session_id: str, removed: Optional[list] = None, evicted: bool = True):
+        """Drop an entry; unless it is being replaced (removed is None), queue it for the hooks"""
+        entry = self._entries.pop(session_id)
+        self._total_bytes -= entry.size
+        if removed is None:
+            return
+        if evicted:
+            self._evictions += 1
+        else:
+            self._discards += 1
+        removed.append((session_id, entry.value))
+
+    def _run_hooks(self, removed):
+        """Run eviction hooks outside the lock, so slow cleanup doesn't hold up other sessions"""
+        for session_id, value in removed:
+            for hook in self._eviction_hooks:
+                try:
+                    hook(session_id, value)
+                except Exception as e:
+                    self.logger.error(f"Session eviction hook failed for {session_id}: {e}")
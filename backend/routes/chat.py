@@ -1,11 +1,93 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_cors import cross_origin
-from datetime import datetime
+from datetime import datetime, timedelta
 from models.chat import db, Chat, Message
+from sqlalchemy import insert
+from routes.file_processing import get_file_storage, get_table_store
+from utils.table_query import parse_table_question, run_table_query, describe_query, format_table, numeric_columns
+import json
+import time
 import uuid
 
 chat_bp = Blueprint('chat', __name__)
 
+def get_study_buddy():
+    """Return the app-scoped StudyBuddyAI engine created in create_app"""
+    study_buddy = current_app.extensions.get('study_buddy')
+    if study_buddy is None:
+        raise RuntimeError('AI engine is not initialized (check LLM_BACKEND and GEMINI_API_KEY)')
+    return study_buddy
+
+def get_or_create_chat(session_id):
+    chat = Chat.query.filter_by(session_id=session_id).first()
+    if not chat:
+        chat = Chat(session_id=session_id)
+        db.session.add(chat)
+        db.session.commit()
+    return chat
+
+def file_context(data):
+    """(file_content, meta_data) for a chat turn.
+    
+    Clients either send file_content directly or the file_id of an uploaded
+    document, whose opening text is read from the server-side store. Raises
+    LookupError for an unknown file_id.
+    """
+    file_id = data.get('file_id')
+    file_content = data.get('file_content')
+    if file_id and not file_content:
+        file_content = get_file_storage().document_text(
+            file_id, current_app.config.get('DOCUMENT_CONTEXT_CHARS', 2000))
+        if file_content is None:
+            raise LookupError(f'Document {file_id} not found or expired')
+        return file_content, {'file_id': file_id}
+    return file_content, {'file_content': file_content} if file_content else None
+
+def table_answer(query, file_meta):
+    """Answer an aggregate question about an uploaded spreadsheet from its stored columns.
+    
+    Returns {'query', 'columns', 'rows', 'markdown', 'elapsed_ms'}, or None when
+    no spreadsheet is attached or the question isn't one the engine understands.
+    """
+    file_id = (file_meta or {}).get('file_id')
+    tables = get_table_store()
+    if not query or not file_id or tables is None:
+        return None
+    document = get_file_storage().get_document(file_id)
+    if not document or not document.get('table_key'):
+        return None
+    
+    started = time.perf_counter()
+    frames = tables.load(document['table_key'])
+    if not frames:
+        return None
+    spec = parse_table_question(query, {sheet: list(frame.columns) for sheet, frame in frames.items()},
+                                numeric_columns(frames))
+    if spec is None:
+        return None
+    try:
+        result = run_table_query(frames[spec.sheet], spec)
+    except (KeyError, TypeError, ValueError) as e:
+        current_app.logger.warning(f"Table query failed for {file_id}: {e}")
+        return None
+    split = json.loads(result.to_json(orient='split', date_format='iso', index=False))
+    return {
+        'query': describe_query(spec),
+        'columns': split['columns'],
+        'rows': split['data'],
+        'markdown': format_table(result, max_rows=current_app.config.get('TABLE_RESULT_ROWS', 30)),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
+def table_context(table):
+    """What the model sees for a locally answered question: only the computed result"""
+    return (f"EXACT RESULT computed from the uploaded spreadsheet ({table['query']}). "
+            f"Explain it for the user; do not recalculate it or add other figures.\n\n{table['markdown']}")
+
+def sse_event(event, data):
+    """Encode one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @chat_bp.route('/chat', methods=['POST', 'OPTIONS'])
 @cross_origin(supports_credentials=True)
 def chat():
@@ -15,13 +97,15 @@ def chat():
         return response, 200
     
     try:
-        from models.ai_model import StudyBuddyAI
-        study_buddy = StudyBuddyAI()
+        study_buddy = get_study_buddy()
         
         data = request.get_json()
         query = data.get('message', '').strip()
         session_id = data.get('session_id')
-        file_content = data.get('file_content')
+        try:
+            file_content, file_meta = file_context(data)
+        except LookupError as e:
+            return jsonify({'error': str(e), 'success': False}), 404
         
         if not query and not file_content:
             return jsonify({
@@ -30,23 +114,28 @@ def chat():
             }), 400
 
         # Get or create chat session
-        chat = Chat.query.filter_by(session_id=session_id).first()
-        if not chat:
-            chat = Chat(session_id=session_id)
-            db.session.add(chat)
-            db.session.commit()
+        chat = get_or_create_chat(session_id)
 
         # Store user message
         user_message = Message(
             chat_id=chat.id,
             type='user',
             content=query,
-            meta_data={'file_content': file_content} if file_content else None
+            meta_data=file_meta
         )
         db.session.add(user_message)
         
-        # Get AI response
-        response_data = study_buddy.get_response(query, session_id, file_content)
+        # Aggregate questions about a spreadsheet are computed locally; the model only narrates
+        table = table_answer(query, file_meta)
+        if table is None:
+            response_data = study_buddy.get_response(query, session_id, file_content)
+        elif current_app.config.get('TABLE_QUERY_NARRATE', True):
+            response_data = study_buddy.get_response(query, session_id, table_context(table))
+            response_data['table'] = table
+        else:
+            response_data = study_buddy.record_local_answer(query, session_id, table['markdown'],
+                                                            table_context(table))
+            response_data['table'] = table
         
         # Store bot message
         bot_message = Message(
@@ -70,6 +159,205 @@ def chat():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@chat_bp.route('/chat/stream', methods=['POST', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def chat_stream():
+    """Stream the AI response as Server-Sent Events"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    try:
+        study_buddy = get_study_buddy()
+        
+        data = request.get_json()
+        query = data.get('message', '').strip()
+        session_id = data.get('session_id')
+        try:
+            file_content, file_meta = file_context(data)
+        except LookupError as e:
+            return jsonify({'error': str(e), 'success': False}), 404
+        
+        if not query and not file_content:
+            return jsonify({
+                'error': 'Message is required',
+                'success': False
+            }), 400
+        
+        chat = get_or_create_chat(session_id)
+        chat_id = chat.id
+        table = table_answer(query, file_meta)
+        narrate = current_app.config.get('TABLE_QUERY_NARRATE', True)
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'success': False,
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    
+    def events():
+        if table is None:
+            yield from study_buddy.stream_response(query, session_id, file_content)
+            return
+        yield 'table', table
+        if narrate:
+            yield from study_buddy.stream_response(query, session_id, table_context(table))
+            return
+        result = study_buddy.record_local_answer(query, session_id, table['markdown'], table_context(table))
+        yield 'chunk', result['response']
+        yield 'done', result
+    
+    def generate():
+        for event, payload in events():
+            if event == 'chunk':
+                yield sse_event('chunk', {'content': payload})
+                continue
+            
+            if event == 'done':
+                # Persist the exchange once the full answer is known
+                try:
+                    db.session.add(Message(
+                        chat_id=chat_id,
+                        type='user',
+                        content=query,
+                        meta_data=file_meta
+                    ))
+                    db.session.add(Message(
+                        chat_id=chat_id,
+                        type='bot',
+                        content=payload['response'],
+                        meta_data={
+                            'detected_language': payload.get('detected_language'),
+                            'subject_area': payload.get('subject_area', 'general')
+                        }
+                    ))
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.error(f"Failed to persist streamed message: {e}")
+            
+            yield sse_event(event, payload)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@chat_bp.route('/chat/batch', methods=['POST', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def chat_batch():
+    """Answer many queries concurrently, streaming results back as NDJSON"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    try:
+        study_buddy = get_study_buddy()
+        
+        data = request.get_json()
+        queries = data.get('queries')
+        max_queries = current_app.config.get('BATCH_MAX_QUERIES', 500)
+        
+        if not isinstance(queries, list) or not queries:
+            return jsonify({
+                'error': 'queries must be a non-empty list',
+                'success': False
+            }), 400
+        
+        if len(queries) > max_queries:
+            return jsonify({
+                'error': f'Too many queries. Maximum per batch: {max_queries}',
+                'success': False
+            }), 413
+        
+        # Each entry is either a message string or {'message': ..., 'file_content' or 'file_id': ...}
+        items = []
+        file_metas = []
+        for entry in queries:
+            if isinstance(entry, dict):
+                try:
+                    file_content, file_meta = file_context(entry)
+                except LookupError as e:
+                    return jsonify({'error': str(e), 'success': False}), 404
+                items.append(((entry.get('message') or '').strip(), file_content))
+                file_metas.append(file_meta)
+            else:
+                items.append((str(entry).strip(), None))
+                file_metas.append(None)
+        
+        if not all(query or file_content for query, file_content in items):
+            return jsonify({
+                'error': 'Every query needs a message',
+                'success': False
+            }), 400
+        
+        session_id = data.get('session_id') or str(uuid.uuid4())
+        chat_id = get_or_create_chat(session_id).id
+        max_workers = current_app.config.get('BATCH_MAX_WORKERS', 8)
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'success': False,
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    
+    def generate():
+        results = {}
+        for index, result in study_buddy.iter_batch_responses(items, max_workers=max_workers):
+            result['index'] = index
+            result['session_id'] = session_id
+            results[index] = result
+            yield json.dumps(result) + '\n'
+        
+        # Store every exchange in one transaction, in submission order; timestamps step
+        # by a microsecond so the rows also sort in that order by time
+        rows = []
+        stored_at = datetime.utcnow()
+        for index in sorted(results):
+            query = items[index][0]
+            result = results[index]
+            rows.append({
+                'chat_id': chat_id,
+                'type': 'user',
+                'content': query,
+                'timestamp': stored_at + timedelta(microseconds=len(rows)),
+                'meta_data': file_metas[index]
+            })
+            rows.append({
+                'chat_id': chat_id,
+                'type': 'bot',
+                'content': result['response'],
+                'timestamp': stored_at + timedelta(microseconds=len(rows)),
+                'meta_data': {
+                    'detected_language': result.get('detected_language'),
+                    'subject_area': result.get('subject_area', 'general')
+                }
+            })
+        
+        stored = True
+        try:
+            db.session.execute(insert(Message), rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            stored = False
+            current_app.logger.error(f"Failed to store batch messages: {e}")
+        
+        yield json.dumps({
+            'type': 'summary',
+            'session_id': session_id,
+            'total': len(items),
+            'succeeded': sum(1 for result in results.values() if result.get('success')),
+            'stored': stored,
+            'timestamp': datetime.now().isoformat()
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @chat_bp.route('/new-session', methods=['POST', 'OPTIONS'])
 @cross_origin(supports_credentials=True)
 def new_session():
@@ -104,6 +392,10 @@ def clear_session():
         session_id = data.get('session_id')
         
         if session_id:
+            study_buddy = current_app.extensions.get('study_buddy')
+            if study_buddy is not None:
+                study_buddy.clear_session(session_id)
+            
             chat = Chat.query.filter_by(session_id=session_id).first()
             if chat:
                 db.session.delete(chat)
@@ -134,7 +426,7 @@ def get_chat_history():
         chat_history = []
         
         for chat in chats:
-            messages = Message.query.filter_by(chat_id=chat.id).order_by(Message.timestamp).all()
+            messages = Message.query.filter_by(chat_id=chat.id).order_by(Message.timestamp, Message.id).all()
             first_user_msg = next((msg for msg in messages if msg.type == 'user'), None)
             last_bot_msg = next((msg for msg in reversed(messages) if msg.type == 'bot'), None)
             
@@ -1,15 +1,26 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_cors import cross_origin
 from werkzeug.utils import secure_filename
 import os
 import uuid
+import functools
+import json
 from datetime import datetime
-import tempfile
 import logging
+from utils.parse_jobs import ParseJobQueue, ParseQueueFull
+from utils.parse_cache import ParseCache, save_and_hash
+from utils.chunked_uploads import ChunkedUploadStore, UploadError
+from utils.file_types import SNIFF_BYTES, matches_extension
+from utils.parsers import parse_file
+from utils.table_query import TableStore
+from models.file_storage import FileStorage
 
 file_bp = Blueprint('files', __name__)
 logger = logging.getLogger(__name__)
 
+# Bump whenever parse_file output changes so cached results are invalidated
+PARSER_VERSION = '8'
+
 ALLOWED_EXTENSIONS = {
     'pdf', 'txt', 'docx', 'doc', 'xlsx', 'xls', 'pptx', 'ppt',
     'jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'webp'
@@ -18,170 +29,189 @@ ALLOWED_EXTENSIONS = {
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def parse_file_content(filepath, file_extension, filename):
-    """Parse uploaded file content - Your enhanced version"""
+def get_parse_jobs():
+    """Return the app-scoped parse job queue, creating it on first use"""
+    jobs = current_app.extensions.get('parse_jobs')
+    if jobs is None:
+        jobs = current_app.extensions['parse_jobs'] = ParseJobQueue(
+            max_workers=current_app.config.get('PARSE_WORKERS', 2),
+            max_pending=current_app.config.get('PARSE_QUEUE_MAX', 16),
+            result_ttl=current_app.config.get('PARSE_JOB_TTL', 900),
+            state_dir=(current_app.config.get('PARSE_JOB_DIR') or
+                       os.path.join(current_app.config['UPLOAD_FOLDER'], 'parse_jobs'))
+        )
+    return jobs
+
+def get_parse_cache():
+    """Return the app-scoped parse result cache, or None when it is disabled"""
+    if 'parse_cache' not in current_app.extensions:
+        max_bytes = current_app.config.get('PARSE_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+        cache = None
+        if max_bytes > 0:
+            directory = (current_app.config.get('PARSE_CACHE_DIR') or
+                         os.path.join(current_app.config['UPLOAD_FOLDER'], 'parse_cache'))
+            cache = ParseCache(directory, max_bytes=max_bytes, parser_version=PARSER_VERSION)
+        current_app.extensions['parse_cache'] = cache
+    return current_app.extensions['parse_cache']
+
+def get_chunked_uploads():
+    """Return the app-scoped resumable upload store, creating it on first use"""
+    store = current_app.extensions.get('chunked_uploads')
+    if store is None:
+        directory = (current_app.config.get('CHUNKED_UPLOAD_DIR') or
+                     os.path.join(current_app.config['UPLOAD_FOLDER'], 'chunked'))
+        store = current_app.extensions['chunked_uploads'] = ChunkedUploadStore(
+            directory,
+            max_bytes=current_app.config.get('CHUNKED_UPLOAD_MAX_BYTES', 512 * 1024 * 1024),
+            ttl=current_app.config.get('CHUNKED_UPLOAD_TTL', 86400)
+        )
+    return store
+
+def get_file_storage():
+    """Return the app-scoped store of parsed documents, creating it on first use"""
+    storage = current_app.extensions.get('file_storage')
+    if storage is None:
+        directory = (current_app.config.get('DOCUMENT_STORE_DIR') or
+                     os.path.join(current_app.config['UPLOAD_FOLDER'], 'documents'))
+        storage = current_app.extensions['file_storage'] = FileStorage(
+            directory, ttl=current_app.config.get('DOCUMENT_STORE_TTL', 7 * 86400)
+        )
+    return storage
+
+def get_table_store():
+    """Return the app-scoped store of spreadsheet columns, or None when it is disabled"""
+    if 'table_store' not in current_app.extensions:
+        store = None
+        if current_app.config.get('TABLE_MAX_ROWS', 200000) > 0:
+            directory = (current_app.config.get('TABLE_STORE_DIR') or
+                         os.path.join(current_app.config['UPLOAD_FOLDER'], 'tables'))
+            store = TableStore(directory, ttl=current_app.config.get('DOCUMENT_STORE_TTL', 7 * 86400))
+        current_app.extensions['table_store'] = store
+    return current_app.extensions['table_store']
+
+def job_workers(setting):
+    """Processes or threads one parse job may use: the configured count, or by default its
+    share of the CPUs, since PARSE_WORKERS jobs run side by side"""
+    workers = current_app.config.get(setting, 0)
+    if workers:
+        return workers
+    return max(1, (os.cpu_count() or 1) // max(1, current_app.config.get('PARSE_WORKERS', 2)))
+
+def get_pdf_options():
+    """PDF extraction limits from config, passed along with each parse job"""
+    return {
+        'max_pages': current_app.config.get('PDF_MAX_PAGES', 2000),
+        'workers': job_workers('PDF_WORKERS'),
+        'page_timeout': current_app.config.get('PDF_PAGE_TIMEOUT', 10)
+    }
+
+def get_ocr_options():
+    """Image OCR settings from config, passed along with each parse job"""
+    max_bytes = current_app.config.get('OCR_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    cache_dir = None
+    if max_bytes > 0:
+        cache_dir = (current_app.config.get('OCR_CACHE_DIR') or
+                     os.path.join(current_app.config['UPLOAD_FOLDER'], 'ocr_cache'))
+    return {
+        'lang': current_app.config.get('OCR_LANG', 'eng'),
+        'target_dpi': current_app.config.get('OCR_TARGET_DPI', 300),
+        'workers': job_workers('OCR_WORKERS'),
+        'max_frames': current_app.config.get('OCR_MAX_FRAMES', 20),
+        'timeout': current_app.config.get('OCR_TIMEOUT', 30),
+        'cache_dir': cache_dir,
+        'cache_max_bytes': max_bytes
+    }
+
+def upload_error(error):
+    body = {'success': False, 'error': str(error)}
+    if error.offset is not None:
+        body['offset'] = error.offset
+    return jsonify(body), error.status
+
+def sse_event(event, data):
+    """Encode one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def queue_parse(path, digest, size, filename, file_extension, file_id):
+    """Answer from the parse cache or queue a parse job for a file already on disk.
+    
+    Ownership of path passes to this function: it is removed on a cache hit
+    or rejection, and by the worker after parsing. The parsed document is
+    kept in the file store under file_id; responses and jobs carry only its
+    metadata and outline.
+    """
+    storage = get_file_storage()
+    
+    # Same bytes parsed before (by this parser version): answer from the cache
+    cache = get_parse_cache()
+    tables = get_table_store() if file_extension in ('xlsx', 'xls') else None
+    cached = cache.get(digest, file_extension) if cache else None
+    if cached is not None and cached.get('table_key') and not (tables and tables.exists(cached['table_key'])):
+        cached = None  # the columns for local queries are gone; parse again to rebuild them
+    if cached is not None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        document = storage.store_document(file_id, filename, file_extension, cached)
+        job = get_parse_jobs().add_finished(filename, file_extension, document, file_id=file_id)
+        logger.info(f"Parse cache hit for {filename} ({digest[:12]})")
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'cached': True,
+            'file_id': file_id,
+            'filename': filename,
+            'file_type': file_extension,
+            'content': document,
+            'status_url': f'/api/files/jobs/{job.id}',
+            'timestamp': datetime.now().isoformat(),
+            'message': f'File "{filename}" processed successfully by Nexus!'
+        })
+    
+    def on_success(result):
+        if cache and not result.get('ocr_error'):  # OCR may work once tesseract is installed
+            cache.put(digest, file_extension, result)
+        return storage.store_document(file_id, filename, file_extension, result)
+    
+    # Parse in the worker pool; the worker removes the temporary file
     try:
-        if file_extension == 'txt':
-            # Handle multiple encodings for text files
-            for encoding in ['utf-8', 'utf-16', 'utf-16-le', 'latin-1']:
-                try:
-                    with open(filepath, 'r', encoding=encoding, errors='ignore') as f:
-                        content = f.read().replace('\x00', '').strip()
-                    if content:
-                        return {
-                            'type': 'text',
-                            'text_content': content,
-                            'word_count': len(content.split()),
-                            'summary': f'Text file with {len(content.split())} words processed successfully'
-                        }
-                except:
-                    continue
-        
-        elif file_extension == 'pdf':
-            try:
-                from pypdf import PdfReader
-                reader = PdfReader(filepath)
-                text_pages = []
-                for i, page in enumerate(reader.pages):
-                    page_text = page.extract_text() or ''
-                    if page_text.strip():
-                        text_pages.append(f"--- Page {i+1} ---\n{page_text}")
-                
-                full_text = '\n\n'.join(text_pages)
-                return {
-                    'type': 'pdf',
-                    'text_content': full_text,
-                    'page_count': len(reader.pages),
-                    'word_count': len(full_text.split()),
-                    'summary': f'PDF with {len(reader.pages)} pages processed successfully'
-                }
-            except ImportError:
-                return {
-                    'type': 'pdf',
-                    'summary': f'PDF "{filename}" uploaded (install pypdf for text extraction)',
-                    'requires': 'pypdf'
-                }
-        
-        elif file_extension == 'docx':
-            try:
-                from docx import Document
-                doc = Document(filepath)
-                paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-                full_text = '\n\n'.join(paragraphs)
-                
-                return {
-                    'type': 'docx',
-                    'text_content': full_text,
-                    'paragraph_count': len(paragraphs),
-                    'word_count': len(full_text.split()),
-                    'summary': f'Word document with {len(paragraphs)} paragraphs processed successfully'
-                }
-            except ImportError:
-                return {
-                    'type': 'docx',
-                    'summary': f'Word document "{filename}" uploaded (install python-docx)',
-                    'requires': 'python-docx'
-                }
-        
-        elif file_extension in ['xlsx', 'xls']:
-            try:
-                import pandas as pd
-                df = pd.read_excel(filepath)
-                return {
-                    'type': 'excel',
-                    'data_preview': df.head(5).to_dict('records'),
-                    'shape': df.shape,
-                    'columns': df.columns.tolist(),
-                    'summary': f'Excel file with {df.shape[0]} rows and {df.shape[1]} columns processed'
-                }
-            except ImportError:
-                return {
-                    'type': 'excel',
-                    'summary': f'Excel "{filename}" uploaded (install pandas)',
-                    'requires': 'pandas'
-                }
-        
-        # Add PowerPoint support (missing from minimal version)
-        elif file_extension in ['pptx', 'ppt']:
-            try:
-                from pptx import Presentation
-                prs = Presentation(filepath)
-                slides_content = []
-                
-                for slide_num, slide in enumerate(prs.slides):
-                    slide_text = []
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text") and shape.text.strip():
-                            slide_text.append(shape.text.strip())
-                    
-                    if slide_text:
-                        slides_content.append({
-                            'slide_number': slide_num + 1,
-                            'content': slide_text,
-                            'text': '\n'.join(slide_text)
-                        })
-                
-                all_text = '\n\n'.join([slide['text'] for slide in slides_content])
-                
-                return {
-                    'type': 'pptx',
-                    'text_content': all_text,
-                    'slides': slides_content,
-                    'total_slides': len(slides_content),
-                    'summary': f'PowerPoint with {len(slides_content)} slides processed successfully'
-                }
-            except ImportError:
-                return {
-                    'type': 'pptx',
-                    'summary': f'PowerPoint "{filename}" uploaded (install python-pptx)',
-                    'requires': 'python-pptx'
-                }
-        
-        # Add Image OCR support (missing from minimal version)
-        elif file_extension in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'webp']:
-            try:
-                from PIL import Image
-                image = Image.open(filepath)
-                
-                extracted_text = ""
-                try:
-                    import pytesseract
-                    extracted_text = pytesseract.image_to_string(image).strip()
-                except ImportError:
-                    extracted_text = "OCR not available (install pytesseract)"
-                except Exception as e:
-                    extracted_text = f"OCR failed: {str(e)}"
-                
-                return {
-                    'type': 'image',
-                    'metadata': {
-                        'format': image.format,
-                        'size': image.size,
-                        'mode': image.mode
-                    },
-                    'extracted_text': extracted_text,
-                    'has_text': bool(extracted_text and "OCR" not in extracted_text),
-                    'summary': f'Image "{filename}" ({image.size[0]}x{image.size[1]}) processed successfully'
-                }
-            except ImportError:
-                return {
-                    'type': 'image',
-                    'summary': f'Image "{filename}" received (processing requires Pillow)',
-                    'requires': 'Pillow'
-                }
-        
-        else:
-            return {
-                'type': file_extension,
-                'summary': f'File "{filename}" uploaded successfully'
-            }
+        options = {'pdf': get_pdf_options(), 'image': get_ocr_options()}
+        if tables:
+            options['excel'] = {'max_rows': current_app.config.get('TABLE_MAX_ROWS', 200000),
+                                'tables_path': tables.path(digest)}
+        parse = functools.partial(parse_file, options=options)
+        job = get_parse_jobs().submit(parse, path, file_extension, filename,
+                                      file_id=file_id, on_success=on_success)
+    except ParseQueueFull as e:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        logger.warning(f"Rejected upload {filename}: {e}")
+        response = jsonify({
+            'success': False,
+            'error': 'The server is busy processing other files. Please try again shortly.'
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
     
-    except Exception as e:
-        logger.error(f"File parsing error: {e}")
-        return {
-            'error': f'Error processing {filename}: {str(e)}',
-            'summary': f'File processing failed'
-        }
+    logger.info(f"Queued file {filename} ({size} bytes) as parse job {job.id}")
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'cached': False,
+        'file_id': file_id,
+        'filename': filename,
+        'file_type': file_extension,
+        'status_url': f'/api/files/jobs/{job.id}',
+        'events_url': f'/api/files/jobs/{job.id}/events',
+        'timestamp': datetime.now().isoformat(),
+        'message': f'File "{filename}" received by Nexus and queued for processing'
+    }), 202
 
 # **ONLY CHANGE: Add credentials support to CORS decorators**
 @file_bp.route('/upload', methods=['POST', 'OPTIONS'])
@@ -232,33 +262,18 @@ def upload_file():
         filename = secure_filename(file.filename)
         file_extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
         
-        # Process file in temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as temp_file:
-            file.save(temp_file.name)
-            temp_path = temp_file.name
-        
-        logger.info(f"Processing file: {filename}")
-        
-        # Parse file content
-        parsed_content = parse_file_content(temp_path, file_extension, filename)
-        
-        # Cleanup temporary file
-        try:
+        # Spool to a temporary file, hashing the content as it is copied
+        temp_path, digest, size = save_and_hash(file.stream, suffix=f'.{file_extension}')
+        with open(temp_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+        if not matches_extension(head, file_extension):
             os.unlink(temp_path)
-        except:
-            pass
-        
-        logger.info(f"File processed successfully: {filename}")
+            return jsonify({
+                'success': False,
+                'error': f'File content does not match its .{file_extension} extension'
+            }), 415
         
-        return jsonify({
-            'success': True,
-            'file_id': file_id,
-            'filename': filename,
-            'file_type': file_extension,
-            'content': parsed_content,
-            'timestamp': datetime.now().isoformat(),
-            'message': f'File "{filename}" processed successfully by Nexus!'
-        })
+        return queue_parse(temp_path, digest, size, filename, file_extension, file_id)
         
     except Exception as e:
         logger.error(f"File upload error: {e}")
@@ -267,6 +282,202 @@ def upload_file():
             'error': f'Upload failed: {str(e)}'
         }), 500
 
+@file_bp.route('/uploads', methods=['POST', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def create_chunked_upload():
+    """Start a resumable upload: {filename, size, sha256?} -> upload_id and offset 0"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    if not filename or not allowed_file(filename):
+        return jsonify({
+            'success': False,
+            'error': f'File type not supported. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+        }), 400
+    try:
+        size = int(data.get('size', 0))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'size must be an integer'}), 400
+    
+    try:
+        upload = get_chunked_uploads().create(filename, filename.rsplit('.', 1)[1].lower(), size,
+                                              sha256=data.get('sha256'))
+    except UploadError as e:
+        return upload_error(e)
+    
+    return jsonify({
+        'success': True,
+        **upload,
+        'chunk_size': current_app.config.get('CHUNKED_UPLOAD_CHUNK_BYTES', 8 * 1024 * 1024),
+        'upload_url': f'/api/files/uploads/{upload["upload_id"]}'
+    }), 201
+
+@file_bp.route('/uploads/<upload_id>', methods=['GET', 'PUT', 'DELETE', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def chunked_upload(upload_id):
+    """GET: bytes received so far. PUT ?offset=N: append the raw request body. DELETE: abort."""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    store = get_chunked_uploads()
+    try:
+        if request.method == 'GET':
+            return jsonify({'success': True, **store.status(upload_id)})
+        if request.method == 'DELETE':
+            store.status(upload_id)
+            store.discard(upload_id)
+            return jsonify({'success': True, 'upload_id': upload_id})
+        
+        offset = request.args.get('offset', request.headers.get('Upload-Offset'))
+        try:
+            offset = int(offset)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'offset is required'}), 400
+        # Read the body as a stream; it is never buffered whole in memory
+        new_offset = store.append(upload_id, offset, request.stream)
+        status = store.status(upload_id)
+        return jsonify({'success': True, 'upload_id': upload_id, 'offset': new_offset,
+                        'size': status['size'], 'complete': status['complete']})
+    except UploadError as e:
+        return upload_error(e)
+
+@file_bp.route('/uploads/<upload_id>/finalize', methods=['POST', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def finalize_chunked_upload(upload_id):
+    """Verify a complete upload and hand it to the parse cache / job queue"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    try:
+        path, digest, size, meta = get_chunked_uploads().finalize(upload_id)
+    except UploadError as e:
+        return upload_error(e)
+    
+    logger.info(f"Chunked upload {upload_id} complete: {meta['filename']} ({size} bytes)")
+    return queue_parse(path, digest, size, meta['filename'], meta['file_type'], str(uuid.uuid4()))
+
+@file_bp.route('/jobs/<job_id>', methods=['GET', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def job_status(job_id):
+    """Status, progress and (once finished) the parsed content of an upload"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    job = get_parse_jobs().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found or expired'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+@file_bp.route('/jobs/<job_id>/events', methods=['GET'])
+@cross_origin(supports_credentials=True)
+def job_events(job_id):
+    """Server-Sent Events: 'progress' on every change, then 'done' or 'failed' with the result"""
+    jobs = get_parse_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found or expired'}), 404
+    heartbeat = current_app.config.get('PARSE_EVENTS_HEARTBEAT', 15)
+    
+    def generate():
+        revision = None
+        current = job
+        while True:
+            if current is None:
+                yield sse_event('failed', {'job_id': job_id, 'error': 'Job expired'})
+                return
+            if current.finished:
+                yield sse_event(current.status, current.to_dict())
+                return
+            if current.revision != revision:
+                revision = current.revision
+                yield sse_event('progress', current.to_dict(include_result=False))
+            else:
+                # Comment frame keeps proxies from closing an idle stream
+                yield ': keep-alive\n\n'
+            current = jobs.wait_for_change(job_id, revision, timeout=heartbeat)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@file_bp.route('/<file_id>', methods=['GET', 'DELETE', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def document(file_id):
+    """Metadata and outline of a parsed document (GET) or remove it (DELETE)"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    storage = get_file_storage()
+    if request.method == 'DELETE':
+        if not storage.delete_document(file_id):
+            return jsonify({'success': False, 'error': 'Document not found or expired'}), 404
+        return jsonify({'success': True, 'file_id': file_id})
+    
+    content = storage.get_document(file_id)
+    if content is None:
+        return jsonify({'success': False, 'error': 'Document not found or expired'}), 404
+    return jsonify({'success': True, 'file_id': file_id, 'content': content})
+
+@file_bp.route('/<file_id>/pages', methods=['GET', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def document_pages(file_id):
+    """Text of pages start..end (1-based, inclusive) of a parsed document"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    max_pages = current_app.config.get('DOCUMENT_PAGES_PER_REQUEST', 50)
+    try:
+        start = int(request.args.get('start', 1))
+        end = int(request.args.get('end', start + max_pages - 1))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start and end must be page numbers'}), 400
+    if start < 1 or end < start:
+        return jsonify({'success': False, 'error': 'Invalid page range'}), 400
+    end = min(end, start + max_pages - 1)
+    
+    storage = get_file_storage()
+    document = storage.get_document(file_id)
+    if document is None:
+        return jsonify({'success': False, 'error': 'Document not found or expired'}), 404
+    pages = storage.get_pages(file_id, start, end)
+    return jsonify({
+        'success': True,
+        'file_id': file_id,
+        'start': start,
+        'end': pages[-1]['page'] if pages else start - 1,
+        'total': document['pages_available'],
+        'pages': pages
+    })
+
+@file_bp.route('/<file_id>/slides/<int:number>', methods=['GET', 'OPTIONS'])
+@cross_origin(supports_credentials=True)
+def document_slide(file_id, number):
+    """One slide (1-based) of a parsed presentation"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        return response, 200
+    
+    slide = get_file_storage().get_slide(file_id, number)
+    if slide is None:
+        return jsonify({'success': False, 'error': 'Slide not found'}), 404
+    return jsonify({'success': True, 'file_id': file_id, 'slide': slide})
+
 @file_bp.route('/test', methods=['GET'])
 @cross_origin(supports_credentials=True)  # ✅ ONLY CHANGE: Add credentials support
 def test_files():
@@ -1,25 +1,49 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
 from datetime import datetime
 
 health_bp = Blueprint('health', __name__)
 
 @health_bp.route('/health', methods=['GET'])
 def health():
+    study_buddy = current_app.extensions.get('study_buddy')
+    llm = study_buddy.backend.stats() if study_buddy else None
+    degraded = llm is not None and llm['circuit_breaker']['state'] != 'closed'
     return jsonify({
-        'status': 'healthy',
+        'status': 'degraded' if degraded else 'healthy',
         'service': 'StudyBuddy AI Backend',
+        'llm': llm,
         'timestamp': datetime.now().isoformat(),
         'version': '1.0.0'
     })
 
 @health_bp.route('/status', methods=['GET'])
 def status():
+    study_buddy = current_app.extensions.get('study_buddy')
+    parse_jobs = current_app.extensions.get('parse_jobs')
+    parse_cache = current_app.extensions.get('parse_cache')
     return jsonify({
         'api_status': 'running',
+        'sessions': study_buddy.get_session_stats() if study_buddy else None,
+        'response_cache': study_buddy.response_cache.stats() if study_buddy else None,
+        'single_flight': study_buddy.single_flight.stats() if study_buddy else None,
+        'content_formats': study_buddy.formatter.registry.stats() if study_buddy else None,
+        'parse_jobs': parse_jobs.stats() if parse_jobs else None,
+        'parse_cache': parse_cache.stats() if parse_cache else None,
         'endpoints': [
             '/api/chat',
+            '/api/chat/stream',
+            '/api/chat/batch',
             '/api/new-session',
             '/api/clear-session',
+            '/api/files/upload',
+            '/api/files/uploads',
+            '/api/files/uploads/<upload_id>',
+            '/api/files/uploads/<upload_id>/finalize',
+            '/api/files/jobs/<job_id>',
+            '/api/files/jobs/<job_id>/events',
+            '/api/files/<file_id>',
+            '/api/files/<file_id>/pages',
+            '/api/files/<file_id>/slides/<number>',
             '/api/health'
         ]
     })
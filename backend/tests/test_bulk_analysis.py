@@ -0,0 +1,45 @@
+from app import create_app
+from config import Config
+from models.chat import db, Chat, Message
+from utils.bulk_analysis import classify_many, detect_language_many
+from utils.subject_classifier import classify_subject
+
+QUERIES = [
+    'Explain Python functions', 'solve quadratic equations', 'what is photosynthesis',
+    'hello there', 'function graph', 'the british empire and gandhi', ''
+]
+
+class BackfillTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    LLM_BACKEND = 'stub'
+    TESTING = True
+
+def test_classify_many_matches_single_classifier():
+    texts = QUERIES * 50
+    expected = [classify_subject(text) for text in texts]
+    assert classify_many(texts, chunk_size=64) == expected
+    assert classify_many(texts, chunk_size=64, processes=2) == expected
+
+def test_detect_language_many():
+    assert detect_language_many(['Explain Python functions', '', 'Explain Python functions']) == ['en'] * 3
+
+def test_backfill_metadata_command():
+    app = create_app(BackfillTestConfig)
+    with app.app_context():
+        db.create_all()
+        chat = Chat(session_id='s1')
+        db.session.add(chat)
+        db.session.commit()
+        db.session.add(Message(chat_id=chat.id, type='user', content='solve quadratic equations'))
+        db.session.add(Message(chat_id=chat.id, type='user', content='hi', meta_data={'file_content': 'x'}))
+        db.session.add(Message(chat_id=chat.id, type='bot', content='answer'))
+        db.session.commit()
+    
+    result = app.test_cli_runner().invoke(args=['backfill-metadata', '--processes', '1'])
+    assert '[OK] Updated 2 of 2 user messages' in result.output
+    
+    with app.app_context():
+        metadata = [m.meta_data for m in Message.query.order_by(Message.id).all()]
+    assert metadata[0] == {'subject_area': 'mathematics', 'detected_language': 'en'}
+    assert metadata[1] == {'file_content': 'x', 'subject_area': 'general', 'detected_language': 'en'}
+    assert metadata[2] is None
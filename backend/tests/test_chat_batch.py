@@ -0,0 +1,39 @@
+import json
+from app import create_app
+from config import Config
+from models.chat import db, Message
+
+class BatchTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    LLM_BACKEND = 'stub'
+    STUB_LATENCY_MS = 0
+    TESTING = True
+
+def test_batch_streams_ndjson_and_bulk_stores_messages():
+    app = create_app(BatchTestConfig)
+    with app.app_context():
+        db.create_all()
+    
+    client = app.test_client()
+    response = client.post('/api/chat/batch', json={
+        'session_id': 'bank-1',
+        'queries': ['Explain Python functions', {'message': 'Solve a quadratic equation'}, 'What is photosynthesis']
+    })
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    
+    assert response.mimetype == 'application/x-ndjson'
+    assert sorted(line['index'] for line in lines[:-1]) == [0, 1, 2]
+    assert all(line['success'] and line['session_id'] == 'bank-1' for line in lines[:-1])
+    assert lines[-1]['type'] == 'summary' and lines[-1]['succeeded'] == 3 and lines[-1]['stored']
+    
+    with app.app_context():
+        contents = [m.content for m in Message.query.order_by(Message.id).all()]
+        assert contents[0::2] == ['Explain Python functions', 'Solve a quadratic equation', 'What is photosynthesis']
+        by_time = [m.content for m in Message.query.order_by(Message.timestamp).all()]
+        assert by_time == contents
+    assert len(app.extensions['study_buddy'].chat_sessions) == 0
+
+def test_batch_rejects_empty_list():
+    app = create_app(BatchTestConfig)
+    response = app.test_client().post('/api/chat/batch', json={'queries': []})
+    assert response.status_code == 400
@@ -0,0 +1,38 @@
+import json
+from app import create_app
+from config import Config
+from models.chat import db, Message
+from utils.content_formatter import ContentFormatter
+
+class StreamTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+class FakeStudyBuddy:
+    def stream_response(self, query, session_id, file_content=None):
+        yield 'chunk', '## Answer'
+        yield 'chunk', '\n\nDone'
+        yield 'done', {'response': '## Answer\n\nDone', 'subject_area': 'general', 'success': True}
+
+def test_format_stream_matches_blocks():
+    formatter = ContentFormatter()
+    chunks = ['##Title\n', '\nfirst   para', 'graph\n\n```\ncode\n\n', 'more\n```\n\nend']
+    streamed = ''.join(formatter.format_stream(chunks, 'programming'))
+    assert streamed == '## Title\n\nfirst paragraph\n\n```\ncode\n\nmore\n```\n\nend'
+
+def test_chat_stream_emits_sse_and_persists():
+    app = create_app(StreamTestConfig)
+    app.extensions['study_buddy'] = FakeStudyBuddy()
+    with app.app_context():
+        db.create_all()
+    
+    client = app.test_client()
+    response = client.post('/api/chat/stream', json={'message': 'hi', 'session_id': 's1'})
+    body = response.get_data(as_text=True)
+    
+    assert response.mimetype == 'text/event-stream'
+    events = [frame.split('\n')[0][len('event: '):] for frame in body.strip().split('\n\n')]
+    assert events == ['chunk', 'chunk', 'done']
+    assert json.loads(body.split('data: ')[1].split('\n')[0]) == {'content': '## Answer'}
+    with app.app_context():
+        assert [m.type for m in Message.query.all()] == ['user', 'bot']
@@ -0,0 +1,107 @@
+import fcntl
+import hashlib
+import io
+import tempfile
+import threading
+import time
+from app import create_app
+from config import Config
+from utils.chunked_uploads import ChunkedUploadStore
+from test_parse_jobs import wait_finished
+
+class ChunkedTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    LLM_BACKEND = 'stub'
+    STUB_LATENCY_MS = 0
+    PARSE_WORKERS = 1
+    PARSE_CACHE_MAX_BYTES = 0
+    CHUNKED_UPLOAD_DIR = tempfile.mkdtemp(prefix='chunked-')
+    DOCUMENT_STORE_DIR = tempfile.mkdtemp(prefix='documents-')
+    TESTING = True
+
+def test_chunked_upload_resumes_and_parses():
+    app = create_app(ChunkedTestConfig)
+    client = app.test_client()
+    data = b'chapter one ' * 5000
+    
+    created = client.post('/api/files/uploads', json={
+        'filename': 'book.txt', 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()
+    })
+    assert created.status_code == 201
+    upload_id = created.get_json()['upload_id']
+    
+    assert client.put(f'/api/files/uploads/{upload_id}?offset=0', data=data[:20000]).get_json()['offset'] == 20000
+    # A retried chunk at a stale offset is refused with the offset to resume from
+    stale = client.put(f'/api/files/uploads/{upload_id}?offset=0', data=data[:20000])
+    assert stale.status_code == 409 and stale.get_json()['offset'] == 20000
+    assert client.post(f'/api/files/uploads/{upload_id}/finalize').status_code == 409
+    
+    resumed = client.get(f'/api/files/uploads/{upload_id}').get_json()['offset']
+    assert client.put(f'/api/files/uploads/{upload_id}?offset={resumed}', data=data[resumed:]).get_json()['complete']
+    
+    finalized = client.post(f'/api/files/uploads/{upload_id}/finalize')
+    assert finalized.status_code == 202
+    body = wait_finished(client, finalized.get_json()['job_id'])
+    assert body['content']['pages_available'] == 15
+    file_id = body['file_id']
+    pages = client.get(f'/api/files/{file_id}/pages?start=1&end=100').get_json()['pages']
+    assert ''.join(page['text'] for page in pages) == data.decode().strip()
+    assert client.get(f'/api/files/uploads/{upload_id}').status_code == 404
+    app.extensions['parse_jobs'].shutdown()
+
+def test_first_bytes_are_sniffed():
+    app = create_app(ChunkedTestConfig)
+    client = app.test_client()
+    
+    upload_id = client.post('/api/files/uploads', json={'filename': 'notes.pdf', 'size': 100}).get_json()['upload_id']
+    data = b'not really a pdf'.ljust(100, b'.')
+    # Sniffing waits until the head of the file has arrived
+    assert client.put(f'/api/files/uploads/{upload_id}?offset=0', data=data[:16]).status_code == 200
+    rejected = client.put(f'/api/files/uploads/{upload_id}?offset=16', data=data[16:])
+    assert rejected.status_code == 415
+    assert client.get(f'/api/files/uploads/{upload_id}').status_code == 404
+    
+    response = client.post('/api/files/upload', data={'file': (io.BytesIO(b'\x00\x01binary'), 'fake.txt')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 415
+
+def test_tiny_first_chunk_is_not_sniffed_alone(tmp_path):
+    data = b'%PDF-1.4 ' + bytes(range(256)) * 20
+    store = ChunkedUploadStore(str(tmp_path))
+    upload_id = store.create('a.pdf', 'pdf', len(data))['upload_id']
+    for start in range(0, len(data), 3):
+        assert store.append(upload_id, start, io.BytesIO(data[start:start + 3])) == min(start + 3, len(data))
+    assert store.finalize(upload_id)[2] == len(data)
+
+def test_hash_survives_a_new_process(tmp_path):
+    data = b'%PDF-1.4 ' + bytes(range(256)) * 10
+    first = ChunkedUploadStore(str(tmp_path))
+    upload_id = first.create('a.pdf', 'pdf', len(data))['upload_id']
+    first.append(upload_id, 0, io.BytesIO(data[:1000]))
+    
+    # Another worker process has no in-memory hash state and rebuilds it from disk
+    second = ChunkedUploadStore(str(tmp_path))
+    second.append(upload_id, 1000, io.BytesIO(data[1000:]))
+    path, digest, size, meta = second.finalize(upload_id)
+    assert digest == hashlib.sha256(data).hexdigest() and size == len(data)
+    with open(path, 'rb') as f:
+        assert f.read() == data
+
+def test_append_waits_for_another_process_holding_the_upload(tmp_path):
+    data = b'%PDF-1.4 ' + bytes(range(256)) * 10
+    store = ChunkedUploadStore(str(tmp_path))
+    upload_id = store.create('a.pdf', 'pdf', len(data))['upload_id']
+    results = []
+    
+    # Another worker (a separate open file description) is mid-append
+    with open(str(tmp_path / f'{upload_id}.part'), 'r+b') as other:
+        fcntl.flock(other.fileno(), fcntl.LOCK_EX)
+        other.write(data[:1000])
+        other.flush()
+        appender = threading.Thread(target=lambda: results.append(store.append(upload_id, 1000, io.BytesIO(data[1000:]))))
+        appender.start()
+        time.sleep(0.2)
+        assert appender.is_alive()
+    appender.join(5)
+    assert results == [len(data)]
+    assert store.finalize(upload_id)[1] == hashlib.sha256(data).hexdigest()
@@ -0,0 +1,70 @@
+import random
+import re
+import time
+from utils.content_formatter import ContentFormatter
+
+formatter = ContentFormatter()
+
+def test_rules_per_content_type():
+    assert formatter.format_response('##Title\n\n\n\nText   with\tspaces', 'general') == '## Title\n\nText with spaces'
+    assert formatter.format_response('Intro. Don\'t worry, it is easy!  Next step.', 'general') == 'Intro. Next step.'
+    assert formatter.format_response('a ``````b', 'programming') == 'a b'
+    assert formatter.format_response('Work:\n\n**Step 1:** x **Final Answer:** 4', 'mathematics') == \
+        'Work:\n\n**Step 1:** x \n**🎯 Final Answer:** 4'
+    assert formatter.format_response('##   Summary\t of  it', 'document_analysis') == '## Summary of it'
+
+def test_verbose_pattern_without_exclamation_is_linear():
+    text = "Don't worry about this sentence. " * 20000
+    start = time.perf_counter()
+    assert formatter.format_response(text, 'general') == text.strip()
+    assert time.perf_counter() - start < 1.0
+
+def test_incremental_feed_matches_whole_text():
+    text = ("##Intro\n\n\nHey there! Welcome to   the lesson! " + 'word ' * 150 +
+            "\n\n**Step 1:** do it\n\n\n**Final Answer:** 42   \n") * 4
+    for content_type in ('general', 'mathematics', 'programming', 'document_analysis'):
+        incremental = formatter.incremental(content_type)
+        pieces = [incremental.feed(text[i:i + 7]) for i in range(0, len(text), 7)]
+        pieces.append(incremental.close())
+        assert ''.join(pieces) == formatter.format_response(text, content_type)
+        # Output starts flowing before the whole response has arrived
+        assert any(pieces[:len(pieces) // 2])
+
+def sequential(text, content_type):
+    """The rule chain the pipeline replaced: each substitution over the whole text in turn"""
+    if content_type == 'programming':
+        text = text.replace('``````', '')
+    else:
+        for pattern in (r"Hey there!.*?!", r"I'm super excited.*?!", r"Don't worry.*?!"):
+            text = re.sub(pattern, '', text, flags=re.IGNORECASE | re.DOTALL)
+    text = re.sub(r'^##([^#])', r'## \1', text, flags=re.MULTILINE)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return re.sub(r'[ \t]+', ' ', text).strip()
+
+def test_removed_spans_leave_the_same_text_as_the_rule_chain():
+    cases = [
+        ('###\n``````\n\n.#.', 'programming'),
+        ('a\n\n\n\n``````\n\nb', 'programming'),
+        ('a\n``````\n``````\n\nb', 'programming'),
+        ('a ``````  \nb\n \n``````\n\nc', 'programming'),
+        ('.  ```````````` ``````a``````.', 'programming'),
+        ('Intro.\nHey there! Ready!\n\nNext', 'general'),
+        ('Intro.\n\nDon\'t worry!   \n\n\n\nNext', 'general'),
+    ]
+    for text, content_type in cases:
+        assert formatter.format_response(text, content_type) == sequential(text, content_type), text
+
+def test_split_points_do_not_change_the_output():
+    pieces = ['Hey there!', "I'm super excited!", "Don't worry!", '``````', '\t', ' ', '  ', '\n', '\n\n\n',
+              '!', '##', 'word', '**Step 2:**', '**Final Answer:**']
+    rng = random.Random(13)
+    for _ in range(300):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 600)))
+        for content_type in ('general', 'programming', 'mathematics', 'document_analysis'):
+            expected = formatter.format_response(text, content_type)
+            for _ in range(3):
+                cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(1, 30))))
+                incremental = formatter.incremental(content_type)
+                output = [incremental.feed(text[start:stop]) for start, stop in zip([0] + cuts, cuts + [len(text)])]
+                output.append(incremental.close())
+                assert ''.join(output) == expected, (text, cuts, content_type)
@@ -0,0 +1,17 @@
+from models.conversation_context import ConversationContext, estimate_tokens
+
+def test_window_stays_under_budget_and_summarizes():
+    context = ConversationContext(token_budget=100, summary_budget=60)
+    for i in range(20):
+        context.add_turn(f"question {i} " + 'x' * 80, f"Answer {i}. " + 'y' * 120)
+    
+    assert context.window_tokens <= 100
+    assert context.summary_tokens <= 60
+    history = context.history()
+    assert history[0]['parts'][0].startswith('Summary of our earlier conversation')
+    assert 'question 19' in history[-2]['parts'][0]
+    assert context.summary_lines[-1].startswith('- Q: question 18')
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcd' * 10) == 10
@@ -0,0 +1,59 @@
+import datetime
+import numpy as np
+from openpyxl import Workbook
+from utils.parsers import parse_file
+from utils import excel_ingest
+from utils.excel_ingest import ColumnStats, ingest_workbook
+
+def write_gradebook(path, rows):
+    workbook = Workbook(write_only=True)
+    grades = workbook.create_sheet('Grades')
+    grades.append(['Student', 'Section', 'Marks', None, 'Due'])
+    for i in range(rows):
+        marks = None if i % 10 == 0 else (i * 7) % 101
+        grades.append([f'student {i}', 'ABC'[i % 3], marks, 'x' if i % 2 else 3, datetime.date(2024, 1, 1 + i % 28)])
+    notes = workbook.create_sheet('Notes')
+    notes.append([None])
+    notes.append(['Topic', 'Hours'])
+    notes.append(['Algebra', 2.5])
+    workbook.save(path)
+
+def test_statistics_match_whole_column_across_chunks(tmp_path):
+    path = str(tmp_path / 'grades.xlsx')
+    write_gradebook(path, 100)
+    updates = []
+
+    workbook = ingest_workbook(path, chunk_rows=7, sample_rows=4, progress=lambda done, total: updates.append(done))
+    grades, notes = workbook['sheets']
+    assert workbook['total_rows'] == 101 and updates[-1] == 101
+    assert grades['rows'] == 100 and len(grades['sample']) == 4 and grades['sample_truncated']
+    assert grades['sample'][1] == ['student 1', 'B', 7, 'x', '2024-01-02T00:00:00']
+
+    student, section, marks, unnamed, due = grades['columns']
+    expected = np.array([(i * 7) % 101 for i in range(100) if i % 10], dtype=float)
+    assert marks['dtype'] == 'int' and marks['nulls'] == 10 and marks['count'] == 90
+    assert marks['mean'] == round(expected.mean(), 6) and marks['std'] == round(expected.std(), 6)
+    assert (marks['min'], marks['max']) == (expected.min(), expected.max())
+    assert section['top_values'][0] == ['A', 34]
+    assert unnamed['name'] == 'Column 4' and unnamed['dtype'] == 'mixed'
+    assert due['dtype'] == 'datetime' and due['max'] == '2024-01-28T00:00:00'
+    assert notes['columns'][0]['name'] == 'Topic' and notes['sample'] == [['Algebra', 2.5]]
+
+def test_top_values_stay_bounded_and_keep_heavy_hitters(monkeypatch):
+    monkeypatch.setattr(excel_ingest, 'TOP_CAPACITY', 8)
+    column = ColumnStats('id')
+    for start in range(0, 1000, 100):
+        column.update(['common'] * 30 + [f'id-{n}' for n in range(start, start + 70)])
+        assert len(column.top) <= 8
+    assert column.to_dict()['top_values'][0][0] == 'common'
+    assert column.count == 1000
+
+def test_parse_file_summarizes_all_sheets(tmp_path):
+    path = str(tmp_path / 'grades.xlsx')
+    write_gradebook(path, 30)
+
+    content = parse_file(path, 'xlsx', 'grades.xlsx')
+    assert content['sheet_names'] == ['Grades', 'Notes'] and content['total_rows'] == 31
+    assert content['shape'] == [30, 5] and len(content['data_preview']) == 5
+    assert content['data_preview'][0]['Student'] == 'student 0'
+    assert "Sheet 'Notes': 1 rows, 2 columns" in content['text_content']
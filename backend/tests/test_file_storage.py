@@ -0,0 +1,73 @@
+import tempfile
+from app import create_app
+from config import Config
+from models.chat import db, Message
+from models.file_storage import FileStorage, paginate_text
+
+class DocumentsTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    DOCUMENT_STORE_DIR = tempfile.mkdtemp(prefix='documents-')
+    DOCUMENT_PAGES_PER_REQUEST = 3
+    DOCUMENT_CONTEXT_CHARS = 40
+    TESTING = True
+
+class FakeStudyBuddy:
+    def get_response(self, query, session_id, file_content=None):
+        self.file_content = file_content
+        return {'response': 'ok', 'subject_area': 'general', 'success': True}
+
+def pdf_result(page_count):
+    return {
+        'type': 'pdf',
+        'pages': [f'Heading {n}\nbody of page {n}' if n != 2 else '' for n in range(1, page_count + 1)],
+        'page_count': page_count,
+        'summary': f'PDF with {page_count} pages processed successfully'
+    }
+
+def test_paginate_text_breaks_between_paragraphs():
+    text = '\n\n'.join(['a' * 30, 'b' * 30, 'c' * 90])
+    assert paginate_text(text, page_chars=70) == ['a' * 30 + '\n\n' + 'b' * 30, 'c' * 70, 'c' * 20]
+    assert paginate_text('') == []
+
+def test_document_pages_slides_and_context(tmp_path):
+    storage = FileStorage(str(tmp_path))
+    view = storage.store_document('doc-1', 'book.pdf', 'pdf', pdf_result(6))
+    assert 'pages' not in view and view['page_count'] == 6 and view['pages_available'] == 6
+    assert view['outline'][0] == {'page': 1, 'preview': 'Heading 1', 'chars': len('Heading 1\nbody of page 1')}
+
+    assert storage.get_pages('doc-1', 5, 9) == [{'page': 5, 'text': 'Heading 5\nbody of page 5'},
+                                                 {'page': 6, 'text': 'Heading 6\nbody of page 6'}]
+    assert storage.document_text('doc-1', 60) == '--- Page 1 ---\nHeading 1\nbody of page 1\n\n--- Page 3 ---\nHead'
+
+    slides = [{'slide_number': 1, 'content': ['Intro'], 'text': 'Intro'},
+              {'slide_number': 3, 'content': ['Results', '42'], 'text': 'Results\n42'}]
+    view = storage.store_document('deck', 'deck.pptx', 'pptx', {'type': 'pptx', 'slides': slides, 'text_content': 'x'})
+    assert view['outline'] == [{'slide': 1, 'title': 'Intro'}, {'slide': 3, 'title': 'Results'}]
+    assert storage.get_slide('deck', 3)['text'] == 'Results\n42'
+    assert storage.get_slide('deck', 2) is None
+
+    assert storage.get_document('../deck') is None
+    assert storage.delete_document('deck') and storage.get_document('deck') is None
+
+def test_routes_serve_pages_and_chat_uses_file_id():
+    app = create_app(DocumentsTestConfig)
+    study_buddy = app.extensions['study_buddy'] = FakeStudyBuddy()
+    with app.app_context():
+        db.create_all()
+        from routes.file_processing import get_file_storage
+        get_file_storage().store_document('doc-2', 'book.pdf', 'pdf', pdf_result(10))
+    client = app.test_client()
+
+    assert client.get('/api/files/doc-2').get_json()['content']['outline'][3]['preview'] == 'Heading 4'
+    pages = client.get('/api/files/doc-2/pages?start=4').get_json()
+    assert (pages['start'], pages['end'], pages['total']) == (4, 6, 10)
+    assert client.get('/api/files/doc-2/pages?start=0').status_code == 400
+    assert client.get('/api/files/missing/pages').status_code == 404
+    assert client.get('/api/files/doc-2/slides/1').status_code == 404
+
+    response = client.post('/api/chat', json={'message': 'summarise', 'session_id': 's1', 'file_id': 'doc-2'})
+    assert response.status_code == 200
+    assert study_buddy.file_content == '--- Page 1 ---\nHeading 1\nbody of page 1\n'
+    with app.app_context():
+        assert Message.query.filter_by(type='user').one().meta_data == {'file_id': 'doc-2'}
+    assert client.post('/api/chat', json={'message': 'hi', 'file_id': 'gone'}).status_code == 404
@@ -0,0 +1,73 @@
+import os
+import time
+from utils.content_formatter import ContentFormatter
+from utils.format_registry import FormatRegistry
+
+FORMATS = """## general
+### Format Instructions
+- Be brief
+
+### Template
+🎯 RESPONSE
+
+***
+
+## programming
+### Format Instructions
+- Show code
+"""
+
+def write(path, content, bump):
+    path.write_text(content, encoding='utf-8')
+    stamp = time.time() + bump
+    os.utime(path, (stamp, stamp))
+
+def test_parses_once_and_prerenders(tmp_path):
+    path = tmp_path / 'formats.md'
+    write(path, FORMATS, 0)
+    registry = FormatRegistry(str(path))
+    formatter = ContentFormatter(registry)
+    
+    assert formatter.get_available_formats() == ['general', 'programming']
+    block = formatter.get_format_instructions('unknown')
+    assert block == registry.current.get('general').prompt_block
+    assert 'CONTENT TYPE: GENERAL' in block and '- Be brief' in block
+    
+    # Same content with a new mtime is re-read but not re-parsed
+    snapshot = registry.current
+    write(path, FORMATS, 10)
+    assert registry.reload() is snapshot
+    assert registry.reloads == 1
+
+def test_reload_swaps_snapshot_and_notifies(tmp_path):
+    path = tmp_path / 'formats.md'
+    write(path, FORMATS, 0)
+    registry = FormatRegistry(str(path))
+    seen = []
+    registry.add_listener(seen.append)
+    old = registry.current
+    
+    write(path, FORMATS.replace('Be brief', 'Be thorough'), 10)
+    new = registry.reload()
+    assert new is not old and new.version != old.version
+    assert seen == [new]
+    assert '- Be brief' in old.get('general').prompt_block
+
+def test_watcher_picks_up_changes(tmp_path):
+    path = tmp_path / 'formats.md'
+    write(path, FORMATS, 0)
+    registry = FormatRegistry(str(path))
+    registry.watch(0.02)
+    try:
+        version = registry.current.version
+        write(path, FORMATS + '\n***\n\n## history\n- Give dates\n', 10)
+        deadline = time.time() + 2
+        while registry.current.version == version and time.time() < deadline:
+            time.sleep(0.02)
+        assert 'history' in registry.current
+    finally:
+        registry.stop()
+
+def test_missing_file_uses_defaults(tmp_path):
+    registry = FormatRegistry(str(tmp_path / 'missing.md'))
+    assert 'general' in registry.current and registry.current.source is None
@@ -0,0 +1,23 @@
+from utils import language_detector
+from utils.language_detector import detect_language
+
+def test_script_fast_path(monkeypatch):
+    def fail(text):
+        raise AssertionError('langdetect should not run')
+    monkeypatch.setattr(language_detector, '_langdetect', fail)
+    
+    assert detect_language('Explain Python functions') == 'en'
+    assert detect_language('Ça va très bien, merci') == 'en'
+    assert detect_language('வணக்கம், நீங்கள் எப்படி இருக்கிறீர்கள்?') == 'ta'
+    assert detect_language('నమస్కారం, మీరు ఎలా ఉన్నారు?') == 'te'
+    assert detect_language('ਸਤ ਸ੍ਰੀ ਅਕਾਲ ਜੀ') == 'pa'
+
+def test_ambiguous_script_uses_langdetect_once(monkeypatch):
+    calls = []
+    original = language_detector._langdetect
+    monkeypatch.setattr(language_detector, '_langdetect', lambda text: calls.append(text) or original(text))
+    
+    text = 'नमस्ते, आप कैसे हैं? मैं ठीक हूँ।'
+    assert detect_language(text) == 'hi'
+    assert detect_language(text) == 'hi'
+    assert len(calls) == 1
@@ -0,0 +1,26 @@
+import pytest
+from models.ai_model import StudyBuddyAI
+from models.llm_backends import LLMBackendError, ResilientBackend, StubBackend, create_backend
+
+def test_stub_output_is_deterministic_per_prompt():
+    backend = StubBackend(latency_ms=0, distribution='fixed', output_words=60)
+    text = backend.generate('explain loops')
+    
+    assert text == StubBackend(latency_ms=0, distribution='fixed', output_words=60).generate('explain loops')
+    assert text != backend.generate('explain recursion')
+    assert ''.join(backend.stream('explain loops')) == text
+
+def test_stub_failure_rate():
+    backend = StubBackend(latency_ms=0, failure_rate=1.0)
+    with pytest.raises(LLMBackendError):
+        backend.generate('anything')
+
+def test_engine_runs_offline_with_stub_backend():
+    study_buddy = StudyBuddyAI({'LLM_BACKEND': 'stub', 'STUB_LATENCY_MS': 0})
+    result = study_buddy.get_response('Explain Python functions', 'offline-session')
+    
+    assert result['success'] is True
+    assert result['response'].startswith('## 🎯 RESPONSE')
+    assert result['prompt_tokens'] > 0
+    backend = create_backend({'LLM_BACKEND': 'stub'})
+    assert isinstance(backend, ResilientBackend) and isinstance(backend.backend, StubBackend)
@@ -0,0 +1,98 @@
+import os
+import threading
+import cv2
+import numpy as np
+from PIL import Image
+from utils.parsers import parse_file
+from utils import ocr
+from utils.ocr import _rotate, ocr_image, preprocess, target_scale, tile_bounds
+
+def text_page(lines=60, height=3000, width=2200):
+    page = np.full((height, width), 235, np.uint8)
+    for i in range(lines):
+        cv2.putText(page, f'Line {i} the quick brown fox jumps', (100, 120 + i * 45),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.1, 30, 2)
+    return page
+
+def fake_tesseract(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def recognize(tile, lang, timeout, env=None):
+        with lock:
+            calls.append(tile.shape)
+            assert env is None or env['OMP_THREAD_LIMIT'] == '1'
+        return f'{lang} {tile.shape[0]} rows\n'
+
+    monkeypatch.setattr(ocr, 'tesseract_version', lambda: '5.3.0')
+    monkeypatch.setattr(ocr, '_recognize', recognize)
+    return calls
+
+def test_target_scale():
+    assert target_scale((4032, 3024), (72, 72)) == 300 * 11 / 4032
+    assert target_scale((5100, 6600), (600, 600)) == 0.5
+    assert target_scale((800, 600), None) == 1.0
+
+def test_preprocess_binarizes_and_deskews():
+    for angle in (-4, 2.5):
+        binary, found = preprocess(_rotate(text_page(), angle, 235), scale=0.8)
+        assert binary.shape == (2400, 1760) and set(np.unique(binary)) == {0, 255}
+        assert abs(found + angle) <= 0.3
+    assert preprocess(text_page(), scale=0.8)[1] == 0.0
+
+def test_tiles_are_cut_between_lines():
+    binary, _ = preprocess(text_page())
+    bounds = tile_bounds(binary, tile_rows=1000)
+    assert len(bounds) == 3 and bounds[0][0] == 0 and bounds[-1][1] == binary.shape[0]
+    ink = (binary == 0).sum(axis=1)
+    assert all(ink[stop] == 0 for _, stop in bounds[:-1])
+
+def test_frames_are_read_in_pool_and_cached(tmp_path, monkeypatch):
+    calls = fake_tesseract(monkeypatch)
+    path = str(tmp_path / 'scan.tiff')
+    frames = [Image.fromarray(text_page(lines=20 * n, height=1200)) for n in (1, 2)] + [Image.new('L', (2200, 1200), 235)]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+    cache_dir = str(tmp_path / 'ocr_cache')
+    updates = []
+
+    result = ocr_image(path, workers=2, cache_dir=cache_dir, progress=lambda done, total: updates.append((done, total)))
+    assert result['frame_count'] == 3 and not result['truncated'] and result['error'] is None
+    assert [frame['frame'] for frame in result['frames']] == [1, 2, 3]
+    assert result['frames'][0]['text'] == 'eng 1200 rows' and result['frames'][2]['text'] == ''
+    assert result['frames'][2]['tiles'] == 0 and len(calls) == 2  # the blank frame never reaches tesseract
+    assert updates[-1] == (3, 3)
+
+    again = ocr_image(path, cache_dir=cache_dir, max_frames=2)
+    assert len(calls) == 2 and again['truncated']
+    assert [frame['cached'] for frame in again['frames']] == [True, True]
+    assert again['frames'][1]['text'] == result['frames'][1]['text']
+
+def test_tesseract_thread_limit_stays_in_its_process(tmp_path, monkeypatch):
+    import pytesseract
+    script = tmp_path / 'tesseract'
+    script.write_text('#!/bin/sh\ncat > /dev/null\necho "$2 $4 threads=$OMP_THREAD_LIMIT"\n')
+    script.chmod(0o755)
+    monkeypatch.setattr(pytesseract.pytesseract, 'tesseract_cmd', str(script))
+    monkeypatch.delenv('OMP_THREAD_LIMIT', raising=False)
+    tile = np.full((40, 40), 255, np.uint8)
+    assert ocr._recognize(tile, 'eng', 5, {**os.environ, 'OMP_THREAD_LIMIT': '1'}) == 'stdout eng threads=1\n'
+    assert 'OMP_THREAD_LIMIT' not in os.environ
+
+def test_phone_photo_is_downscaled(tmp_path, monkeypatch):
+    calls = fake_tesseract(monkeypatch)
+    path = str(tmp_path / 'notes.jpg')
+    Image.fromarray(cv2.resize(text_page(), (4400, 6000))).save(path, dpi=(72, 72))
+
+    result = ocr_image(path, cache_dir=None)
+    assert result['metadata']['size'] == [4400, 6000]
+    assert max(result['frames'][0]['size']) == 3300 and len(calls) == 3
+
+def test_missing_tesseract_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr, 'tesseract_version', lambda: None)
+    path = str(tmp_path / 'notes.png')
+    Image.fromarray(text_page(lines=5, height=400)).save(path)
+
+    content = parse_file(path, 'png', 'notes.png')
+    assert content['type'] == 'image' and not content['has_text']
+    assert content['ocr_error'] == 'OCR not available (tesseract is not installed)'
+    assert content['metadata']['size'] == [2200, 400]
@@ -0,0 +1,47 @@
+from docx import Document
+from pptx import Presentation
+from pptx.util import Inches
+from benchmarks.ooxml_extract import write_docx, write_pptx
+from utils.ooxml import iter_docx, iter_pptx
+
+def test_docx_matches_python_docx(tmp_path):
+    path = str(tmp_path / 'thesis.docx')
+    write_docx(path, 120, table_every=50)
+    document = Document(path)
+    expected = [('paragraph', block.text) if not hasattr(block, 'rows') else
+                ('table', [[cell.text for cell in row.cells] for row in block.rows])
+                for block in document.iter_inner_content() if not hasattr(block, 'text') or block.text.strip()]
+    assert list(iter_docx(path)) == expected
+
+def test_docx_runs_breaks_and_nested_tables(tmp_path):
+    path = str(tmp_path / 'notes.docx')
+    document = Document()
+    paragraph = document.add_paragraph('Name:')
+    paragraph.add_run().add_tab()
+    paragraph.add_run('Asha')
+    paragraph.add_run().add_break()
+    paragraph.add_run('Roll 7')
+    cell = document.add_table(rows=1, cols=2).cell(0, 0)
+    cell.text = 'outer'
+    cell.add_table(rows=1, cols=1).cell(0, 0).text = 'inner'
+    document.save(path)
+
+    assert list(iter_docx(path)) == [('paragraph', 'Name:\tAsha\nRoll 7'), ('table', [['outer\ninner', '']])]
+
+def test_pptx_follows_presentation_order_and_reads_tables(tmp_path):
+    path = str(tmp_path / 'deck.pptx')
+    write_pptx(path, 3, table_every=2)
+    presentation = Presentation(path)
+    table = presentation.slides[1].shapes.add_table(1, 2, Inches(1), Inches(1), Inches(4), Inches(1)).table
+    table.cell(0, 0).text, table.cell(0, 1).text = 'x', 'y'
+    slide_ids = presentation.slides._sldIdLst
+    slide_ids.insert(0, slide_ids[-1])  # move the last slide to the front
+    presentation.save(path)
+    updates = []
+
+    slides = list(iter_pptx(path, progress=lambda done, total: updates.append((done, total))))
+    assert [number for number, _ in slides] == [1, 2, 3] and updates[-1] == (2, 3)
+    assert slides[0][1][0] == 'Lecture slide 3' and slides[1][1][0] == 'Lecture slide 1'
+    assert slides[2][1][-1] == 'x | y'
+    expected = [shape.text for shape in Presentation(path).slides[2].shapes if hasattr(shape, 'text')]
+    assert slides[2][1][:-1] == expected
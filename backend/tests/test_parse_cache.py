@@ -0,0 +1,45 @@
+import hashlib
+import io
+import os
+import time
+from utils.parse_cache import ParseCache, save_and_hash
+
+def test_save_and_hash_streams_to_disk():
+    path, digest, size = save_and_hash(io.BytesIO(b'abc' * 1000), suffix='.txt')
+    with open(path, 'rb') as f:
+        assert f.read() == b'abc' * 1000
+    assert digest == hashlib.sha256(b'abc' * 1000).hexdigest() and size == 3000
+
+def test_parser_version_invalidates_entries(tmp_path):
+    cache = ParseCache(str(tmp_path), parser_version='1')
+    cache.put('ab' * 32, 'pdf', {'type': 'pdf', 'text_content': 'x'})
+    assert cache.get('ab' * 32, 'pdf') == {'type': 'pdf', 'text_content': 'x'}
+    assert cache.get('ab' * 32, 'docx') is None
+    
+    upgraded = ParseCache(str(tmp_path), parser_version='2')
+    assert upgraded.get('ab' * 32, 'pdf') is None
+    assert upgraded.stats()['entries'] == 0
+    assert not list(tmp_path.rglob('*.json'))
+
+def test_scan_leaves_writes_in_flight(tmp_path):
+    (tmp_path / 'ab').mkdir()
+    writing = tmp_path / 'ab' / 'tmpwriting.tmp'
+    crashed = tmp_path / 'ab' / 'tmpcrashed.tmp'
+    writing.write_text('{')
+    crashed.write_text('{')
+    old = time.time() - 2 * 3600
+    os.utime(crashed, (old, old))
+    ParseCache(str(tmp_path), parser_version='2')
+    assert writing.exists() and not crashed.exists()
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=250)
+    for name in ('aa', 'bb', 'cc'):
+        cache.put(name * 32, 'txt', {'text_content': name * 40})
+        cache.get('aa' * 32, 'txt')
+    
+    assert cache.stats()['bytes'] <= 250
+    assert cache.get('aa' * 32, 'txt') is not None
+    assert cache.get('bb' * 32, 'txt') is None
+    cache.put('dd' * 32, 'txt', {'error': 'failed'})
+    assert cache.get('dd' * 32, 'txt') is None
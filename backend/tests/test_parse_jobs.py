@@ -0,0 +1,110 @@
+import io
+import os
+import tempfile
+import time
+import pytest
+from app import create_app
+from config import Config
+from utils.parse_jobs import ParseJobQueue, ParseQueueFull
+
+class JobsTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    LLM_BACKEND = 'stub'
+    STUB_LATENCY_MS = 0
+    PARSE_WORKERS = 1
+    PARSE_EVENTS_HEARTBEAT = 1
+    PARSE_CACHE_DIR = tempfile.mkdtemp(prefix='parse-cache-')
+    DOCUMENT_STORE_DIR = tempfile.mkdtemp(prefix='documents-')
+    TESTING = True
+
+def slow_parse(path, file_extension, filename, progress=None):
+    for page in range(1, 4):
+        time.sleep(0.1)
+        progress(page, 3)
+    return {'type': 'text', 'text_content': filename}
+
+def wait_finished(client, job_id, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        body = client.get(f'/api/files/jobs/{job_id}').get_json()
+        if body['status'] in ('done', 'failed'):
+            return body
+        time.sleep(0.05)
+    raise AssertionError('job did not finish')
+
+def test_upload_returns_job_and_result_is_collected():
+    app = create_app(JobsTestConfig)
+    client = app.test_client()
+    
+    response = client.post('/api/files/upload', data={'file': (io.BytesIO(b'hello parse queue'), 'notes.txt')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    
+    body = wait_finished(client, job_id)
+    assert body['status'] == 'done'
+    assert body['content']['outline'] == [{'page': 1, 'preview': 'hello parse queue', 'chars': 17}]
+    assert 'text_content' not in body['content']
+    assert client.get('/api/files/jobs/unknown').status_code == 404
+    
+    events = client.get(f'/api/files/jobs/{job_id}/events').get_data(as_text=True)
+    assert events.startswith('event: done\n')
+    
+    # Identical bytes are answered from the parse cache without a new parse
+    again = client.post('/api/files/upload', data={'file': (io.BytesIO(b'hello parse queue'), 'copy.txt')},
+                        content_type='multipart/form-data')
+    assert again.status_code == 200
+    assert again.get_json()['cached'] is True
+    assert again.get_json()['content']['summary'].startswith('Text file with 3 words')
+    file_id = again.get_json()['file_id']
+    assert client.get(f'/api/files/{file_id}/pages').get_json()['pages'] == [{'page': 1, 'text': 'hello parse queue'}]
+    assert app.extensions['parse_jobs'].stats()['submitted'] == 1
+    app.extensions['parse_jobs'].shutdown()
+
+def test_queue_rejects_when_full_and_reports_progress(tmp_path):
+    jobs = ParseJobQueue(max_workers=1, max_pending=1)
+    path = tmp_path / 'a.txt'
+    path.write_text('x')
+    try:
+        job = jobs.submit(slow_parse, str(path), 'txt', 'a.txt')
+        with pytest.raises(ParseQueueFull):
+            jobs.submit(slow_parse, str(path), 'txt', 'b.txt')
+        
+        seen = set()
+        while not job.finished:
+            jobs.wait_for_change(job.id, job.revision, timeout=5)
+            seen.add((job.status, job.progress_done))
+        assert job.to_dict()['content'] == {'type': 'text', 'text_content': 'a.txt'}
+        assert ('running', 1) in seen or ('running', 2) in seen
+        assert jobs.stats()['rejected'] == 1
+        assert not path.exists()
+    finally:
+        jobs.shutdown()
+
+def test_job_state_is_visible_to_another_process(tmp_path):
+    # Two queues sharing a state directory stand in for two gunicorn workers
+    jobs = ParseJobQueue(max_workers=1, state_dir=str(tmp_path / 'jobs'), poll_interval=0.02)
+    other = ParseJobQueue(max_workers=1, state_dir=str(tmp_path / 'jobs'), poll_interval=0.02)
+    path = tmp_path / 'a.txt'
+    path.write_text('x')
+    try:
+        job = jobs.submit(slow_parse, str(path), 'txt', 'a.txt')
+        seen = other.get(job.id)
+        assert seen.filename == 'a.txt' and not seen.finished
+        while not seen.finished:
+            seen = other.wait_for_change(job.id, seen.revision, timeout=5)
+        assert seen.to_dict()['content'] == {'type': 'text', 'text_content': 'a.txt'}
+        assert other.get('unknown') is None and other.get('../' + job.id) is None
+    finally:
+        jobs.shutdown()
+
+def test_nested_pools_share_the_cpus():
+    class TwoJobsConfig(JobsTestConfig):
+        PARSE_WORKERS = 2
+        PDF_WORKERS = 0
+        OCR_WORKERS = 3
+    app = create_app(TwoJobsConfig)
+    with app.app_context():
+        from routes.file_processing import get_ocr_options, get_pdf_options
+        assert get_pdf_options()['workers'] == max(1, (os.cpu_count() or 1) // 2)
+        assert get_ocr_options()['workers'] == 3
@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+from docx import Document
+from pptx import Presentation
+from pptx.util import Inches
+from benchmarks.pdf_pages import write_text_pdf
+from utils.file_types import sniff_file
+from utils.parsers import iter_chunks, parse_file, parser_for
+
+def write_docx(path):
+    document = Document()
+    document.add_paragraph('Introduction')
+    table = document.add_table(rows=2, cols=2)
+    for row, values in zip(table.rows, [('a', 'b'), ('1', '2')]):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    document.add_paragraph('   ')
+    document.add_paragraph('Conclusion')
+    document.save(path)
+
+def write_pptx(path):
+    presentation = Presentation()
+    for texts in (['Intro', 'Welcome'], [], ['Results']):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        for top, text in enumerate(texts):
+            slide.shapes.add_textbox(Inches(1), Inches(1 + top), Inches(4), Inches(1)).text_frame.text = text
+    presentation.save(path)
+
+def test_parser_lookup_prefers_sniffed_type(tmp_path):
+    path = str(tmp_path / 'misnamed.xlsx')
+    write_docx(path)
+    assert parser_for('xlsx', sniff_file(path)).type == 'docx'
+    assert parser_for('bin', 'application/pdf').type == 'pdf'
+    assert parser_for('txt', 'image/bmp').type == 'text'  # plain text has no signature to trust
+    assert parser_for('doc', 'application/x-ole-storage') is None
+
+def test_docx_chunks_follow_document_order(tmp_path):
+    path = str(tmp_path / 'essay.docx')
+    write_docx(path)
+    chunks = list(iter_chunks(path, 'docx'))
+    assert [(chunk.unit, chunk.number) for chunk in chunks] == [('paragraph', 1), ('table', 1), ('paragraph', 2)]
+    assert chunks[1].text == 'a | b\n1 | 2'
+
+    content = parse_file(path, 'docx', 'essay.docx')
+    assert content['paragraph_count'] == 2 and content['table_count'] == 1
+    assert content['text_content'] == 'Introduction\n\na | b\n1 | 2\n\nConclusion'
+
+def test_slides_keep_their_numbers(tmp_path):
+    path = str(tmp_path / 'deck.pptx')
+    write_pptx(path)
+    updates = []
+    chunks = list(iter_chunks(path, 'pptx', progress=lambda done, total: updates.append((done, total))))
+    assert [(chunk.number, chunk.parts) for chunk in chunks] == [(1, ('Intro', 'Welcome')), (3, ('Results',))]
+    assert updates == [(0, 3), (1, 3), (2, 3)]
+    assert parse_file(path, 'pptx', 'deck.pptx')['slides'][1] == {
+        'slide_number': 3, 'content': ['Results'], 'text': 'Results'
+    }
+
+def test_stream_stops_at_character_cap(tmp_path):
+    path = str(tmp_path / 'book.pdf')
+    write_text_pdf(path, 40, lines_per_page=3)
+    chunks = list(iter_chunks(path, 'pdf', max_chars=500, options={'pdf': {'workers': 2}}))
+    assert sum(len(chunk.text) for chunk in chunks) == 500
+    assert [chunk.number for chunk in chunks] == list(range(1, len(chunks) + 1)) and len(chunks) < 40
+
+    text_path = str(tmp_path / 'notes.txt')
+    with open(text_path, 'w', encoding='utf-8') as f:
+        f.write(''.join(f'line {n} of the notes\n' for n in range(2000)))
+    text_chunks = list(iter_chunks(text_path, 'txt'))
+    assert len(text_chunks) > 1 and all(chunk.text.endswith('\n') for chunk in text_chunks)
+    assert parse_file(text_path, 'txt', 'notes.txt')['word_count'] == 10000
+
+def test_sheets_are_yielded_as_they_are_read(tmp_path):
+    from openpyxl import Workbook
+    workbook = Workbook()
+    workbook.active.title = 'First'
+    workbook.create_sheet('Second')
+    for n in range(10):
+        workbook['First'].append([f'row {n}', n])
+        workbook['Second'].append([f'row {n}', n])
+    path = str(tmp_path / 'book.xlsx')
+    workbook.save(path)
+
+    rows_read = []
+    stream = iter_chunks(path, 'xlsx', progress=lambda done, total: rows_read.append(done))
+    assert next(stream).label == 'First' and max(rows_read) == 9
+    assert next(stream).label == 'Second' and max(rows_read) == 18
+
+def test_parser_libraries_load_on_first_use():
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = ("import sys, utils.parsers; "
+              "print([m for m in ('pypdf', 'docx', 'pptx', 'openpyxl', 'pandas', 'cv2', 'PIL') if m in sys.modules])")
+    output = subprocess.run([sys.executable, '-c', script], cwd=backend, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
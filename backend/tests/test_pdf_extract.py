@@ -0,0 +1,43 @@
+import time
+from pypdf import PageObject
+from benchmarks.pdf_pages import write_text_pdf
+from utils.parsers import parse_file
+from utils.pdf_extract import extract_pdf_pages
+
+def test_parallel_extraction_keeps_page_order(tmp_path):
+    path = str(tmp_path / 'book.pdf')
+    write_text_pdf(path, 40, lines_per_page=3)
+    updates = []
+
+    result = extract_pdf_pages(path, workers=2, progress=lambda done, total: updates.append((done, total)))
+    assert result['page_count'] == 40 and not result['truncated'] and result['timed_out'] == []
+    assert [page.split('.', 1)[0] for page in result['pages']] == [str(n) for n in range(1, 41)]
+    assert updates[-1] == (40, 40)
+    assert result['pages'] == extract_pdf_pages(path, workers=1)['pages']
+
+def test_page_cap_and_slow_page_timeout(tmp_path, monkeypatch):
+    path = str(tmp_path / 'book.pdf')
+    write_text_pdf(path, 5, lines_per_page=2)
+    extract_text = PageObject.extract_text
+
+    def slow_second_page(page, *args, **kwargs):
+        text = extract_text(page, *args, **kwargs)
+        if text.startswith('2.'):
+            time.sleep(5)
+        return text
+
+    monkeypatch.setattr(PageObject, 'extract_text', slow_second_page)
+    started = time.time()
+    result = extract_pdf_pages(path, max_pages=3, workers=1, page_timeout=0.2)
+    assert time.time() - started < 3
+    assert result['truncated'] and len(result['pages']) == 3
+    assert result['timed_out'] == [2] and result['pages'][1] == ''
+    assert result['pages'][2].startswith('3.0')
+
+def test_parse_file_reports_truncation(tmp_path):
+    path = str(tmp_path / 'book.pdf')
+    write_text_pdf(path, 4, lines_per_page=1)
+
+    content = parse_file(path, 'pdf', 'book.pdf', options={'pdf': {'max_pages': 2}})
+    assert content['page_count'] == 4 and content['pages_extracted'] == 2 and content['truncated']
+    assert [page.split(' ', 1)[0] for page in content['pages']] == ['1.0', '2.0']
@@ -0,0 +1,55 @@
+from benchmarks import prompt_bytes
+from models.ai_model import StudyBuddyAI
+from models.llm_backends import LLMBackend
+
+class CapturingBackend(LLMBackend):
+    name = 'capture'
+    
+    def __init__(self):
+        self.calls = []
+    
+    def generate(self, prompt, history=None, system=None):
+        self.calls.append((prompt, history, system))
+        return '## Answer\n\nok'
+
+def make_engine(mode):
+    engine = StudyBuddyAI({'LLM_BACKEND': 'stub', 'PROMPT_MODE': mode, 'RESPONSE_CACHE_SIZE': 0})
+    engine.backend = CapturingBackend()
+    return engine
+
+def test_system_mode_sends_only_the_query_each_turn():
+    engine = make_engine('system')
+    engine.get_response('Explain Python loops', 's1')
+    engine.get_response('Solve x + 2 = 5', 's1')
+    
+    (first, _, system), (second, history, second_system) = engine.backend.calls
+    assert first == 'Explain Python loops' and second == 'Solve x + 2 = 5'
+    assert system.startswith('You are Nexus') and 'CONTENT TYPE: PROGRAMMING' in system
+    # Only the format that applies to the request is sent
+    assert 'CONTENT TYPE: MATHEMATICS' in second_system and 'PROGRAMMING' not in second_system
+    assert 'You are Nexus' not in ''.join(part for turn in history for part in turn['parts'])
+
+def test_benchmark_shows_fewer_bytes_on_the_wire_in_system_mode():
+    rows = prompt_bytes.compare(20)
+    assert prompt_bytes.mean(rows, 'system_wire') < prompt_bytes.mean(rows, 'inline_wire')
+    assert prompt_bytes.mean(rows, 'system_total') < prompt_bytes.mean(rows, 'inline_total')
+
+def test_system_mode_keeps_documents_in_the_turn():
+    engine = make_engine('system')
+    engine.get_response('Summarize this', 's2', file_content='Quarterly revenue grew.')
+    prompt, _, system = engine.backend.calls[0]
+    assert prompt.startswith('DOCUMENT CONTENT:\nQuarterly revenue grew.')
+    assert 'CONTENT TYPE: DOCUMENT_ANALYSIS' in system
+
+def test_inline_mode_repeats_scaffolding():
+    engine = make_engine('inline')
+    engine.get_response('Explain Python loops', 's3')
+    prompt, _, system = engine.backend.calls[0]
+    assert system is None and prompt.startswith('You are Nexus') and 'USER QUERY: Explain Python loops' in prompt
+
+def test_cached_answers_are_kept_apart_per_mode_and_model():
+    system, inline = make_engine('system'), make_engine('inline')
+    key = system._response_cache_key('Explain loops', 's5', None, 'en', 'programming')
+    assert key != inline._response_cache_key('Explain loops', 's5', None, 'en', 'programming')
+    system.backend.model_name = 'another-model'
+    assert key != system._response_cache_key('Explain loops', 's5', None, 'en', 'programming')
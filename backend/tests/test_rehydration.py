@@ -0,0 +1,33 @@
+from app import create_app
+from config import Config
+from models.chat import db, Chat, Message, load_recent_messages
+
+class RehydrateTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    GEMINI_API_KEY = 'test-key'
+    TESTING = True
+
+def test_context_rebuilt_from_messages_after_pool_eviction():
+    app = create_app(RehydrateTestConfig)
+    study_buddy = app.extensions['study_buddy']
+    with app.app_context():
+        db.create_all()
+        chat = Chat(session_id='s1')
+        db.session.add(chat)
+        db.session.commit()
+        for i in range(3):
+            db.session.add(Message(chat_id=chat.id, type='user', content=f'question {i}'))
+            db.session.add(Message(chat_id=chat.id, type='bot', content=f'answer {i}'))
+        db.session.add(Message(chat_id=chat.id, type='user', content='unanswered'))
+        db.session.commit()
+        
+        assert load_recent_messages('s1', limit=3) == [
+            ('user', 'question 2'), ('bot', 'answer 2'), ('user', 'unanswered')
+        ]
+    
+    assert 's1' not in study_buddy.chat_sessions
+    history = study_buddy._get_context('s1').history()
+    assert [part['parts'][0] for part in history] == [
+        'question 0', 'answer 0', 'question 1', 'answer 1', 'question 2', 'answer 2'
+    ]
+    assert 's1' in study_buddy.chat_sessions
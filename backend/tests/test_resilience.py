@@ -0,0 +1,106 @@
+import time
+import pytest
+from models.llm_backends import LLMBackend, LLMTimeoutError, LLMUnavailableError, ResilientBackend
+from utils.resilience import CircuitBreaker, CircuitOpenError
+
+class ScriptedBackend(LLMBackend):
+    """Plays back a list of outcomes: a delay in seconds, or an exception to raise"""
+    name = 'scripted'
+    
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+    
+    def generate(self, prompt, history=None, system=None):
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        time.sleep(outcome)
+        return f'answer {self.calls}'
+
+def test_retries_transient_errors():
+    backend = ScriptedBackend([LLMUnavailableError('down'), LLMUnavailableError('down'), 0])
+    resilient = ResilientBackend(backend, max_retries=2, retry_base_delay=0.001)
+    
+    assert resilient.generate('q') == 'answer 3'
+    assert resilient.stats()['retries'] == 2
+
+def test_non_retryable_error_is_raised_immediately():
+    backend = ScriptedBackend([ValueError('bad request')])
+    resilient = ResilientBackend(backend, max_retries=3, retry_base_delay=0.001)
+    
+    with pytest.raises(ValueError):
+        resilient.generate('q')
+    assert backend.calls == 1
+
+def test_deadline_and_breaker_fail_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    resilient = ResilientBackend(ScriptedBackend([0.2]), timeout=0.02, max_retries=1,
+                                 retry_base_delay=0.001, breaker=breaker)
+    
+    with pytest.raises(LLMTimeoutError):
+        resilient.generate('q')
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        resilient.generate('q')
+
+def test_breaker_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_hedged_request_beats_slow_first_attempt():
+    backend = ScriptedBackend([0.5, 0])
+    resilient = ResilientBackend(backend, timeout=2, hedge=True, hedge_min_samples=1)
+    resilient.latency.record(0.01)
+    
+    start = time.monotonic()
+    assert resilient.generate('q') == 'answer 2'
+    assert time.monotonic() - start < 0.4
+    assert resilient.stats()['hedges'] == 1
+
+class StallingStream(LLMBackend):
+    """Streams the given chunks, sleeping the paired delay before each"""
+    name = 'stalling'
+    
+    def __init__(self, script):
+        self.script = script
+    
+    def stream(self, prompt, history=None, system=None):
+        for delay, chunk in self.script:
+            time.sleep(delay)
+            yield chunk
+
+def test_abandoned_probe_stream_releases_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    resilient = ResilientBackend(StallingStream([(0, 'a'), (0, 'b')]), breaker=breaker)
+    breaker.record_failure()
+    time.sleep(0.02)
+    
+    stream = resilient.stream('q')
+    assert next(stream) == 'a'
+    stream.close()  # client went away mid-probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert ''.join(resilient.stream('q')) == 'ab'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_stalled_stream_times_out():
+    slow_start = ResilientBackend(StallingStream([(0.5, 'a')]), first_chunk_timeout=0.05, max_retries=0)
+    start = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        list(slow_start.stream('q'))
+    assert time.monotonic() - start < 0.3
+    
+    stalls_midway = ResilientBackend(StallingStream([(0, 'a'), (0.5, 'b')]), idle_timeout=0.05, max_retries=2)
+    received = []
+    with pytest.raises(LLMTimeoutError):
+        for chunk in stalls_midway.stream('q'):
+            received.append(chunk)
+    assert received == ['a'] and stalls_midway.stats()['retries'] == 0
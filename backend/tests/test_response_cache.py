@@ -0,0 +1,32 @@
+from utils.response_cache import ResponseCache, make_cache_key
+
+def test_key_normalizes_query():
+    key = make_cache_key('Explain  Python functions?', 'en', 'programming', 'v1')
+    assert key == make_cache_key('explain python functions', 'en', 'programming', 'v1')
+    assert key != make_cache_key('explain python functions', 'en', 'programming', 'v2')
+
+def test_key_depends_on_prompt_mode_and_model():
+    key = make_cache_key('loops', 'en', 'programming', 'v1', 'system', 'gemini/gemini-2.0-flash-lite')
+    assert key != make_cache_key('loops', 'en', 'programming', 'v1', 'inline', 'gemini/gemini-2.0-flash-lite')
+    assert key != make_cache_key('loops', 'en', 'programming', 'v1', 'system', 'gemini/gemini-2.5-pro')
+    assert key != make_cache_key('loops', 'en', 'programming', 'v1', 'system', 'stub/')
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(max_entries=2, ttl=0)
+    cache.set('a', {'response': 'A'})
+    cache.set('b', {'response': 'B'})
+    cache.get('a')
+    cache.set('c', {'response': 'C'})
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == {'response': 'A'}
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 1
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    ResponseCache(path=path).set('k', {'response': 'stored'})
+    
+    cache = ResponseCache(path=path)
+    assert cache.get('k') == {'response': 'stored'}
+    assert cache.stats()['disk_hits'] == 1
@@ -0,0 +1,96 @@
+import threading
+import time
+from app import create_app
+from config import Config
+from models.conversation_context import ConversationContext
+from models.session_pool import SessionPool
+
+def test_lru_eviction_by_count_runs_hooks():
+    evicted = []
+    pool = SessionPool(max_sessions=2, max_bytes=0, idle_ttl=0, size_fn=len)
+    pool.add_eviction_hook(lambda sid, value: evicted.append(sid))
+    
+    pool.put('a', 'x')
+    pool.put('b', 'x')
+    pool.get('a')  # 'b' is now least recently used
+    pool.put('c', 'x')
+    
+    assert 'b' not in pool
+    assert 'a' in pool and 'c' in pool
+    assert evicted == ['b']
+
+def test_memory_bound_and_refresh():
+    pool = SessionPool(max_sessions=10, max_bytes=10, idle_ttl=0, size_fn=len)
+    history = ['hello']
+    pool.put('a', history)
+    pool.put('b', ['hi'])
+    
+    history.append('again')
+    pool.refresh('a')
+    assert pool.stats()['bytes'] == 3
+    
+    pool.put('c', list('0123456789'))
+    assert len(pool) == 1
+    assert 'c' in pool
+
+def test_idle_ttl_expiry():
+    pool = SessionPool(max_sessions=10, max_bytes=0, idle_ttl=0.01, size_fn=len)
+    pool.put('a', 'x')
+    time.sleep(0.02)
+    assert pool.get('a') is None
+    assert len(pool) == 0
+
+def test_writes_expire_idle_sessions_from_the_lru_end(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    evicted = []
+    pool = SessionPool(max_sessions=10, max_bytes=0, idle_ttl=10, size_fn=len)
+    pool.add_eviction_hook(lambda sid, value: evicted.append(sid))
+    for session_id in 'abc':
+        pool.put(session_id, 'x')
+    now[0] = 5
+    pool.get('c')
+    now[0] = 12
+    pool.put('d', 'x')
+    assert evicted == ['a', 'b'] and len(pool) == 2
+    
+    # A live head stops the scan; later puts don't look at every session
+    checked = []
+    monkeypatch.setattr(pool, '_is_expired', lambda entry, at: checked.append(entry) or False)
+    pool.put('e', 'x')
+    assert len(checked) == 1
+
+def test_hooks_run_after_the_lock_is_released_and_discards_count_apart():
+    pool = SessionPool(max_sessions=1, max_bytes=0, idle_ttl=0, size_fn=len)
+    lock_free = []
+    
+    def hook(session_id, value):
+        # Another thread can take the pool lock while the hook runs
+        probe = threading.Thread(target=pool.stats)
+        probe.start()
+        probe.join(1)
+        lock_free.append(not probe.is_alive())
+    
+    pool.add_eviction_hook(hook)
+    pool.put('a', 'x')
+    pool.put('b', 'x')
+    pool.discard('b')
+    assert lock_free == [True, True]
+    assert (pool.stats()['evictions'], pool.stats()['discards']) == (1, 1)
+
+def test_evicted_session_releases_files_in_the_app_storage(tmp_path):
+    class PoolConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        LLM_BACKEND = 'stub'
+        STUB_LATENCY_MS = 0
+        CHAT_SESSION_MAX = 1
+        DOCUMENT_STORE_DIR = str(tmp_path)
+        TESTING = True
+    
+    app = create_app(PoolConfig)
+    storage = app.extensions['file_storage']
+    sessions = app.extensions['study_buddy'].chat_sessions
+    storage.store_file_content('s1', {'file_id': 'f1', 'filename': 'a.txt', 'content': 'x', 'file_type': 'txt'})
+    sessions.put('s1', ConversationContext())
+    sessions.put('s2', ConversationContext())  # pushes s1 out
+    assert storage.get_session_files('s1') == []
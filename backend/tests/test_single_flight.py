@@ -0,0 +1,47 @@
+import threading
+import time
+import pytest
+from utils.single_flight import SingleFlight, SingleFlightTimeout
+
+def test_concurrent_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    
+    def upstream():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'answer'
+    
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', upstream)))
+    leader.start()
+    started.wait(5)
+    
+    followers = [threading.Thread(target=lambda: results.append(flight.do('k', upstream))) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    while flight.waiters('k') < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+    
+    assert len(calls) == 1
+    assert sorted(results) == [('answer', False)] + [('answer', True)] * 5
+    assert flight.stats()['coalesced'] == 5
+
+def test_waiter_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do('k', lambda: release.wait(5)))
+    leader.start()
+    while not flight.stats()['in_flight']:
+        time.sleep(0.001)
+    
+    with pytest.raises(SingleFlightTimeout):
+        flight.do('k', lambda: None, timeout=0.01)
+    release.set()
+    leader.join(5)
@@ -0,0 +1,19 @@
+import json
+from utils.subject_classifier import classify_subject, load_keyword_file
+
+def test_classifies_with_word_boundaries_and_plurals():
+    assert classify_subject('Explain Python functions') == 'programming'
+    assert classify_subject('solve quadratic equations') == 'mathematics'
+    assert classify_subject('What is photosynthesis?') == 'science'
+    assert classify_subject('hello there') == 'general'
+    # 'base' inside 'database' must not count towards science
+    assert classify_subject('database') == 'programming'
+
+def test_weighted_keyword_file(tmp_path):
+    path = tmp_path / 'keywords.json'
+    path.write_text(json.dumps({'history': {'photosynthesis': 5}, 'economics': ['inflation', 'gdp']}))
+    classifier = load_keyword_file(str(path))
+    
+    assert classifier.classify('photosynthesis') == 'history'
+    assert classifier.classify('why does inflation raise gdp') == 'economics'
+    assert classifier.score('inflation inflation')['economics'] == 1.0
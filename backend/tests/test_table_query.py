@@ -0,0 +1,149 @@
+import io
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from app import create_app
+from config import Config
+from models.chat import db
+from utils.excel_ingest import ColumnBuilder
+from utils.table_query import TableStore, parse_table_question, run_table_query, save_tables
+from test_parse_jobs import wait_finished
+
+SHEETS = {'Grades': ['Student', 'Section', 'Marks', 'Passed']}
+NUMERIC = {'Grades': ['Marks']}
+
+class TableTestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    LLM_BACKEND = 'stub'
+    STUB_LATENCY_MS = 0
+    PARSE_WORKERS = 1
+    PARSE_CACHE_MAX_BYTES = 0
+    DOCUMENT_STORE_DIR = tempfile.mkdtemp(prefix='documents-')
+    TABLE_STORE_DIR = tempfile.mkdtemp(prefix='tables-')
+    TESTING = True
+
+class LocalOnlyConfig(TableTestConfig):
+    TABLE_QUERY_NARRATE = False
+
+def grades_frame():
+    return pd.DataFrame({
+        'Student': np.array(['asha', 'ben', 'chen', 'dev', 'eli']),
+        'Section': np.array(['A', 'B', 'A', 'B', 'C']),
+        'Marks': np.array([50, 60, np.nan, 90, 70], dtype=float),
+        'Passed': np.array(['True', 'True', 'False', 'True', 'True'])
+    })
+
+def test_intent_parser_recognises_aggregates():
+    query = parse_table_question('What is the average marks per section?', SHEETS, NUMERIC)
+    assert (query.aggregate, query.column, query.group_by) == ('mean', 'Marks', 'Section')
+
+    query = parse_table_question('Which section has the highest average marks?', SHEETS, NUMERIC)
+    assert (query.aggregate, query.group_by, query.order, query.limit) == ('mean', 'Section', 'desc', 1)
+
+    query = parse_table_question('how many students have marks above 55 in section B', SHEETS, NUMERIC)
+    assert query.aggregate == 'count' and query.filters == (('Marks', '>', 55.0), ('Section', '==', 'b'))
+
+    # Conditions it can't tie to a column, or no aggregate at all, go to the model
+    assert parse_table_question('How many students scored above 50?', SHEETS, NUMERIC) is None
+    assert parse_table_question('Explain the marks column', SHEETS, NUMERIC) is None
+    assert parse_table_question('What is the average attendance?', SHEETS, NUMERIC) is None
+
+    # Aggregate words that don't sit next to a column, or ask how rather than what, aren't queries
+    assert parse_table_question('What is the best way to calculate the average marks?', SHEETS, NUMERIC) is None
+    assert parse_table_question('How do I find the highest marks per section?', SHEETS, NUMERIC) is None
+    assert parse_table_question('Is the maximum allowed for this course the same as the marks?',
+                                SHEETS, NUMERIC) is None
+    query = parse_table_question('Which section has the lowest marks total?', SHEETS, NUMERIC)
+    assert (query.aggregate, query.column, query.order) == ('sum', 'Marks', 'asc')
+
+def test_questions_it_cannot_fully_answer_fall_back():
+    sheets = {'Grades': SHEETS['Grades'] + ['Year', 'Age']}
+    numeric = {'Grades': NUMERIC['Grades'] + ['Year', 'Age']}
+    for question in ('average marks not including section A', 'max marks of students named a',
+                     'average marks of top 2 students', 'average marks this year',
+                     'Compare average marks and age', 'average marks for students in year'):
+        assert parse_table_question(question, sheets, numeric) is None, question
+
+    query = parse_table_question('total number of sections', sheets, numeric)
+    assert (query.aggregate, query.column) == ('count', 'Section')
+    assert run_table_query(grades_frame(), query).iloc[0, 0] == 3
+
+def test_queries_match_pandas():
+    frame = grades_frame()
+    ask = lambda question: run_table_query(frame, parse_table_question(question, SHEETS, NUMERIC))
+
+    per_section = ask('average marks per section')
+    assert per_section.to_dict('list') == {'Section': ['A', 'B', 'C'], 'average Marks': [50.0, 75.0, 70.0]}
+    assert ask('which section has the highest average marks').iloc[0]['Section'] == 'B'
+    assert ask('total marks where passed is true').iloc[0, 0] == 270
+    assert ask('how many students per section, top 1').to_dict('list') == {'Section': ['A'], 'number of distinct Student': [2]}
+
+def test_table_store_round_trip(tmp_path):
+    store = TableStore(str(tmp_path))
+    frame = grades_frame()
+    save_tables(store.path('abc'), {'Grades': {name: frame[name].to_numpy() for name in frame.columns}})
+    loaded = store.load('abc')['Grades']
+    assert list(loaded.columns) == list(frame.columns)
+    assert loaded['Marks'].equals(frame['Marks']) and loaded['Section'].tolist() == ['A', 'B', 'A', 'B', 'C']
+    assert store.load('missing') is None
+
+def test_text_columns_are_stored_at_their_own_length(tmp_path):
+    store = TableStore(str(tmp_path))
+    builder = ColumnBuilder()
+    builder.append(['a', None, 'é' * 5000] + ['b'] * 10000)
+    builder.append([1.5, 2.0])
+    column = builder.array()
+    assert column.dtype == object and column[:3].tolist() == ['a', '', 'é' * 5000] and column[-1] == '2'
+    save_tables(store.path('wide'), {'Notes': {'Text': column}})
+    assert os.path.getsize(store.path('wide')) < 200000  # a '<U5000' array would be ~200 MB
+    assert store.load('wide')['Notes']['Text'].tolist() == column.tolist()
+
+def upload_gradebook(client):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Grades')
+    sheet.append(['Student', 'Section', 'Marks'])
+    for i in range(300):
+        sheet.append([f'student {i}', 'AB'[i % 2], i % 2 * 10 + 50])
+    data = io.BytesIO()
+    workbook.save(data)
+    data.seek(0)
+    response = client.post('/api/files/upload', data={'file': (data, 'grades.xlsx')},
+                           content_type='multipart/form-data')
+    return wait_finished(client, response.get_json()['job_id'])
+
+def test_chat_answers_aggregate_questions_locally():
+    app = create_app(TableTestConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    body = upload_gradebook(client)
+    assert body['status'] == 'done' and body['content']['table_sheets'] == ['Grades']
+
+    answer = client.post('/api/chat', json={
+        'message': 'average marks per section', 'session_id': 's1', 'file_id': body['file_id']
+    }).get_json()
+    assert answer['table']['rows'] == [['A', 50.0], ['B', 60.0]]
+    assert answer['table']['query'] == "average Marks per Section in sheet 'Grades'"
+
+    # Anything else about the sheet still goes to the model with the document text
+    other = client.post('/api/chat', json={
+        'message': 'what is this sheet about', 'session_id': 's1', 'file_id': body['file_id']
+    }).get_json()
+    assert 'table' not in other and other['success']
+    app.extensions['parse_jobs'].shutdown()
+
+def test_local_answer_without_narration():
+    app = create_app(LocalOnlyConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    body = upload_gradebook(client)
+
+    answer = client.post('/api/chat', json={
+        'message': 'how many students per section', 'session_id': 's2', 'file_id': body['file_id']
+    }).get_json()
+    assert answer['response'].startswith('| Section | number of distinct Student |')
+    assert answer['prompt_tokens'] == 0 and answer['table']['rows'] == [['A', 150], ['B', 150]]
+    app.extensions['parse_jobs'].shutdown()
@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from utils.language_detector import detect_language
+from utils.subject_classifier import SubjectClassifier, get_classifier, tokenize
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _chunks(items: Sequence, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _keyword_matrix(classifier: SubjectClassifier):
+    """Keyword index and the (keywords x subjects) weight matrix"""
+    keywords = sorted(classifier.weights)
+    index = {keyword: row for row, keyword in enumerate(keywords)}
+    weights = np.zeros((len(keywords), len(classifier.subjects)), dtype=np.float32)
+    columns = {subject: column for column, subject in enumerate(classifier.subjects)}
+    for keyword, subjects in classifier.weights.items():
+        for subject, weight in subjects.items():
+            weights[index[keyword], columns[subject]] = weight
+    return index, weights
+
+
+def _classify_chunk(texts: Sequence[str], classifier: SubjectClassifier) -> List[str]:
+    index, weights = _keyword_matrix(classifier)
+
+    # Texts x keywords incidence matrix; each distinct keyword counts once per text
+    hits = np.zeros((len(texts), len(index)), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for keyword in classifier.match_tokens(tokenize(text)):
+            hits[row, index[keyword]] = 1.0
+
+    scores = hits @ weights
+    # argmax returns the first maximum, matching classify()'s subject-order tie break
+    best = scores.argmax(axis=1)
+    best_scores = scores[np.arange(len(texts)), best]
+    subjects = np.array(classifier.subjects + ['general'], dtype=object)
+    best[best_scores <= 0] = len(classifier.subjects)
+    return subjects[best].tolist()
+
+
+def _detect_chunk(texts: Sequence[str]) -> List[str]:
+    return [detect_language(text) for text in texts]
+
+
+def _run_chunks(func, texts, chunk_size, processes, *args):
+    chunks = list(_chunks(list(texts), chunk_size))
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(chunks) <= 1:
+        results = [func(chunk, *args) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, len(chunks))) as pool:
+            results = list(pool.map(func, chunks, *[[arg] * len(chunks) for arg in args]))
+    return [item for chunk in results for item in chunk]
+
+
+def classify_many(texts: Sequence[str], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  processes: Optional[int] = 1,
+                  classifier: Optional[SubjectClassifier] = None) -> List[str]:
+    """classify_subject for many texts.
+
+    Each chunk is tokenized once and scored as a single texts x keywords by
+    keywords x subjects matrix product. processes > 1 (or None for one per
+    CPU) spreads chunks across a process pool.
+    """
+    classifier = classifier or get_classifier()
+    return _run_chunks(_classify_chunk, texts, chunk_size, processes, classifier)
+
+
+def detect_language_many(texts: Sequence[str], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         processes: Optional[int] = 1) -> List[str]:
+    """detect_language for many texts; duplicates are detected once"""
+    unique = list(dict.fromkeys(text or '' for text in texts))
+    detected = dict(zip(unique, _run_chunks(_detect_chunk, unique, chunk_size, processes)))
+    return [detected[text or ''] for text in texts]
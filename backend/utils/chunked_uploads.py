@@ -0,0 +1,229 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import BinaryIO, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: uploads are only serialized within one process
+    fcntl = None
+
+from utils.file_types import SNIFF_BYTES, matches_extension
+
+logger = logging.getLogger(__name__)
+
+READ_BYTES = 1024 * 1024
+
+
+class UploadError(Exception):
+    """Rejected upload operation; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class ChunkedUploadStore:
+    """Resumable uploads written straight to their final file.
+
+    An upload is created with its filename and total size, then appended to
+    at an explicit offset. The offset must equal the bytes already on disk,
+    so a client that lost a response asks for status() and resumes from
+    there. Data is hashed as it is written; the hash state is kept in memory
+    and rebuilt from the partial file if this process never saw the earlier
+    chunks. The first SNIFF_BYTES (or the whole upload, if smaller) are
+    sniffed as soon as they are on disk, however they were split into
+    chunks, and an upload whose content doesn't match its extension is
+    rejected before the rest is sent. Metadata lives
+    in a JSON sidecar, so any worker process can serve the next chunk; an
+    append or finalize holds an exclusive flock on the part file, so two
+    workers given the same chunk can't both write at one offset.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, ttl: float = 86400):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._upload_locks: Dict[str, threading.Lock] = {}
+        # upload_id -> (offset, sha256 state at that offset)
+        self._hashes: Dict[str, Tuple[int, 'hashlib._Hash']] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def create(self, filename: str, file_extension: str, size: int, sha256: Optional[str] = None) -> Dict:
+        if size <= 0:
+            raise UploadError('Upload size must be positive')
+        if size > self.max_bytes:
+            raise UploadError(f'File too large. Maximum size: {self.max_bytes // (1024 * 1024)}MB', status=413)
+        self.sweep()
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'file_type': file_extension,
+            'size': size,
+            'sha256': sha256.lower() if sha256 else None,
+            'created_at': time.time()
+        }
+        open(self._part_path(upload_id), 'wb').close()
+        self._write_meta(meta)
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> Dict:
+        meta = self._read_meta(upload_id)
+        received = self._received(upload_id)
+        return {**meta, 'offset': received, 'complete': received == meta['size']}
+
+    def append(self, upload_id: str, offset: int, stream: BinaryIO) -> int:
+        """Write stream at offset; returns the new offset"""
+        with self._locked(upload_id) as f:
+            meta = self._read_meta(upload_id)
+            received = self._received(upload_id)
+            if offset != received:
+                raise UploadError(f'Offset mismatch: expected {received}', status=409, offset=received)
+
+            digest = self._hash_at(upload_id, received)
+            sniff_at = min(SNIFF_BYTES, meta['size'])
+            f.seek(offset)
+            while True:
+                chunk = stream.read(READ_BYTES)
+                if not chunk:
+                    break
+                if offset + len(chunk) > meta['size']:
+                    raise UploadError('Chunk runs past the declared upload size', status=413, offset=offset)
+                f.write(chunk)
+                digest.update(chunk)
+                sniffed = offset >= sniff_at
+                offset += len(chunk)
+                if not sniffed and offset >= sniff_at:
+                    f.flush()
+                    f.seek(0)
+                    head = f.read(SNIFF_BYTES)
+                    if not matches_extension(head, meta['file_type']):
+                        self.discard(upload_id)
+                        raise UploadError(
+                            f'File content does not match its .{meta["file_type"]} extension', status=415
+                        )
+                    f.seek(offset)
+            f.flush()
+            self._hashes[upload_id] = (offset, digest)
+            return offset
+
+    def finalize(self, upload_id: str) -> Tuple[str, str, int, Dict]:
+        """Complete the upload; returns (path, sha256, size, meta) and hands the file to the caller"""
+        with self._locked(upload_id):
+            meta = self._read_meta(upload_id)
+            received = self._received(upload_id)
+            if received != meta['size']:
+                raise UploadError(f'Upload incomplete: {received} of {meta["size"]} bytes', status=409,
+                                  offset=received)
+            digest = self._hash_at(upload_id, received).hexdigest()
+            if meta['sha256'] and meta['sha256'] != digest:
+                self.discard(upload_id)
+                raise UploadError('Checksum mismatch; upload discarded', status=422)
+
+            path = self._part_path(upload_id)
+            self._forget(upload_id)
+            self._remove(self._meta_path(upload_id))
+            return path, digest, received, meta
+
+    def discard(self, upload_id: str):
+        self._forget(upload_id)
+        self._remove(self._part_path(upload_id))
+        self._remove(self._meta_path(upload_id))
+
+    def sweep(self):
+        """Remove uploads not touched for ttl seconds"""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            upload_id = name[:-len('.json')]
+            try:
+                touched = max(os.path.getmtime(self._meta_path(upload_id)),
+                              os.path.getmtime(self._part_path(upload_id)))
+            except OSError:
+                touched = 0
+            if touched < cutoff:
+                logger.info(f"Removing abandoned upload {upload_id}")
+                self.discard(upload_id)
+
+    def _hash_at(self, upload_id, offset):
+        """sha256 state covering the first offset bytes of the part file"""
+        cached = self._hashes.get(upload_id)
+        if cached and cached[0] == offset:
+            # Copy so a failed append can't leave the cached state ahead of the file
+            return cached[1].copy()
+        digest = hashlib.sha256()
+        remaining = offset
+        with open(self._part_path(upload_id), 'rb') as f:
+            while remaining:
+                chunk = f.read(min(READ_BYTES, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+        return digest
+
+    def _upload_lock(self, upload_id):
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    @contextlib.contextmanager
+    def _locked(self, upload_id):
+        """The open part file, held against other threads and, by flock, other processes"""
+        if not upload_id.isalnum():
+            raise UploadError('Upload not found or expired', status=404)
+        with self._upload_lock(upload_id):
+            try:
+                f = open(self._part_path(upload_id), 'r+b')
+            except OSError:
+                raise UploadError('Upload not found or expired', status=404)
+            with f:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # released when f is closed
+                yield f
+
+    def _forget(self, upload_id):
+        with self._lock:
+            self._hashes.pop(upload_id, None)
+            self._upload_locks.pop(upload_id, None)
+
+    def _received(self, upload_id):
+        try:
+            return os.path.getsize(self._part_path(upload_id))
+        except OSError:
+            raise UploadError('Upload not found or expired', status=404)
+
+    def _read_meta(self, upload_id):
+        if not upload_id.isalnum():
+            raise UploadError('Upload not found or expired', status=404)
+        try:
+            with open(self._meta_path(upload_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadError('Upload not found or expired', status=404)
+
+    def _write_meta(self, meta):
+        with open(self._meta_path(meta['upload_id']), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.directory, upload_id + '.part')
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.directory, upload_id + '.json')
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -1,149 +1,237 @@
-import os
 import re
-from typing import Dict, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-class ContentFormatter:
-    def __init__(self):
-        self.formats = {}
-        self.load_formats()
+from utils.format_registry import FormatRegistry, FormatSet, get_registry
+
+# (characters a match can start with, pattern, replacement); the replacement gets
+# the match and the whitespace the output so far ends with
+Rule = Tuple[str, str, Callable[[re.Match, str], str]]
+
+_SPACE_RUN = re.compile(r'[ \t]{2,}|\t')
+
+
+def _drop(match: re.Match, tail: str) -> str:
+    """Delete a match that ends in optional spaces and newlines, leaving what a
+    second normalization pass would have left between its neighbours: a single
+    space, and no more than one blank line where the newlines before and after
+    it meet"""
+    body = match.group().rstrip('\n')
+    after = len(match.group()) - len(body)
+    space = ''
+    newlines = len(tail) - len(tail.rstrip('\n'))
+    if body[-1:] in (' ', '\t'):
+        space = '' if tail[-1:] in (' ', '\t') else ' '
+        newlines = 0  # the space left behind ends the run of newlines before the match
+    if newlines + after >= 3:
+        after = max(0, 2 - newlines)
+    return space + '\n' * after
+
+
+def _tail(text: str, tail: str) -> str:
+    """Trailing whitespace of output ending in tail once text is appended, enough of it for _drop"""
+    stripped = text.rstrip(' \t\n')
+    return ((tail if not stripped else '') + text[len(stripped):])[-3:]
+
+
+# Whitespace and heading normalization shared by every content type
+_CLEAN_RULES: List[Rule] = [
+    ('#', r'^##(?=[^#])[ \t]*', lambda m, tail: '## '),
+    ('\n', r'\n{3,}', lambda m, tail: '\n\n'),
+    (' \t', r'[ \t]{2,}|\t', lambda m, tail: ' '),
+]
+
+_TYPE_RULES: Dict[str, List[Rule]] = {
+    'programming': [
+        ('`', r'``````[ \t]*\n*', _drop),
+    ],
+    'mathematics': [
+        ('\n*', r'(?P<step_nl>\n*)\*\*Step (?P<step>\d+):\*\*',
+         lambda m, tail: '\n' * min(len(m.group('step_nl')) + 1, 2) + f"**Step {m.group('step')}:**"),
+        ('\n*', r'(?P<answer_nl>\n*)\*\*Final Answer:\*\*',
+         lambda m, tail: '\n' * min(len(m.group('answer_nl')) + 1, 2) + '**🎯 Final Answer:**'),
+    ],
+    'document_analysis': [
+        ('#', r'##\s*(?P<title>[^#\n]+)', lambda m, tail: '## ' + _SPACE_RUN.sub(' ', m.group('title')).lstrip(' ')),
+    ],
+    # Filler openers up to the end of their sentence; [^!] cannot backtrack past a '!'
+    # and the bound keeps a missing '!' from swallowing the rest of the answer
+    'general': [
+        ("hHiIdDlL", r"(?i:(?:hey there!|i'm super excited|don't worry|let's dive into|i'm thrilled to)[^!]{0,300}!)[ \t]*\n*", _drop),
+    ],
+}
+
+# Incremental formatting holds back this many characters, more than any
+# bounded rule can span, so a match is never split across two feed() calls
+STREAM_LOOKBACK = 512
+
+
+class FormatPipeline:
+    """Ordered rewrite rules compiled into one alternation and applied in a single pass"""
     
-    def load_formats(self):
-        """Load content formats from markdown file"""
-        try:
-            formats_path = os.path.join(os.path.dirname(__file__), '..', 'prompts', 'content_formats.md')
-            
-            with open(formats_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Split sections by ***
-            sections = content.split('***')
-            
-            for section in sections:
-                if section.strip():
-                    lines = section.strip().split('\n')
-                    
-                    content_type = None
-                    format_instructions = []
-                    template = []
-                    in_template = False
-                    
-                    for line in lines:
-                        if line.startswith('## ') and not line.startswith('### '):
-                            content_type = line[3:].strip()
-                        elif line.strip() == '### Template':
-                            in_template = True
-                        elif line.startswith('```'):  # Skip code block start/end lines
-                            continue
-                        elif in_template:
-                            template.append(line)
-                        elif line.startswith('- ') and not in_template:
-                            format_instructions.append(line[2:])
-                    
-                    if content_type:
-                        self.formats[content_type] = {
-                            'instructions': format_instructions,
-                            'template': '\n'.join(template).strip()
-                        }
-            
-            print(f"[INFO] Loaded {len(self.formats)} content formats")
-        
-        except FileNotFoundError:
-            print("[WARNING] content_formats.md not found, using default formats")
-            self.load_default_formats()
-        
-        except Exception as e:
-            print(f"[ERROR] Failed to load content formats: {e}")
-            self.load_default_formats()
-    
-    def load_default_formats(self):
-        """Fallback default formats"""
-        self.formats = {
-            'programming': {
-                'instructions': [
-                    'Provide working code in ``` blocks',
-                    'Include essential comments',
-                    'Show example usage'
-                ],
-                'template': '## 🔧 SOLUTION\n```\n\n## 🚀 USAGE\n```'
-            },
-            'general': {
-                'instructions': [
-                    'Use clear structure',
-                    'Include bullet points',
-                    'Keep concise'
-                ],
-                'template': '## 🎯 RESPONSE\n\n- Point 1\n- Point 2'
-            }
-        }
+    def __init__(self, rules: List[Rule]):
+        starts = ''.join(sorted(set(''.join(start for start, _, _ in rules))))
+        alternatives = '|'.join(
+            f'(?P<rule{index}>{pattern})' for index, (_, pattern, _) in enumerate(rules)
+        )
+        # The leading character class lets the scanner skip plain text without
+        # trying every alternative at every position
+        self.regex = re.compile(f'(?=[{re.escape(starts)}])(?:{alternatives})', re.MULTILINE)
+        self._replacements = {f'rule{index}': replace for index, (_, _, replace) in enumerate(rules)}
     
-    def get_format_instructions(self, content_type: str) -> str:
-        """Get formatting instructions for a content type"""
-        if content_type not in self.formats:
-            content_type = 'general'
+    def apply(self, text: str) -> str:
+        return self.apply_range(text, 0)[0].strip()
+    
+    def apply_range(self, text: str, pos: int, limit: Optional[int] = None, tail: str = '') -> Tuple[str, int]:
+        """Rewrite text[pos:cut] for the largest safe cut <= limit.
+        
+        The cut follows a non-whitespace character and no match crosses it,
+        so text[cut:] can be rewritten later without changing the result,
+        given the whitespace the output before pos ends with as tail (a
+        removed span can leave some there even though the input doesn't).
+        Without a limit the whole rest of text is rewritten. Returns
+        (output, cut); cut == pos means nothing was safe to emit.
+        """
+        matches = []
+        for match in self.regex.finditer(text, pos):
+            if limit is not None and match.start() >= limit:
+                break
+            matches.append(match)
         
-        format_data = self.formats[content_type]
-        instructions = '\n'.join([f"- {instruction}" for instruction in format_data['instructions']])
+        cut = len(text) if limit is None else limit
+        while limit is not None:
+            while cut > pos and text[cut - 1].isspace():
+                cut -= 1
+            while matches and matches[-1].start() >= cut:
+                matches.pop()
+            if matches and matches[-1].end() > cut:
+                cut = matches[-1].start()
+                continue
+            break
         
-        return f"""
-CONTENT TYPE: {content_type.upper()}
+        if cut <= pos:
+            return '', pos
+        pieces = []
+        last = pos
+        for match in matches:
+            plain = text[last:match.start()]
+            tail = _tail(plain, tail)
+            replacement = self._replacements[match.lastgroup](match, tail)
+            tail = _tail(replacement, tail)
+            pieces.append(plain)
+            pieces.append(replacement)
+            last = match.end()
+        pieces.append(text[last:cut])
+        return ''.join(pieces), cut
+
+
+PIPELINES: Dict[str, FormatPipeline] = {
+    content_type: FormatPipeline(rules + _CLEAN_RULES) for content_type, rules in _TYPE_RULES.items()
+}
+
 
-FORMAT REQUIREMENTS:
-{instructions}
+def pipeline_for(content_type: str) -> FormatPipeline:
+    return PIPELINES.get(content_type, PIPELINES['general'])
 
-EXAMPLE STRUCTURE:
-{format_data['template']}
-"""
+
+class IncrementalFormatter:
+    """Formats a response as it arrives.
+    
+    feed() returns whatever output is already final; only the last
+    STREAM_LOOKBACK characters (plus any match still open at that point) are
+    held back. The concatenation of every feed() result and close() equals
+    format_response() on the whole text.
+    """
+    
+    def __init__(self, pipeline: FormatPipeline, lookback: int = STREAM_LOOKBACK):
+        self.pipeline = pipeline
+        self.lookback = lookback
+        # _pending[:_pos] is one character of already formatted context, kept
+        # so that '^' only matches where a line really starts
+        self._pending = ''
+        self._pos = 0
+        self._held = ''
+        # Trailing whitespace of everything formatted so far, which the
+        # removal rules look at and apply_range can't see past _pos
+        self._tail = ''
+        self._started = False
+    
+    def feed(self, chunk: str) -> str:
+        self._pending += chunk
+        limit = len(self._pending) - self.lookback
+        if limit <= self._pos:
+            return ''
+        output, cut = self.pipeline.apply_range(self._pending, self._pos, limit, self._tail)
+        if cut == self._pos:
+            return ''
+        self._tail = _tail(output, self._tail)
+        self._pending = self._pending[cut - 1:]
+        self._pos = 1
+        return self._emit(output)
+    
+    def close(self) -> str:
+        """Format and return everything still held back"""
+        output, _ = self.pipeline.apply_range(self._pending, self._pos, tail=self._tail)
+        self._pending, self._pos, self._tail = '', 0, ''
+        return self._emit(output, final=True)
+    
+    def _emit(self, output: str, final: bool = False) -> str:
+        output = self._held + output
+        if not self._started:
+            output = output.lstrip()
+        # Trailing whitespace is only emitted once more text follows it
+        body = output.rstrip()
+        self._held = '' if final else output[len(body):]
+        if body:
+            self._started = True
+        return body
+
+
+class ContentFormatter:
+    """Prompt format instructions from a FormatRegistry plus response post-processing"""
+    
+    def __init__(self, registry: Optional[FormatRegistry] = None):
+        self.registry = registry or get_registry()
+    
+    @property
+    def format_set(self) -> FormatSet:
+        """Current snapshot; read it once when several lookups must agree"""
+        return self.registry.current
+    
+    @property
+    def formats(self) -> Dict[str, Dict]:
+        return self.format_set.as_dict()
+    
+    @property
+    def version(self) -> str:
+        return self.format_set.version
+    
+    def load_formats(self):
+        """Reload content formats from the markdown file if it changed"""
+        return self.registry.reload()
+    
+    def get_format_instructions(self, content_type: str) -> str:
+        """Get formatting instructions for a content type"""
+        return self.format_set.get(content_type).prompt_block
     
     def get_available_formats(self) -> list:
         """Get list of available content formats"""
-        return list(self.formats.keys())
+        return list(self.format_set.formats.keys())
     
     def format_response(self, response: str, content_type: str) -> str:
         """Apply content-specific formatting to response"""
-        if content_type == 'programming':
-            return self._format_programming(response)
-        elif content_type == 'mathematics':
-            return self._format_mathematics(response)
-        elif content_type == 'document_analysis':
-            return self._format_document_analysis(response)
-        else:
-            return self._format_general(response)
-    
-    def _format_programming(self, response: str) -> str:
-        """Format programming responses"""
-        # Remove 6-backtick blocks if present
-        response = re.sub(r'``````', '', response)
-        return self._clean_response(response)
-    
-    def _format_mathematics(self, response: str) -> str:
-        """Format mathematics responses"""
-        response = re.sub(r'\*\*Step (\d+):\*\*', r'\n**Step \1:**', response)
-        response = re.sub(r'\*\*Final Answer:\*\*', r'\n**🎯 Final Answer:**', response)
-        return self._clean_response(response)
-    
-    def _format_document_analysis(self, response: str) -> str:
-        """Format document analysis responses"""
-        response = re.sub(r'##\s*([^#\n]+)', r'## \1', response)
-        return self._clean_response(response)
-    
-    def _format_general(self, response: str) -> str:
-        """Format general responses"""
-        verbose_patterns = [
-            r"Hey there!.*?!",
-            r"I'm super excited.*?!",
-            r"Don't worry.*?!",
-            r"Let's dive into.*?!",
-            r"I'm thrilled to.*?!"
-        ]
-        
-        for pattern in verbose_patterns:
-            response = re.sub(pattern, "", response, flags=re.IGNORECASE | re.DOTALL)
-        
-        return self._clean_response(response)
-    
-    def _clean_response(self, response: str) -> str:
-        """Apply general cleaning to response"""
-        response = re.sub(r'^##([^#])', r'## \1', response, flags=re.MULTILINE)
-        response = re.sub(r'\n{3,}', '\n\n', response)
-        response = re.sub(r'[ \t]+', ' ', response)
-        return response.strip()
+        return pipeline_for(content_type).apply(response)
+    
+    def incremental(self, content_type: str) -> 'IncrementalFormatter':
+        """Formatter that accepts the response piece by piece via feed()"""
+        return IncrementalFormatter(pipeline_for(content_type))
+    
+    def format_stream(self, chunks: Iterable[str], content_type: str) -> Iterator[str]:
+        """Format streamed text incrementally; joined output equals format_response"""
+        formatter = self.incremental(content_type)
+        for chunk in chunks:
+            formatted = formatter.feed(chunk)
+            if formatted:
+                yield formatted
+        formatted = formatter.close()
+        if formatted:
+            yield formatted
@@ -0,0 +1,327 @@
+import datetime
+import logging
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 4096
+SAMPLE_ROWS = 20
+TOP_VALUES = 5
+# Candidates kept per column for top values; counts are exact below this many distinct values
+TOP_CAPACITY = 256
+
+
+class ColumnStats:
+    """Running statistics of one column, updated a chunk of cells at a time.
+
+    Numeric cells are reduced with NumPy per chunk and merged into a running
+    count/mean/M2 (Chan et al.), so mean and std don't drift on long columns.
+    Top values are a Misra-Gries summary of at most TOP_CAPACITY candidates:
+    exact while a column has few distinct values, and otherwise still
+    keeping every value that makes up more than 1/TOP_CAPACITY of it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.kinds = {'int': 0, 'float': 0, 'bool': 0, 'datetime': 0, 'text': 0}
+        self.numbers = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.first_date = None
+        self.last_date = None
+        self.top: Dict[Any, int] = {}
+
+    def update(self, values: Iterable[Any]):
+        numbers, dates, texts = [], [], []
+        for value in values:
+            if value is None or value == '':
+                self.nulls += 1
+                continue
+            self.count += 1
+            if isinstance(value, bool):
+                self.kinds['bool'] += 1
+                texts.append(str(value))
+            elif isinstance(value, int):
+                self.kinds['int'] += 1
+                numbers.append(value)
+            elif isinstance(value, float):
+                if math.isnan(value):
+                    self.count -= 1
+                    self.nulls += 1
+                    continue
+                self.kinds['float'] += 1
+                numbers.append(value)
+            elif isinstance(value, (datetime.datetime, datetime.date)):
+                self.kinds['datetime'] += 1
+                dates.append(value)
+            else:
+                self.kinds['text'] += 1
+                texts.append(str(value).strip())
+
+        if numbers:
+            self._add_numbers(np.asarray(numbers, dtype=np.float64))
+        if dates:
+            stamps = np.asarray(dates, dtype='datetime64[s]')
+            first, last = stamps.min(), stamps.max()
+            self.first_date = first if self.first_date is None else min(self.first_date, first)
+            self.last_date = last if self.last_date is None else max(self.last_date, last)
+            self._add_top(np.unique(stamps.astype('datetime64[D]').astype(str), return_counts=True))
+        if texts:
+            self._add_top(np.unique(np.asarray(texts, dtype=str), return_counts=True))
+
+    def _add_numbers(self, chunk):
+        count = len(chunk)
+        mean = float(chunk.mean())
+        m2 = float(((chunk - mean) ** 2).sum())
+        total = self.numbers + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.numbers * count / total
+        self.numbers = total
+        low, high = float(chunk.min()), float(chunk.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self._add_top(np.unique(chunk, return_counts=True))
+
+    def _add_top(self, unique):
+        values, counts = unique
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self.top[value] = self.top.get(value, 0) + count
+        if len(self.top) > TOP_CAPACITY:
+            # Misra-Gries merge: subtract the (capacity+1)-th largest count from everything
+            cut = sorted(self.top.values(), reverse=True)[TOP_CAPACITY]
+            self.top = {value: count - cut for value, count in self.top.items() if count > cut}
+
+    @property
+    def dtype(self) -> str:
+        present = [kind for kind, count in self.kinds.items() if count]
+        if not present:
+            return 'empty'
+        if set(present) == {'int', 'float'}:
+            return 'float'
+        return present[0] if len(present) == 1 else 'mixed'
+
+    def to_dict(self, top_values: int = TOP_VALUES) -> Dict[str, Any]:
+        data = {'name': self.name, 'dtype': self.dtype, 'count': self.count, 'nulls': self.nulls}
+        if self.numbers:
+            data.update({
+                'min': _plain(self.min),
+                'max': _plain(self.max),
+                'mean': round(self.mean, 6),
+                'std': round(math.sqrt(self.m2 / self.numbers), 6)
+            })
+        if self.first_date is not None:
+            data.update({'min': str(self.first_date), 'max': str(self.last_date)})
+        top = sorted(self.top.items(), key=lambda item: (-item[1], str(item[0])))[:top_values]
+        data['top_values'] = [[_plain(value), count] for value, count in top]
+        return data
+
+
+class ColumnBuilder:
+    """Collects a column's cells as typed NumPy chunks for the table store.
+
+    A chunk is float64 (NaN for empty) when every cell is numeric, datetime64
+    (NaT) when every cell is a date, and text otherwise. Text is kept as an
+    object array of str, so one long cell doesn't widen every other one the
+    way a fixed-width '<U' array would. array() joins the chunks, turning the
+    whole column into text ('' for empty) if chunks disagree.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def append(self, values: List[Any]):
+        present = [value for value in values if value is not None and value != '']
+        if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+            self.chunks.append(np.array([np.nan if value is None or value == '' else value for value in values],
+                                        dtype=np.float64))
+        elif all(isinstance(value, (datetime.datetime, datetime.date)) for value in present):
+            self.chunks.append(np.array([None if value == '' else value for value in values], dtype='datetime64[s]'))
+        else:
+            self.chunks.append(np.array(['' if value is None else str(_plain(value)).strip() for value in values],
+                                        dtype=object))
+
+    def array(self) -> np.ndarray:
+        if not self.chunks:
+            return np.array([], dtype=np.float64)
+        kinds = {chunk.dtype.kind for chunk in self.chunks}
+        if len(kinds) == 1:
+            return np.concatenate(self.chunks)
+        return np.concatenate([chunk if chunk.dtype.kind == 'O' else _as_text(chunk) for chunk in self.chunks])
+
+
+def _as_text(chunk):
+    if chunk.dtype.kind == 'f':
+        return np.array(['' if np.isnan(value) else str(_plain(value)) for value in chunk.tolist()], dtype=object)
+    return np.where(np.isnat(chunk), '', chunk.astype(str)).astype(object)
+
+
+def _plain(value):
+    """JSON-friendly scalar: integral floats become ints"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _cell(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _header(row: Tuple) -> List[str]:
+    names = list(row)
+    while names and names[-1] in (None, ''):
+        names.pop()
+    seen = {}
+    header = []
+    for index, name in enumerate(names):
+        name = str(name).strip() if name not in (None, '') else f'Column {index + 1}'
+        seen[name] = seen.get(name, 0) + 1
+        header.append(name if seen[name] == 1 else f'{name} ({seen[name]})')
+    return header
+
+
+def summarize_sheet(name: str, rows: Iterator[Tuple], chunk_rows: int = CHUNK_ROWS,
+                    sample_rows: int = SAMPLE_ROWS, table_rows: int = 0,
+                    progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """Column statistics and a bounded row sample of one sheet given as row tuples.
+
+    The first non-empty row is the header. Rows are consumed chunk_rows at a
+    time and only the current chunk, the sample and the per-column state are
+    held, so memory doesn't grow with the sheet. With table_rows set, the
+    full columns are also collected as NumPy arrays under 'table' unless the
+    sheet has more rows than that.
+    """
+    header = None
+    columns: List[ColumnStats] = []
+    builders: Optional[List[ColumnBuilder]] = None
+    sample = []
+    row_count = 0
+    chunk = []
+
+    def flush():
+        nonlocal builders
+        if not chunk:
+            return
+        if builders is not None and row_count > table_rows:
+            builders = None  # too big to keep; statistics only
+        for index, column in enumerate(columns):
+            cells = [row[index] if index < len(row) else None for row in chunk]
+            column.update(cells)
+            if builders is not None:
+                builders[index].append(cells)
+        chunk.clear()
+        if progress:
+            progress(row_count)
+
+    for row in rows:
+        if header is None:
+            if any(value not in (None, '') for value in row):
+                header = _header(row)
+                columns = [ColumnStats(column) for column in header]
+                builders = [ColumnBuilder() for _ in header] if table_rows else None
+            continue
+        if not any(value not in (None, '') for value in row[:len(header)]):
+            continue
+        row_count += 1
+        if len(sample) < sample_rows:
+            sample.append([_cell(row[index]) if index < len(row) else None for index in range(len(header))])
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            flush()
+    flush()
+
+    sheet = {
+        'name': name,
+        'rows': row_count,
+        'columns': [column.to_dict() for column in columns],
+        'sample': sample,
+        'sample_truncated': row_count > len(sample)
+    }
+    if builders is not None:
+        sheet['table'] = {column.name: builder.array() for column, builder in zip(columns, builders)}
+    return sheet
+
+
+def _iter_openpyxl(path):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield sheet.title, sheet.iter_rows(values_only=True), sheet.max_row
+    finally:
+        workbook.close()
+
+
+def _iter_pandas(path):
+    """Legacy .xls workbooks, which openpyxl can't read; these are loaded a sheet at a time"""
+    import pandas as pd
+    with pd.ExcelFile(path) as workbook:
+        for name in workbook.sheet_names:
+            frame = workbook.parse(name, header=None)
+            frame = frame.astype(object).where(frame.notna(), None)
+            yield name, frame.itertuples(index=False, name=None), len(frame)
+
+
+def iter_workbook(path: str, file_extension: str = 'xlsx', chunk_rows: int = CHUNK_ROWS,
+                  sample_rows: int = SAMPLE_ROWS, table_rows: int = 0,
+                  progress: Optional[Callable[[int, Optional[int]], None]] = None) -> Iterator[Dict[str, Any]]:
+    """Summarize a workbook a sheet at a time, yielding each sheet once it is read.
+
+    .xlsx files are streamed with openpyxl in read-only mode. progress(done,
+    total) counts rows across sheets; total comes from the sheet dimensions
+    and may be None when a sheet doesn't record them. Sheets of at most
+    table_rows rows carry their columns under 'table' (column name -> array).
+    """
+    done = 0
+    reader = _iter_pandas if file_extension == 'xls' else _iter_openpyxl
+    for name, rows, max_row in reader(path):
+        total = (done + max_row) if max_row else None
+        report = (lambda rows_done, base=done, total=total: progress(base + rows_done, total)) if progress else None
+        sheet = summarize_sheet(name, rows, chunk_rows=chunk_rows, sample_rows=sample_rows,
+                                table_rows=table_rows, progress=report)
+        done += sheet['rows']
+        yield sheet
+
+
+def ingest_workbook(path: str, file_extension: str = 'xlsx', **options) -> Dict[str, Any]:
+    """iter_workbook collected into one result: {'sheets', 'total_rows', 'tables'}, the
+    tables keyed by sheet name. Takes the same keyword arguments."""
+    sheets = []
+    tables = {}
+    for sheet in iter_workbook(path, file_extension, **options):
+        if 'table' in sheet:
+            tables[sheet['name']] = sheet.pop('table')
+        sheets.append(sheet)
+    return {'sheets': sheets, 'total_rows': sum(sheet['rows'] for sheet in sheets), 'tables': tables}
+
+
+def describe_workbook(sheets: List[Dict[str, Any]], sample_rows: int = 5) -> str:
+    """Plain-text rendering of sheet summaries, used as the document's text"""
+    blocks = []
+    for sheet in sheets:
+        lines = [f"Sheet '{sheet['name']}': {sheet['rows']} rows, {len(sheet['columns'])} columns"]
+        for column in sheet['columns']:
+            parts = [f"{column['dtype']}", f"{column['nulls']} empty"]
+            if 'mean' in column:
+                parts.append(f"min {column['min']}, max {column['max']}, mean {column['mean']:g}")
+            elif 'min' in column:
+                parts.append(f"from {column['min']} to {column['max']}")
+            if column['top_values'] and column['dtype'] in ('text', 'bool', 'mixed'):
+                parts.append('top ' + ', '.join(f"{value} ({count})" for value, count in column['top_values']))
+            lines.append(f"- {column['name']}: " + '; '.join(parts))
+        if sheet['sample']:
+            names = [column['name'] for column in sheet['columns']]
+            lines.append(' | '.join(names))
+            lines.extend(' | '.join('' if value is None else str(value) for value in row)
+                         for row in sheet['sample'][:sample_rows])
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
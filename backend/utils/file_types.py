@@ -0,0 +1,89 @@
+import zipfile
+from typing import Optional
+
+# Enough leading bytes to recognise every signature below
+SNIFF_BYTES = 4096
+
+_ZIP = 'application/zip'
+_OLE = 'application/x-ole-storage'
+
+# Extension -> container type its bytes must sniff as
+EXTENSION_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': _ZIP, 'xlsx': _ZIP, 'pptx': _ZIP,
+    'doc': _OLE, 'xls': _OLE, 'ppt': _OLE,
+    'png': 'image/png',
+    'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'bmp': 'image/bmp',
+    'tiff': 'image/tiff',
+    'webp': 'image/webp',
+    'txt': 'text/plain'
+}
+
+
+def sniff_type(head: bytes) -> Optional[str]:
+    """Container type from the leading bytes of a file, or None if unrecognised"""
+    if head.startswith(b'%PDF-'):
+        return 'application/pdf'
+    if head.startswith(b'PK\x03\x04'):
+        return _ZIP
+    if head.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'):
+        return _OLE
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if head.startswith(b'BM'):
+        return 'image/bmp'
+    if head.startswith((b'II*\x00', b'MM\x00*')):
+        return 'image/tiff'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if _looks_like_text(head):
+        return 'text/plain'
+    return None
+
+
+# Part that identifies each kind of OOXML package inside the zip container
+OOXML_TYPES = {
+    'word/document.xml': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'ppt/presentation.xml': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'xl/workbook.xml': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+
+def sniff_file(path: str) -> Optional[str]:
+    """MIME type of a file on disk; zip containers are told apart as DOCX, PPTX or XLSX"""
+    with open(path, 'rb') as f:
+        head = f.read(SNIFF_BYTES)
+    mime_type = sniff_type(head)
+    if mime_type == _ZIP:
+        try:
+            with zipfile.ZipFile(path) as package:
+                names = set(package.namelist())
+        except (zipfile.BadZipFile, OSError):
+            return mime_type
+        for part, ooxml_type in OOXML_TYPES.items():
+            if part in names:
+                return ooxml_type
+    return mime_type
+
+
+def _looks_like_text(head: bytes) -> bool:
+    if head.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return True  # UTF-16 BOM
+    return b'\x00' not in head
+
+
+def matches_extension(head: bytes, file_extension: str) -> bool:
+    """True when the leading bytes are what a file with this extension should contain"""
+    expected = EXTENSION_TYPES.get(file_extension.lower())
+    if expected is None:
+        return False
+    if expected == 'text/plain':
+        # Plain text has no signature; only reject content that is clearly binary
+        return _looks_like_text(head)
+    return sniff_type(head) == expected
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+DEFAULT_FORMATS_PATH = os.path.join(os.path.dirname(__file__), '..', 'prompts', 'content_formats.md')
+
+# Used when content_formats.md is missing or unreadable
+DEFAULT_FORMATS = {
+    'programming': {
+        'instructions': [
+            'Provide working code in ``` blocks',
+            'Include essential comments',
+            'Show example usage'
+        ],
+        'template': '## 🔧 SOLUTION\n```\n\n## 🚀 USAGE\n```'
+    },
+    'general': {
+        'instructions': [
+            'Use clear structure',
+            'Include bullet points',
+            'Keep concise'
+        ],
+        'template': '## 🎯 RESPONSE\n\n- Point 1\n- Point 2'
+    }
+}
+
+
+class ContentFormat(NamedTuple):
+    name: str
+    instructions: Tuple[str, ...]
+    template: str
+    # Rendered once at load time and pasted into every prompt for this type
+    prompt_block: str
+
+
+def parse_formats(content: str) -> Dict[str, Dict]:
+    """Parse content_formats.md: sections split by ***, '## <type>' headers,
+    '- ' instruction bullets and a '### Template' block"""
+    formats = {}
+    for section in content.split('***'):
+        if not section.strip():
+            continue
+        content_type = None
+        format_instructions = []
+        template = []
+        in_template = False
+
+        for line in section.strip().split('\n'):
+            if line.startswith('## ') and not line.startswith('### '):
+                content_type = line[3:].strip()
+            elif line.strip() == '### Template':
+                in_template = True
+            elif line.startswith('```'):  # Skip code block start/end lines
+                continue
+            elif in_template:
+                template.append(line)
+            elif line.startswith('- ') and not in_template:
+                format_instructions.append(line[2:])
+
+        if content_type:
+            formats[content_type] = {
+                'instructions': format_instructions,
+                'template': '\n'.join(template).strip()
+            }
+    return formats
+
+
+def render_prompt_block(content_type: str, instructions, template: str) -> str:
+    instructions = '\n'.join([f"- {instruction}" for instruction in instructions])
+    return f"""
+CONTENT TYPE: {content_type.upper()}
+
+FORMAT REQUIREMENTS:
+{instructions}
+
+EXAMPLE STRUCTURE:
+{template}
+"""
+
+
+class FormatSet:
+    """Immutable snapshot of the parsed formats with their prompt blocks pre-rendered"""
+
+    def __init__(self, formats: Mapping[str, Dict], source: Optional[str] = None):
+        self.formats: Mapping[str, ContentFormat] = MappingProxyType({
+            name: ContentFormat(
+                name, tuple(data['instructions']), data['template'],
+                render_prompt_block(name, data['instructions'], data['template'])
+            )
+            for name, data in formats.items()
+        })
+        self.source = source
+        # Identifies the loaded formats; changes whenever content_formats.md does
+        self.version = hashlib.sha1(
+            json.dumps(formats, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:12]
+
+    def get(self, content_type: str) -> ContentFormat:
+        """Format for content_type, falling back to general (or any format at all)"""
+        found = self.formats.get(content_type) or self.formats.get('general')
+        if found is None:
+            found = next(iter(self.formats.values()))
+        return found
+
+    def as_dict(self) -> Dict[str, Dict]:
+        return {
+            name: {'instructions': list(fmt.instructions), 'template': fmt.template}
+            for name, fmt in self.formats.items()
+        }
+
+    def __contains__(self, content_type):
+        return content_type in self.formats
+
+    def __len__(self):
+        return len(self.formats)
+
+
+class FormatRegistry:
+    """Loads content_formats.md once and swaps in a new FormatSet when it changes.
+
+    The file is re-read only when its (mtime, size) stamp moves, and re-parsed
+    only when the content hash differs too. Readers take `current`, a single
+    attribute read, so a reload never exposes a half-built snapshot. watch()
+    starts a daemon thread that polls the stamp and reloads on change.
+    """
+
+    def __init__(self, path: str = DEFAULT_FORMATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._digest = None
+        self._listeners: List[Callable[[FormatSet], None]] = []
+        self._watcher = None
+        self._stop = threading.Event()
+        self.reloads = 0
+        self.current = FormatSet(DEFAULT_FORMATS, source=None)
+        self.reload()
+
+    def add_listener(self, listener: Callable[[FormatSet], None]):
+        """Call listener(new_format_set) after every reload that changed the formats"""
+        self._listeners.append(listener)
+
+    def reload(self, force: bool = False) -> FormatSet:
+        """Re-read the file if it changed (or always with force) and return the current set"""
+        with self._lock:
+            stamp = self._file_stamp()
+            if not force and stamp == self._stamp and self._stamp is not None:
+                return self.current
+            changed = self._load(stamp)
+        if changed:
+            for listener in list(self._listeners):
+                listener(self.current)
+        return self.current
+
+    def watch(self, interval: float = 2.0):
+        """Poll the formats file every interval seconds from a daemon thread (idempotent)"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval,), name='format-watcher', daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def stats(self):
+        return {
+            'path': os.path.abspath(self.path),
+            'version': self.current.version,
+            'formats': len(self.current),
+            'reloads': self.reloads,
+            'watching': self._watcher is not None
+        }
+
+    def _watch_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"[WARNING] Content format reload failed: {e}")
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, stamp) -> bool:
+        """Parse the file into a new FormatSet; True when the formats changed"""
+        self._stamp = stamp
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            if self._digest is None:
+                print("[WARNING] content_formats.md not found, using default formats")
+            return False
+
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == self._digest:
+            return False
+
+        try:
+            formats = parse_formats(raw.decode('utf-8'))
+        except Exception as e:
+            print(f"[ERROR] Failed to load content formats: {e}")
+            return False
+        if not formats:
+            print("[WARNING] content_formats.md has no formats, keeping the current ones")
+            return False
+
+        self.current = FormatSet(formats, source=self.path)
+        self._digest = digest
+        self.reloads += 1
+        print(f"[INFO] Loaded {len(formats)} content formats")
+        return True
+
+
+_registries: Dict[str, FormatRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(path: str = DEFAULT_FORMATS_PATH) -> FormatRegistry:
+    """Process-wide registry for a formats file, created on first use"""
+    key = os.path.abspath(path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = FormatRegistry(path)
+        return registry
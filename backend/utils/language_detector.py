@@ -1,38 +1,113 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
 from langdetect import detect, DetectorFactory
 from langdetect.lang_detect_exception import LangDetectException
 
 # Set seed for consistent results
 DetectorFactory.seed = 0
 
+# Common Indian language codes
+INDIAN_LANGUAGES = ['hi', 'bn', 'te', 'mr', 'ta', 'gu', 'kn', 'ml', 'pa', 'or', 'as', 'ur']
+
+# Unicode blocks for the scripts we care about. A script maps to a language
+# code when only one supported language uses it; None means several do
+# (Devanagari: Hindi/Marathi, Bengali: Bengali/Assamese, Arabic: Urdu and
+# non-Indian languages) and langdetect has to decide.
+SCRIPTS = [
+    (re.compile('[\u0900-\u097F]'), None),  # Devanagari
+    (re.compile('[\u0980-\u09FF]'), None),  # Bengali
+    (re.compile('[\u0A00-\u0A7F]'), 'pa'),  # Gurmukhi
+    (re.compile('[\u0A80-\u0AFF]'), 'gu'),  # Gujarati
+    (re.compile('[\u0B00-\u0B7F]'), 'or'),  # Odia
+    (re.compile('[\u0B80-\u0BFF]'), 'ta'),  # Tamil
+    (re.compile('[\u0C00-\u0C7F]'), 'te'),  # Telugu
+    (re.compile('[\u0C80-\u0CFF]'), 'kn'),  # Kannada
+    (re.compile('[\u0D00-\u0D7F]'), 'ml'),  # Malayalam
+    (re.compile('[\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]'), None),  # Arabic (Urdu)
+]
+_LETTERS = re.compile(r'[^\W\d_]')
+
+# Script counting only needs a representative sample of long documents
+SCRIPT_SAMPLE_CHARS = 4000
+MEMO_SIZE = 4096
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _script_decision(text):
+    """Decide from Unicode scripts alone; returns a code, or None when langdetect must decide"""
+    if text.isascii():
+        return 'en'
+
+    sample = text[:SCRIPT_SAMPLE_CHARS]
+    counts = [(len(pattern.findall(sample)), code) for pattern, code in SCRIPTS]
+    indic_letters = sum(count for count, _ in counts)
+    if indic_letters == 0:
+        # Latin, Cyrillic, CJK...: never one of the supported Indian languages
+        return 'en'
+
+    top_count, top_code = max(counts, key=lambda item: item[0])
+    letters = len(_LETTERS.findall(sample))
+    if top_code and top_count * 2 >= letters:
+        return top_code
+    return None
+
+
+def _langdetect(text):
+    # Remove common programming keywords that might interfere
+    programming_keywords = [
+        'def', 'class', 'import', 'from', 'if', 'else', 'for', 'while',
+        'function', 'var', 'let', 'const', 'return', 'print', 'console.log'
+    ]
+
+    words = text.lower().split()
+    filtered_words = [word for word in words if word not in programming_keywords]
+    filtered_text = ' '.join(filtered_words) if filtered_words else text
+
+    detected = detect(filtered_text)
+    return detected if detected in INDIAN_LANGUAGES else 'en'
+
+
 def detect_language(text):
     """Detect the language of the input text"""
     try:
         if not text or len(text.strip()) < 3:
             return 'en'
-        
-        # Remove common programming keywords that might interfere
-        programming_keywords = [
-            'def', 'class', 'import', 'from', 'if', 'else', 'for', 'while',
-            'function', 'var', 'let', 'const', 'return', 'print', 'console.log'
-        ]
-        
-        words = text.lower().split()
-        filtered_words = [word for word in words if word not in programming_keywords]
-        filtered_text = ' '.join(filtered_words) if filtered_words else text
-        
-        detected = detect(filtered_text)
-        
-        # Common Indian language codes
-        indian_languages = ['hi', 'bn', 'te', 'mr', 'ta', 'gu', 'kn', 'ml', 'pa', 'or', 'as', 'ur']
-        
-        if detected in indian_languages:
-            return detected
-        else:
-            return 'en'
-            
+
+        decided = _script_decision(text)
+        if decided:
+            return decided
+
+        key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        with _memo_lock:
+            if key in _memo:
+                _memo.move_to_end(key)
+                return _memo[key]
+
+        detected = _langdetect(text)
+
+        with _memo_lock:
+            _memo[key] = detected
+            if len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+        return detected
+
     except (LangDetectException, Exception):
         return 'en'
 
+
+def prewarm():
+    """Load langdetect's language profiles now instead of on the first request"""
+    try:
+        detect('नमस्ते, आप कैसे हैं? This sentence warms up the detector.')
+    except LangDetectException:
+        pass
+
+
 def get_language_name(lang_code):
     """Get full language name from language code"""
     language_names = {
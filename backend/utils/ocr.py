@@ -0,0 +1,258 @@
+import functools
+import hashlib
+import logging
+import os
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps, ImageSequence
+
+from utils.parse_cache import ParseCache
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever preprocessing changes so cached OCR text is invalidated
+OCR_VERSION = '1'
+
+TARGET_DPI = 300
+# Page height assumed for images without a scanner DPI (phone photos report 72 or nothing)
+PAGE_INCHES = 11
+SCANNER_MIN_DPI = 150
+# Tall pages are cut into tiles of about this many rows, at the emptiest row near each boundary
+TILE_ROWS = 1200
+TILE_SEARCH_ROWS = 150
+# Tiles with less ink than this fraction of their pixels are blank and not sent to tesseract
+MIN_INK = 0.002
+# Skew search range (degrees) and the long side of the thumbnail it runs on
+DESKEW_MAX_ANGLE = 10
+DESKEW_THUMB_SIDE = 800
+# Smaller estimates are within the search's noise and don't bother tesseract; the page is left as is
+DESKEW_MIN_ANGLE = 0.5
+
+
+@functools.lru_cache(maxsize=None)
+def tesseract_version() -> Optional[str]:
+    """Version of the tesseract binary, or None when it (or pytesseract) is missing"""
+    try:
+        import pytesseract
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _cache(directory: str, max_bytes: int) -> ParseCache:
+    return ParseCache(directory, max_bytes=max_bytes, parser_version=OCR_VERSION)
+
+
+def target_scale(size: Tuple[int, int], dpi: Optional[Tuple[float, float]], target_dpi: int = TARGET_DPI) -> float:
+    """Factor (at most 1) that brings an image down to target_dpi.
+
+    Scans carry a real DPI; for anything else the long side is taken to be
+    a PAGE_INCHES page.
+    """
+    if dpi and dpi[0] and dpi[0] >= SCANNER_MIN_DPI:
+        scale = target_dpi / float(dpi[0])
+    else:
+        scale = target_dpi * PAGE_INCHES / float(max(size))
+    return min(1.0, scale)
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Black text on white from a grayscale page, tolerant of uneven lighting"""
+    if np.median(gray) < 100:
+        gray = 255 - gray  # light text on a dark background
+    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+    return cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+
+
+def _rotate(image: np.ndarray, angle: float, border: int) -> np.ndarray:
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_NEAREST, borderValue=border)
+
+
+def estimate_skew(binary: np.ndarray, max_angle: float = DESKEW_MAX_ANGLE) -> float:
+    """Rotation (degrees) that makes the text lines of a binarized page horizontal.
+
+    Projection-profile search on a thumbnail: the angle whose row ink sums
+    vary the most is the one where lines and gaps line up with rows. A coarse
+    1 degree pass is refined in 0.1 degree steps.
+    """
+    ink = (binary == 0).astype(np.uint8) * 255
+    scale = DESKEW_THUMB_SIDE / float(max(ink.shape))
+    if scale < 1:
+        ink = cv2.resize(ink, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if not ink.any():
+        return 0.0
+
+    def score(angle):
+        return float(np.var(_rotate(ink, angle, 0).sum(axis=1, dtype=np.float64)))
+
+    best = max(np.arange(-max_angle, max_angle + 0.5, 1.0), key=score)
+    best = max(np.arange(best - 1, best + 1.05, 0.1), key=score)
+    return round(float(best), 1)
+
+
+def preprocess(gray: np.ndarray, scale: float = 1.0) -> Tuple[np.ndarray, float]:
+    """Downscale, binarize and deskew one grayscale frame; returns (binary, angle)"""
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    binary = binarize(gray)
+    angle = estimate_skew(binary)
+    if abs(angle) < DESKEW_MIN_ANGLE:
+        return binary, 0.0
+    return _rotate(binary, angle, 255), angle
+
+
+def tile_bounds(binary: np.ndarray, tile_rows: int = TILE_ROWS) -> List[Tuple[int, int]]:
+    """Row ranges covering the page, cut at the emptiest row near every tile_rows"""
+    height = binary.shape[0]
+    ink = (binary == 0).sum(axis=1)
+    bounds = []
+    start = 0
+    while height - start > tile_rows * 1.5:
+        low = start + tile_rows - TILE_SEARCH_ROWS
+        cut = low + int(np.argmin(ink[low:start + tile_rows + TILE_SEARCH_ROWS]))
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, height))
+    return bounds
+
+
+def _recognize(tile: np.ndarray, lang: str, timeout: float, env: Optional[Dict[str, str]] = None) -> str:
+    """Text of one tile from its own tesseract process, run with env as its environment.
+
+    The tile goes in on stdin and the text comes back on stdout; pytesseract
+    only supplies the binary's path, since it always passes the whole
+    process environment along.
+    """
+    import pytesseract
+    ok, png = cv2.imencode('.png', tile)
+    if not ok:
+        raise ValueError('Could not encode tile')
+    done = subprocess.run([pytesseract.pytesseract.tesseract_cmd, 'stdin', 'stdout', '-l', lang],
+                          input=png.tobytes(), capture_output=True, timeout=timeout or None, env=env)
+    if done.returncode:
+        raise RuntimeError(f"tesseract exited with {done.returncode}: {done.stderr.decode(errors='replace').strip()}")
+    return done.stdout.decode('utf-8', errors='replace')
+
+
+def _frames(image: Image.Image, target_dpi: int, max_frames: int):
+    """(grayscale array, remaining scale) for each frame, at most max_frames.
+
+    JPEG decoding is asked for a reduced size up front (DCT scaling), so a
+    large phone photo is never decoded at full resolution.
+    """
+    dpi = image.info.get('dpi')
+    if getattr(image, 'n_frames', 1) == 1 and image.format == 'JPEG':
+        scale = target_scale(image.size, dpi, target_dpi)
+        full_side = max(image.size)
+        image.draft('L', (int(image.width * scale) + 1, int(image.height * scale) + 1))
+        frame = ImageOps.exif_transpose(image).convert('L')
+        yield np.asarray(frame), min(1.0, scale * full_side / max(image.size))
+        return
+    for index, frame in enumerate(ImageSequence.Iterator(image)):
+        if index >= max_frames:
+            return
+        if index == 0:
+            frame = ImageOps.exif_transpose(frame)
+        gray = frame.convert('L')
+        yield np.asarray(gray), target_scale(gray.size, dpi, target_dpi)
+
+
+def iter_ocr(path: str, lang: str = 'eng', target_dpi: int = TARGET_DPI, workers: Optional[int] = None,
+             max_frames: int = 20, timeout: float = 30, cache_dir: Optional[str] = None,
+             cache_max_bytes: int = 32 * 1024 * 1024,
+             progress: Optional[Callable[[int, int], None]] = None) -> Generator[Dict, None, Dict]:
+    """OCR every frame of an image (multi-page TIFF and GIF included), a frame at a time.
+
+    Each frame is downscaled to target_dpi, binarized and deskewed with
+    OpenCV, cut into tiles at blank rows, and the non-blank tiles are run
+    through tesseract. Every tesseract call is its own process; a bounded
+    thread pool of workers (default: CPU count) keeps at most that many
+    running at once, and the next frame's tiles are queued before the
+    current one is yielded so the pool doesn't drain between frames. Frame
+    text is cached under cache_dir by a hash of the decoded pixels, so a
+    picture already read is skipped whatever its file name or (lossless)
+    container. progress(done, total) counts frames.
+
+    Yields {'frame', 'text', 'angle', 'size', 'tiles', 'cached'} per frame in
+    order and returns {'frame_count', 'truncated', 'metadata', 'error'}.
+    """
+    with Image.open(path) as image:
+        frame_count = getattr(image, 'n_frames', 1)
+        metadata = {'format': image.format, 'mode': image.mode, 'size': list(image.size),
+                    'dpi': [float(value) for value in image.info['dpi']] if image.info.get('dpi') else None}
+        info = {'frame_count': frame_count, 'truncated': frame_count > max_frames,
+                'metadata': metadata, 'error': None}
+        if tesseract_version() is None:
+            info['error'] = 'OCR not available (tesseract is not installed)'
+            return info
+
+        cache = _cache(cache_dir, cache_max_bytes) if cache_dir and cache_max_bytes > 0 else None
+        cache_kind = f'ocr-{lang}-{target_dpi}'
+        workers = max(1, workers or os.cpu_count() or 1)
+        # tesseract's own threads would oversubscribe the cores the pool already fills
+        env = {'OMP_THREAD_LIMIT': '1', **os.environ} if workers > 1 else None
+
+        total = min(frame_count, max_frames)
+        done = 0
+
+        def finish(number, digest, frame, futures):
+            nonlocal done
+            if futures is None:
+                frame = dict(frame, cached=True)
+            else:
+                texts, failed = [], False
+                for future in futures:
+                    try:
+                        texts.append(future.result().strip())
+                    except Exception as e:
+                        logger.warning(f"OCR of a tile of {os.path.basename(path)} frame {number} failed: {e}")
+                        failed = True
+                frame = dict(frame, text='\n'.join(text for text in texts if text))
+                if cache and not failed:
+                    cache.put(digest, cache_kind, frame)
+                frame['cached'] = False
+            done += 1
+            if progress:
+                progress(done, total)
+            return dict(frame, frame=number)
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for number, (gray, scale) in enumerate(_frames(image, target_dpi, max_frames), start=1):
+                digest = hashlib.sha256(f'{gray.shape}'.encode() + gray.tobytes()).hexdigest()
+                cached = cache.get(digest, cache_kind) if cache else None
+                if cached is not None:
+                    pending.append((number, digest, cached, None))
+                else:
+                    binary, angle = preprocess(gray, scale)
+                    tiles = [binary[start:stop] for start, stop in tile_bounds(binary)]
+                    futures = [pool.submit(_recognize, tile, lang, timeout, env) for tile in tiles
+                               if (tile == 0).mean() >= MIN_INK]
+                    frame = {'angle': angle, 'size': [binary.shape[1], binary.shape[0]], 'tiles': len(futures)}
+                    pending.append((number, digest, frame, futures))
+                if len(pending) > 1:
+                    yield finish(*pending.popleft())
+            while pending:
+                yield finish(*pending.popleft())
+    return info
+
+
+def ocr_image(path: str, **options) -> Dict:
+    """iter_ocr collected into one result: {'frames': [...], 'frame_count', 'truncated', 'metadata', 'error'}.
+    Takes the same keyword arguments."""
+    frames = iter_ocr(path, **options)
+    result = {'frames': []}
+    while True:
+        try:
+            result['frames'].append(next(frames))
+        except StopIteration as stop:
+            result.update(stop.value)
+            return result
@@ -0,0 +1,121 @@
+import posixpath
+import zipfile
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+RELS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Elements that carry a paragraph's text, and what each stands for (None: its own text)
+_WORD_TEXT = {W + 't': None, W + 'tab': '\t', W + 'br': '\n', W + 'cr': '\n'}
+_DRAWING_TEXT = {A + 't': None, A + 'br': '\n'}
+
+
+def _text(element, vocabulary) -> str:
+    return ''.join(vocabulary[node.tag] or node.text or '' for node in element.iter() if node.tag in vocabulary)
+
+
+def _cell_text(cell, paragraph_tag, vocabulary) -> str:
+    return '\n'.join(_text(paragraph, vocabulary) for paragraph in cell.iter(paragraph_tag)).strip()
+
+
+def iter_docx(path: str) -> Iterator[Tuple[str, Union[str, List[List[str]]]]]:
+    """Body paragraphs and tables of a .docx in document order, read as a stream.
+
+    word/document.xml is parsed with iterparse straight out of the zip and
+    every top-level element is dropped once read, so memory stays flat
+    however long the document is. Yields ('paragraph', text) for non-empty
+    paragraphs and ('table', rows of cell texts) per table; a table nested in
+    a cell adds its text to that cell.
+    """
+    with zipfile.ZipFile(path) as package, package.open('word/document.xml') as part:
+        body = None
+        tables = 0  # table nesting depth
+        paragraphs = 0  # paragraph nesting depth; text boxes put paragraphs inside paragraphs
+        rows: List[List[str]] = []
+        for event, element in ElementTree.iterparse(part, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == W + 'body':
+                    body = element
+                elif tag == W + 'tbl':
+                    tables += 1
+                elif tag == W + 'tr' and tables == 1:
+                    rows.append([])
+                elif tag == W + 'p':
+                    paragraphs += 1
+                continue
+
+            if tag == W + 'p':
+                paragraphs -= 1
+                if tables or paragraphs:
+                    continue
+                text = _text(element, _WORD_TEXT).strip()
+                if text:
+                    yield 'paragraph', text
+            elif tag == W + 'tc' and tables == 1:
+                rows[-1].append(_cell_text(element, W + 'p', _WORD_TEXT))
+                element.clear()
+                continue
+            elif tag == W + 'tbl':
+                tables -= 1
+                if tables:
+                    continue
+                if rows:
+                    yield 'table', rows
+                rows = []
+            else:
+                continue
+            if body is not None:
+                body.clear()  # every child so far has been read
+
+
+def _slide_parts(package) -> List[str]:
+    """Zip member names of the slides, in presentation order"""
+    presentation = ElementTree.fromstring(package.read('ppt/presentation.xml'))
+    relationships = ElementTree.fromstring(package.read('ppt/_rels/presentation.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in relationships.iter(RELS + 'Relationship')}
+    names = set(package.namelist())
+    parts = []
+    for slide in presentation.iter(P + 'sldId'):
+        target = targets.get(slide.get(R + 'id'))
+        if not target:
+            continue
+        name = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('ppt', target))
+        if name in names:
+            parts.append(name)
+    return parts
+
+
+def iter_pptx(path: str, progress: Optional[Callable[[int, int], None]] = None) -> Iterator[Tuple[int, List[str]]]:
+    """(slide number, text of each shape) per slide of a .pptx, in presentation order.
+
+    Only ppt/presentation.xml and its relationships are read whole; each
+    slide part is streamed with iterparse and shapes are dropped once read.
+    Text boxes, placeholders, grouped shapes and tables (one row per line,
+    cells separated by ' | ') all count as shapes. progress(done, total) is
+    called before each slide.
+    """
+    with zipfile.ZipFile(path) as package:
+        parts = _slide_parts(package)
+        for index, name in enumerate(parts):
+            if progress:
+                progress(index, len(parts))
+            texts = []
+            with package.open(name) as part:
+                for _, element in ElementTree.iterparse(part):
+                    if element.tag == P + 'sp':
+                        text = '\n'.join(_text(paragraph, _DRAWING_TEXT) for paragraph in element.iter(A + 'p'))
+                    elif element.tag == P + 'graphicFrame':
+                        text = '\n'.join(' | '.join(_cell_text(cell, A + 'p', _DRAWING_TEXT)
+                                                    for cell in row.iter(A + 'tc'))
+                                         for row in element.iter(A + 'tr'))
+                    else:
+                        continue
+                    if text.strip():
+                        texts.append(text.strip())
+                    element.clear()
+            yield index + 1, texts
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_BYTES = 1024 * 1024
+# Temporary files younger than this may still be being written by another process
+TEMP_FILE_GRACE = 3600
+
+
+def save_and_hash(stream: BinaryIO, suffix: str = '') -> Tuple[str, str, int]:
+    """Copy an upload stream to a temporary file, hashing it on the way.
+
+    Returns (path, sha256 hex digest, size in bytes); the caller owns the file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        while True:
+            chunk = stream.read(COPY_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+            temp_file.write(chunk)
+            size += len(chunk)
+    return temp_file.name, digest.hexdigest(), size
+
+
+class ParseCache:
+    """Content-addressed on-disk store of parse results.
+
+    Entries are JSON files named <sha256>-<extension>-v<parser version>.json
+    under a two-character fan-out directory. The parser version is part of
+    the name, so bumping it makes old entries unreachable; they are deleted
+    the next time the store is opened. Total size is capped at max_bytes by
+    evicting the least recently used entries (a hit refreshes the mtime).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, parser_version: str = '1'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.parser_version = str(parser_version)
+        self._lock = threading.Lock()
+        # name -> (size, last_used)
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self._bytes = 0
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def key(self, digest: str, file_extension: str) -> str:
+        return f"{digest}-{file_extension.lower()}-v{self.parser_version}"
+
+    def get(self, digest: str, file_extension: str) -> Optional[Dict[str, Any]]:
+        name = self.key(digest, file_extension)
+        path = self._path(name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self._counters['misses'] += 1
+                self._forget(name)
+            return None
+
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self._counters['hits'] += 1
+            if name in self._index:
+                self._index[name] = (self._index[name][0], now)
+        return result
+
+    def put(self, digest: str, file_extension: str, result: Dict[str, Any]):
+        """Store a parse result; results carrying an 'error' are not cached"""
+        if not result or result.get('error'):
+            return
+        name = self.key(digest, file_extension)
+        path = self._path(name)
+        data = json.dumps(result, default=str).encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not store parse result {name}: {e}")
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._forget(name)
+            self._index[name] = (len(data), time.time())
+            self._bytes += len(data)
+            self._counters['stores'] += 1
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'parser_version': self.parser_version,
+                **self._counters
+            }
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+            self._index.clear()
+            self._bytes = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name[:2], name + '.json')
+
+    def _scan(self):
+        """Index existing entries and delete those written by another parser version.
+
+        A .tmp file is another process's put() in flight and is left alone
+        unless it is old enough to be a leftover from a crash.
+        """
+        suffix = f"-v{self.parser_version}.json"
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                if filename.endswith('.tmp'):
+                    try:
+                        if os.path.getmtime(path) < time.time() - TEMP_FILE_GRACE:
+                            os.unlink(path)
+                    except OSError:
+                        pass
+                    continue
+                if not filename.endswith(suffix):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                self._index[filename[:-len('.json')]] = (stat.st_size, stat.st_mtime)
+                self._bytes += stat.st_size
+        with self._lock:
+            self._evict()
+
+    def _forget(self, name: str):
+        entry = self._index.pop(name, None)
+        if entry:
+            self._bytes -= entry[0]
+
+    def _evict(self):
+        if self._bytes <= self.max_bytes:
+            return
+        for name, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._bytes <= self.max_bytes:
+                break
+            try:
+                os.unlink(self._path(name))
+            except OSError:
+                pass
+            self._forget(name)
+            self._counters['evictions'] += 1
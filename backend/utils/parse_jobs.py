@@ -0,0 +1,362 @@
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_JOB_ID = re.compile(r'[0-9a-f]{32}')
+
+
+class ParseQueueFull(Exception):
+    """Raised by submit() when the queue is at capacity"""
+
+
+# Set in each worker process by the pool initializer
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _run_job(job_id, parse, path, file_extension, filename):
+    """Runs in a worker process; reports start and progress back to the parent"""
+    def report(done, total):
+        _progress_queue.put((job_id, 'progress', done, total))
+
+    _progress_queue.put((job_id, 'started', 0, None))
+    try:
+        return parse(path, file_extension, filename, progress=report)
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class ParseJob:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, job_id, filename, file_type, file_id=None):
+        self.id = job_id
+        self.filename = filename
+        self.file_type = file_type
+        self.file_id = file_id
+        self.status = self.QUEUED
+        self.progress_done = 0
+        self.progress_total = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Bumped on every change so watchers can wait for "something new"
+        self.revision = 0
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'file_id': self.file_id,
+            'filename': self.filename,
+            'file_type': self.file_type,
+            'progress': {'done': self.progress_done, 'total': self.progress_total},
+            'created_at': datetime.fromtimestamp(self.created_at).isoformat(),
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            'finished_at': datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None
+        }
+        if self.error:
+            data['error'] = self.error
+        if include_result and self.finished:
+            data['content'] = self.result
+        return data
+
+    def to_state(self):
+        """Everything needed to rebuild the job in another process"""
+        return {key: getattr(self, key) for key in (
+            'id', 'filename', 'file_type', 'file_id', 'status', 'progress_done', 'progress_total',
+            'result', 'error', 'created_at', 'started_at', 'finished_at', 'revision')}
+
+    @classmethod
+    def from_state(cls, state):
+        job = cls(state['id'], state['filename'], state['file_type'], state['file_id'])
+        for key, value in state.items():
+            setattr(job, key, value)
+        return job
+
+
+class ParseJobQueue:
+    """Bounded queue of document-parse jobs run on a process pool.
+
+    At most max_workers parses run at once and at most max_pending jobs may
+    be unfinished; submit() raises ParseQueueFull beyond that instead of
+    letting work pile up. Workers report page-level progress over a
+    multiprocessing queue drained by a listener thread. Finished jobs are
+    kept for result_ttl seconds so clients can collect them.
+
+    With state_dir set, every change to a job is also written to
+    <state_dir>/<job_id>.json, so another server process sharing the
+    directory (e.g. a second gunicorn worker) can answer for jobs it didn't
+    start: get() reads the file, and wait_for_change() polls it every
+    poll_interval seconds. Limits and counters stay per process.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, result_ttl: float = 900,
+                 state_dir: Optional[str] = None, poll_interval: float = 0.25):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.result_ttl = result_ttl
+        self.state_dir = state_dir
+        self.poll_interval = poll_interval
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self._jobs: Dict[str, ParseJob] = {}
+        self._cond = threading.Condition()
+        self._ctx = multiprocessing.get_context()
+        self._progress = None
+        self._pool = None
+        self._listener = None
+        self._next_disk_sweep = 0.0
+        self._counters = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+
+    def submit(self, parse: Callable, path: str, file_extension: str, filename: str,
+               file_id: Optional[str] = None, on_success: Optional[Callable[[Dict], None]] = None) -> ParseJob:
+        """Queue parse(path, file_extension, filename, progress=...) in a worker process.
+
+        parse must be a module-level function so it can be sent to the worker;
+        the worker deletes path when it is done with it. on_success(result) is
+        called in this process when the parse finishes without an error; if it
+        returns a dict, that becomes the job's result.
+        """
+        with self._cond:
+            self._sweep()
+            if self._pending() >= self.max_pending:
+                self._counters['rejected'] += 1
+                raise ParseQueueFull(f"Parse queue is full ({self.max_pending} jobs pending)")
+            job = ParseJob(uuid.uuid4().hex, filename, file_extension, file_id)
+            self._jobs[job.id] = job
+            self._save(job)
+            self._counters['submitted'] += 1
+            pool = self._ensure_pool()
+
+        try:
+            future = pool.submit(_run_job, job.id, parse, path, file_extension, filename)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._finish(job.id, error=f"Parser pool unavailable: {e}")
+            self._reset_pool(pool)
+            raise
+        future.add_done_callback(lambda done: self._on_done(job.id, pool, done, on_success))
+        return job
+
+    def add_finished(self, filename: str, file_extension: str, result: Dict,
+                     file_id: Optional[str] = None) -> ParseJob:
+        """Record a job whose result is already known (e.g. from a cache), bypassing the pool"""
+        job = ParseJob(uuid.uuid4().hex, filename, file_extension, file_id)
+        with self._cond:
+            self._sweep()
+            self._jobs[job.id] = job
+        self._finish(job.id, result=result)
+        return job
+
+    def get(self, job_id: str) -> Optional[ParseJob]:
+        """The job, or a snapshot of it read from state_dir when another process runs it"""
+        with self._cond:
+            self._sweep()
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    def wait_for_change(self, job_id: str, revision: int, timeout: float) -> Optional[ParseJob]:
+        """Block until the job's revision moves past revision (or timeout); returns the job"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while job_id in self._jobs:
+                job = self._jobs[job_id]
+                if job.revision != revision or job.finished:
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job
+                self._cond.wait(remaining)
+        while True:
+            job = self._load(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job.revision != revision or job.finished or remaining <= 0:
+                return job
+            time.sleep(min(self.poll_interval, remaining))
+
+    def stats(self):
+        with self._cond:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'queued': statuses.count(ParseJob.QUEUED),
+                'running': statuses.count(ParseJob.RUNNING),
+                'retained': len(statuses),
+                **self._counters
+            }
+
+    def shutdown(self):
+        with self._cond:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _pending(self):
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _sweep(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._discard(job_id)
+        if self.state_dir and time.monotonic() >= self._next_disk_sweep:
+            # Files left by other processes; a job's file is rewritten on every change,
+            # so one untouched for result_ttl is expired or belonged to a process that died
+            self._next_disk_sweep = time.monotonic() + min(self.result_ttl, 60)
+            try:
+                names = os.listdir(self.state_dir)
+            except OSError:
+                names = []
+            for name in names:
+                job_id, extension = os.path.splitext(name)
+                if extension != '.json' or job_id in self._jobs:
+                    continue
+                try:
+                    if os.path.getmtime(os.path.join(self.state_dir, name)) < cutoff:
+                        self._discard(job_id)
+                except OSError:
+                    pass
+
+    def _state_path(self, job_id):
+        return os.path.join(self.state_dir, f'{job_id}.json')
+
+    def _save(self, job):
+        if not self.state_dir:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.state_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(job.to_state(), f, default=str)
+            os.replace(temp_path, self._state_path(job.id))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not save state of parse job {job.id}: {e}")
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+    def _load(self, job_id):
+        if not self.state_dir or not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(self._state_path(job_id), encoding='utf-8') as f:
+                job = ParseJob.from_state(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+        if job.finished and job.finished_at < time.time() - self.result_ttl:
+            self._discard(job_id)
+            return None
+        return job
+
+    def _discard(self, job_id):
+        if self.state_dir:
+            try:
+                os.unlink(self._state_path(job_id))
+            except OSError:
+                pass
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            if self._progress is None:
+                self._progress = self._ctx.Queue()
+                self._listener = threading.Thread(target=self._listen, name='parse-progress', daemon=True)
+                self._listener.start()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=self._ctx,
+                initializer=_init_worker, initargs=(self._progress,)
+            )
+        return self._pool
+
+    def _reset_pool(self, broken):
+        """Drop a pool whose worker died so the next submit starts a fresh one"""
+        with self._cond:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _listen(self):
+        while True:
+            try:
+                job_id, kind, done, total = self._progress.get()
+            except (EOFError, OSError):
+                return
+            with self._cond:
+                job = self._jobs.get(job_id)
+                if job is None or job.finished:
+                    continue
+                if kind == 'started':
+                    job.status = ParseJob.RUNNING
+                    job.started_at = time.time()
+                else:
+                    job.progress_done, job.progress_total = done, total
+                job.revision += 1
+                self._save(job)
+                self._cond.notify_all()
+
+    def _on_done(self, job_id, pool, future, on_success=None):
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:
+            logger.error(f"Parser worker died on job {job_id}: {e}")
+            self._finish(job_id, error='Parser worker crashed while processing the file')
+            self._reset_pool(pool)
+            return
+        except Exception as e:
+            logger.error(f"Parse job {job_id} failed: {e}")
+            self._finish(job_id, error=str(e))
+            return
+        error = (result or {}).get('error')
+        if on_success and not error:
+            try:
+                replacement = on_success(result)
+                if isinstance(replacement, dict):
+                    result = replacement
+            except Exception as e:
+                logger.warning(f"Parse job {job_id} success hook failed: {e}")
+        self._finish(job_id, result=result, error=error)
+
+    def _finish(self, job_id, result=None, error=None):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.result = result
+            job.error = error
+            job.status = ParseJob.FAILED if error else ParseJob.DONE
+            if job.status == ParseJob.DONE and job.progress_total:
+                job.progress_done = job.progress_total
+            job.finished_at = time.time()
+            job.revision += 1
+            self._save(job)
+            self._counters['failed' if error else 'completed'] += 1
+            self._cond.notify_all()
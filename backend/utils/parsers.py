@@ -0,0 +1,374 @@
+import logging
+import os
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.file_types import sniff_file
+
+logger = logging.getLogger(__name__)
+
+# Text files are read in blocks of about this many characters, broken at line ends
+TEXT_BLOCK_CHARS = 4000
+
+
+class Chunk(NamedTuple):
+    """A piece of a document's text and where it came from"""
+    text: str
+    unit: str  # 'text', 'page', 'paragraph', 'table', 'sheet', 'slide' or 'frame'
+    number: int  # 1-based position of that unit in the document
+    label: Optional[str] = None  # sheet name
+    parts: Tuple[str, ...] = ()  # shape texts of a slide
+
+
+class DocumentParser:
+    """One file format.
+
+    chunks(path, progress=None, **options) is a generator of Chunk in
+    document order; its return value is a dict of whatever else the format
+    reports. Optional libraries are imported inside it, so each loads on
+    the first file that needs it. result() shapes the collected chunks into
+    the parse result stored for an upload.
+    """
+
+    type = ''
+    label = ''
+    extensions: Tuple[str, ...] = ()
+    mime_types: Tuple[str, ...] = ()
+    requires = ''
+    # False for formats with no byte signature, whose extension is trusted over sniffing
+    signature = True
+
+    def chunks(self, path: str, progress: Optional[Callable[[int, int], None]] = None, **options):
+        raise NotImplementedError
+
+    def result(self, chunks: List[Chunk], info: Dict[str, Any], filename: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+_BY_EXTENSION: Dict[str, DocumentParser] = {}
+_BY_MIME_TYPE: Dict[str, DocumentParser] = {}
+
+
+def register(cls):
+    """Class decorator adding a DocumentParser to the registry"""
+    parser = cls()
+    for extension in cls.extensions:
+        _BY_EXTENSION[extension] = parser
+    for mime_type in cls.mime_types:
+        _BY_MIME_TYPE[mime_type] = parser
+    return cls
+
+
+def parser_for(file_extension: str, mime_type: Optional[str] = None) -> Optional[DocumentParser]:
+    """Parser for a file; the sniffed MIME type wins over the extension when it names one.
+
+    Plain text has no signature (a .txt file starting with 'BM' sniffs as a
+    bitmap), so a text extension is taken at its word.
+    """
+    by_extension = _BY_EXTENSION.get(file_extension.lower())
+    if by_extension is not None and not by_extension.signature:
+        return by_extension
+    return _BY_MIME_TYPE.get(mime_type) or by_extension
+
+
+def iter_chunks(path: str, file_extension: str, progress: Optional[Callable[[int, int], None]] = None,
+                max_chars: Optional[int] = None, options: Optional[Dict[str, Dict]] = None,
+                parser: Optional[DocumentParser] = None) -> Iterator[Chunk]:
+    """Stream a document's chunks, stopping after max_chars characters.
+
+    options maps a parser type ('pdf', 'excel', 'image', ...) to keyword
+    arguments for it. parser skips the lookup when the caller already has
+    it. Raises LookupError for formats without a parser. When the stream
+    runs to the end, its return value is the parser's info dict.
+    """
+    parser = parser or parser_for(file_extension, sniff_file(path))
+    if parser is None:
+        raise LookupError(f'No parser for {file_extension} files')
+    stream = parser.chunks(path, progress=progress, **(options or {}).get(parser.type, {}))
+    remaining = max_chars
+    try:
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as stop:
+                return stop.value
+            if remaining is not None:
+                if len(chunk.text) >= remaining:
+                    yield chunk._replace(text=chunk.text[:remaining])
+                    return None
+                remaining -= len(chunk.text)
+            yield chunk
+    finally:
+        stream.close()
+
+
+def parse_file(path: str, file_extension: str, filename: str,
+               progress: Optional[Callable[[int, int], None]] = None,
+               options: Optional[Dict[str, Dict]] = None) -> Dict[str, Any]:
+    """Parse an uploaded file into the result kept for it.
+
+    progress, if given, is called as progress(done, total) as pages/slides/frames are processed.
+    options maps a parser type to its settings: 'pdf' for extract_pdf_pages (max_pages, workers,
+    page_timeout), 'image' for iter_ocr, 'excel' ({'max_rows', 'tables_path'}) to keep
+    spreadsheet columns for local queries.
+    """
+    parser = parser_for(file_extension, sniff_file(path))
+    if parser is None:
+        return {
+            'type': file_extension,
+            'summary': f'File "{filename}" uploaded successfully'
+        }
+    try:
+        stream = iter_chunks(path, file_extension, progress=progress, options=options, parser=parser)
+        chunks = []
+        while True:
+            try:
+                chunks.append(next(stream))
+            except StopIteration as stop:
+                return parser.result(chunks, stop.value or {}, filename)
+    except ImportError:
+        return {
+            'type': parser.type,
+            'summary': f'{parser.label} "{filename}" uploaded (install {parser.requires})',
+            'requires': parser.requires
+        }
+    except Exception as e:
+        logger.error(f"File parsing error: {e}")
+        return {
+            'error': f'Error processing {filename}: {str(e)}',
+            'summary': f'File processing failed'
+        }
+
+
+@register
+class TextParser(DocumentParser):
+    type = 'text'
+    label = 'Text file'
+    extensions = ('txt',)
+    mime_types = ('text/plain',)
+    signature = False
+
+    def chunks(self, path, progress=None):
+        with open(path, 'rb') as f:
+            encoding = 'utf-16' if f.read(2) in (b'\xff\xfe', b'\xfe\xff') else 'utf-8'
+        number = 0
+        block = []
+        size = 0
+        with open(path, 'r', encoding=encoding, errors='ignore') as f:
+            for line in f:
+                line = line.replace('\x00', '')
+                block.append(line)
+                size += len(line)
+                if size >= TEXT_BLOCK_CHARS:
+                    number += 1
+                    yield Chunk(''.join(block), 'text', number)
+                    block, size = [], 0
+        if block:
+            yield Chunk(''.join(block), 'text', number + 1)
+        return {}
+
+    def result(self, chunks, info, filename):
+        content = ''.join(chunk.text for chunk in chunks).strip()
+        return {
+            'type': 'text',
+            'text_content': content,
+            'word_count': len(content.split()),
+            'summary': f'Text file with {len(content.split())} words processed successfully'
+        }
+
+
+@register
+class PdfParser(DocumentParser):
+    type = 'pdf'
+    label = 'PDF'
+    extensions = ('pdf',)
+    mime_types = ('application/pdf',)
+    requires = 'pypdf'
+
+    def chunks(self, path, progress=None, **options):
+        from utils.pdf_extract import iter_pdf_pages
+        pages = iter_pdf_pages(path, progress=progress, **options)
+        timed_out = []
+        number = 0
+        while True:
+            try:
+                text = next(pages)
+            except StopIteration as stop:
+                info = stop.value
+                break
+            number += 1
+            if text is None:
+                timed_out.append(number)
+            yield Chunk(text or '', 'page', number)
+        if timed_out:
+            logger.warning(f"PDF {os.path.basename(path)}: {len(timed_out)} page(s) timed out")
+        return {**info, 'timed_out': timed_out}
+
+    def result(self, chunks, info, filename):
+        pages = [chunk.text for chunk in chunks]
+        page_count = info['page_count']
+        summary = f'PDF with {page_count} pages processed successfully'
+        if info['truncated']:
+            summary += f' (first {len(pages)} pages extracted)'
+        return {
+            'type': 'pdf',
+            'pages': pages,
+            'page_count': page_count,
+            'pages_extracted': len(pages),
+            'truncated': info['truncated'],
+            'timed_out_pages': info['timed_out'],
+            'word_count': sum(len(page.split()) for page in pages),
+            'metadata': info['metadata'],
+            'summary': summary
+        }
+
+
+@register
+class DocxParser(DocumentParser):
+    type = 'docx'
+    label = 'Word document'
+    extensions = ('docx',)
+    mime_types = ('application/vnd.openxmlformats-officedocument.wordprocessingml.document',)
+
+    def chunks(self, path, progress=None):
+        from utils.ooxml import iter_docx
+        counts = {'paragraph': 0, 'table': 0}
+        for unit, content in iter_docx(path):
+            counts[unit] += 1
+            if unit == 'table':
+                content = '\n'.join(' | '.join(row) for row in content)
+            yield Chunk(content, unit, counts[unit])
+        return {}
+
+    def result(self, chunks, info, filename):
+        full_text = '\n\n'.join(chunk.text for chunk in chunks)
+        paragraph_count = sum(chunk.unit == 'paragraph' for chunk in chunks)
+        table_count = sum(chunk.unit == 'table' for chunk in chunks)
+        summary = f'Word document with {paragraph_count} paragraphs processed successfully'
+        if table_count:
+            summary = f'Word document with {paragraph_count} paragraphs and {table_count} tables processed successfully'
+        return {
+            'type': 'docx',
+            'text_content': full_text,
+            'paragraph_count': paragraph_count,
+            'table_count': table_count,
+            'word_count': len(full_text.split()),
+            'summary': summary
+        }
+
+
+@register
+class ExcelParser(DocumentParser):
+    type = 'excel'
+    label = 'Excel'
+    extensions = ('xlsx', 'xls')
+    mime_types = ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',)
+    requires = 'openpyxl'
+
+    def chunks(self, path, progress=None, max_rows=0, tables_path=None):
+        from utils.excel_ingest import iter_workbook, describe_workbook
+        file_extension = 'xls' if sniff_file(path) == 'application/x-ole-storage' else 'xlsx'
+        sheets = []
+        tables = {}
+        for number, sheet in enumerate(iter_workbook(path, file_extension, table_rows=max_rows,
+                                                     progress=progress), start=1):
+            if 'table' in sheet:
+                tables[sheet['name']] = sheet.pop('table')
+            sheets.append(sheet)
+            yield Chunk(describe_workbook([sheet]), 'sheet', number, label=sheet['name'])
+
+        table_key = None
+        if tables and tables_path:
+            from utils.table_query import save_tables
+            save_tables(tables_path, tables)
+            table_key = os.path.splitext(os.path.basename(tables_path))[0]
+        return {'sheets': sheets, 'total_rows': sum(sheet['rows'] for sheet in sheets),
+                'table_key': table_key, 'table_sheets': list(tables)}
+
+    def result(self, chunks, info, filename):
+        sheets = info['sheets']
+        first = sheets[0] if sheets else {'rows': 0, 'columns': [], 'sample': []}
+        columns = [column['name'] for column in first['columns']]
+        return {
+            'type': 'excel',
+            'sheets': sheets,
+            'sheet_names': [sheet['name'] for sheet in sheets],
+            'total_sheets': len(sheets),
+            'total_rows': info['total_rows'],
+            'data_preview': [dict(zip(columns, row)) for row in first['sample'][:5]],
+            'shape': [first['rows'], len(columns)],
+            'columns': columns,
+            'text_content': '\n\n'.join(chunk.text for chunk in chunks),
+            'table_key': info['table_key'],
+            'table_sheets': info['table_sheets'],
+            'summary': f'Excel file with {len(sheets)} sheets and {info["total_rows"]} rows processed'
+        }
+
+
+@register
+class PptxParser(DocumentParser):
+    type = 'pptx'
+    label = 'PowerPoint'
+    extensions = ('pptx',)
+    mime_types = ('application/vnd.openxmlformats-officedocument.presentationml.presentation',)
+
+    def chunks(self, path, progress=None):
+        from utils.ooxml import iter_pptx
+        slide_count = 0
+        for number, slide_text in iter_pptx(path, progress=progress):
+            slide_count = number
+            if slide_text:
+                yield Chunk('\n'.join(slide_text), 'slide', number, parts=tuple(slide_text))
+        return {'slide_count': slide_count}
+
+    def result(self, chunks, info, filename):
+        slides = [{'slide_number': chunk.number, 'content': list(chunk.parts), 'text': chunk.text}
+                  for chunk in chunks]
+        return {
+            'type': 'pptx',
+            'text_content': '\n\n'.join(slide['text'] for slide in slides),
+            'slides': slides,
+            'total_slides': len(slides),
+            'summary': f'PowerPoint with {len(slides)} slides processed successfully'
+        }
+
+
+@register
+class ImageParser(DocumentParser):
+    type = 'image'
+    label = 'Image'
+    extensions = ('jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'webp')
+    mime_types = ('image/jpeg', 'image/png', 'image/gif', 'image/bmp', 'image/tiff', 'image/webp')
+    requires = 'Pillow, opencv-python'
+
+    def chunks(self, path, progress=None, **options):
+        from utils.ocr import iter_ocr
+        stream = iter_ocr(path, progress=progress, **options)
+        frames = []
+        while True:
+            try:
+                frame = next(stream)
+            except StopIteration as stop:
+                return {**stop.value, 'frames': frames}
+            frames.append({key: value for key, value in frame.items() if key != 'text'})
+            yield Chunk(frame['text'], 'frame', frame['frame'])
+
+    def result(self, chunks, info, filename):
+        texts = [chunk.text for chunk in chunks]
+        extracted_text = '\n\n'.join(text for text in texts if text)
+        width, height = info['metadata']['size']
+        content = {
+            'type': 'image',
+            'metadata': info['metadata'],
+            'extracted_text': extracted_text,
+            'has_text': bool(extracted_text),
+            'frame_count': info['frame_count'],
+            'frames': info['frames'],
+            'truncated': info['truncated'],
+            'summary': f'Image "{filename}" ({width}x{height}) processed successfully'
+        }
+        if info['frame_count'] > 1:
+            content['pages'] = texts  # one page per frame
+            content['summary'] = f'Image "{filename}" with {info["frame_count"]} frames processed successfully'
+        if info['error']:
+            content['ocr_error'] = info['error']
+        return content
@@ -0,0 +1,154 @@
+import logging
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Generator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Below this many pages the pool start-up costs more than it saves
+PARALLEL_MIN_PAGES = 16
+# Slices per worker; more, smaller slices even out pages of very different weight
+SLICES_PER_WORKER = 4
+
+
+class PageTimeout(Exception):
+    """A single page took longer than the per-page limit"""
+
+
+# Set in each worker process by the pool initializer
+_reader = None
+
+
+def _open_reader(path):
+    from pypdf import PdfReader
+    return PdfReader(path)
+
+
+def _init_worker(path):
+    global _reader
+    _reader = _open_reader(path)
+
+
+def _on_alarm(signum, frame):
+    raise PageTimeout()
+
+
+def _extract_range(reader, start, stop, page_timeout):
+    """Text of pages [start, stop); a page over page_timeout seconds comes back as None.
+
+    The timeout uses SIGALRM, so it only applies on platforms that have it and
+    when called on the main thread (always true inside a pool worker).
+    """
+    use_alarm = (page_timeout and hasattr(signal, 'setitimer') and
+                 threading.current_thread() is threading.main_thread())
+    previous = signal.signal(signal.SIGALRM, _on_alarm) if use_alarm else None
+    texts = []
+    try:
+        for index in range(start, stop):
+            try:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                texts.append(reader.pages[index].extract_text() or '')
+            except PageTimeout:
+                texts.append(None)
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous)
+    return texts
+
+
+def _extract_slice(start, stop, page_timeout):
+    """Runs in a worker process against the reader opened by _init_worker"""
+    return start, _extract_range(_reader, start, stop, page_timeout)
+
+
+def _slices(count, workers):
+    size = max(1, -(-count // (workers * SLICES_PER_WORKER)))
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def iter_pdf_pages(path: str, max_pages: Optional[int] = None, workers: Optional[int] = None,
+                   page_timeout: Optional[float] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Generator[Optional[str], None, Dict]:
+    """Yield the text of each page of a PDF in page order, spreading the pages over processes.
+
+    The page range is cut into contiguous slices; each worker opens the file
+    once with pypdf and extracts the slices it is handed. Slices are yielded
+    as soon as they and every slice before them are done, so only slices
+    finished out of order are held. Only the first max_pages pages are read.
+    A page that takes longer than page_timeout seconds comes back as None.
+    workers defaults to the CPU count; short documents are read in-process.
+    progress(done, total) is called per slice.
+
+    The generator's return value is {'page_count', 'truncated', 'metadata'}.
+    """
+    reader = _open_reader(path)
+    page_count = len(reader.pages)
+    count = min(page_count, max_pages) if max_pages else page_count
+    workers = max(1, min(workers or os.cpu_count() or 1, count or 1))
+    metadata = reader.metadata
+    info = {
+        'page_count': page_count,
+        'truncated': count < page_count,
+        'metadata': {
+            'title': metadata.title if metadata else None,
+            'author': metadata.author if metadata else None
+        }
+    }
+
+    done = 0
+    if workers == 1 or count < PARALLEL_MIN_PAGES:
+        for start, stop in _slices(count, 1):
+            texts = _extract_range(reader, start, stop, page_timeout)
+            done += len(texts)
+            if progress:
+                progress(done, count)
+            yield from texts
+        return info
+
+    del reader  # each worker opens its own
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+        futures = [pool.submit(_extract_slice, start, stop, page_timeout)
+                   for start, stop in _slices(count, workers)]
+        try:
+            for future in futures:
+                _, texts = future.result()
+                done += len(texts)
+                if progress:
+                    progress(done, count)
+                yield from texts
+        finally:
+            for future in futures:
+                future.cancel()
+    return info
+
+
+def extract_pdf_pages(path: str, max_pages: Optional[int] = None, workers: Optional[int] = None,
+                      page_timeout: Optional[float] = None,
+                      progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """Extract the text of every page of a PDF at once; see iter_pdf_pages.
+
+    A page that timed out is left empty and listed in 'timed_out'.
+
+    Returns {'pages': [text per page], 'page_count', 'truncated', 'timed_out',
+    'metadata'}.
+    """
+    pages = iter_pdf_pages(path, max_pages=max_pages, workers=workers, page_timeout=page_timeout,
+                           progress=progress)
+    texts = []
+    while True:
+        try:
+            texts.append(next(pages))
+        except StopIteration as stop:
+            info = stop.value
+            break
+
+    timed_out = [index + 1 for index, text in enumerate(texts) if text is None]
+    if timed_out:
+        logger.warning(f"PDF {os.path.basename(path)}: {len(timed_out)} page(s) timed out")
+    return {'pages': [text or '' for text in texts], 'timed_out': timed_out, **info}
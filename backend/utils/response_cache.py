@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?.!]+$')
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form used for cache keys: lowercase, single spaces, no trailing punctuation"""
+    query = _WHITESPACE.sub(' ', (query or '').lower()).strip()
+    return _TRAILING_PUNCTUATION.sub('', query)
+
+
+def make_cache_key(query: str, language: str, subject_area: str, formats_version: str,
+                   prompt_mode: str = '', model: str = '') -> str:
+    """Key of an answer; model names the backend and model that wrote it"""
+    raw = '\x1f'.join([normalize_query(query), language or '', subject_area or '', formats_version or '',
+                       prompt_mode or '', model or ''])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU response cache with TTL and an optional SQLite tier.
+
+    The in-memory tier is bounded by entry count. When ``path`` is given,
+    entries are also written to a SQLite file so they survive restarts;
+    disk hits are promoted back into memory.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 86400,
+                 path: Optional[str] = None, disk_max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.disk_max_entries = disk_max_entries
+        self.logger = logging.getLogger(__name__)
+
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._db = None
+        self._disk_writes = 0
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS response_cache ('
+                    'key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)'
+                )
+                self._db.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_created ON response_cache (created)')
+                self._db.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Response cache disk tier disabled: {e}")
+                self._db = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            now = time.time()
+            item = self._memory.get(key)
+            if item is not None:
+                created, value = item
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._memory[key]
+
+            value = self._disk_get(key, now)
+            if value is not None:
+                self._hits += 1
+                self._disk_hits += 1
+                return value
+
+            self._misses += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            created = time.time()
+            self._memory_put(key, created, value)
+            self._disk_put(key, created, value)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM response_cache')
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'disk_enabled': self._db is not None
+            }
+
+    def _expired(self, created: float, now: float) -> bool:
+        return bool(self.ttl) and now - created > self.ttl
+
+    def _memory_put(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key, now):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                'SELECT value, created FROM response_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = json.loads(row[0]), row[1]
+            if self._expired(created, now):
+                self._db.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                self._db.commit()
+                return None
+            self._memory_put(key, created, value)
+            return value
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.error(f"Response cache disk read failed: {e}")
+            return None
+
+    def _disk_put(self, key, created, value):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                'INSERT OR REPLACE INTO response_cache (key, value, created) VALUES (?, ?, ?)',
+                (key, json.dumps(value), created)
+            )
+            self._disk_writes += 1
+            # Prune expired and overflow rows every so often rather than on every write
+            if self._disk_writes % 100 == 0:
+                if self.ttl:
+                    self._db.execute('DELETE FROM response_cache WHERE created < ?', (created - self.ttl,))
+                self._db.execute(
+                    'DELETE FROM response_cache WHERE key IN ('
+                    'SELECT key FROM response_cache ORDER BY created DESC LIMIT -1 OFFSET ?)',
+                    (self.disk_max_entries,)
+                )
+            self._db.commit()
+        except (sqlite3.Error, TypeError) as e:
+            self.logger.error(f"Response cache disk write failed: {e}")
@@ -0,0 +1,89 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a waiter when the shared call does not finish in time"""
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one upstream call.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block on its result instead of starting their own call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+        self._timeouts = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run fn once per in-flight key; returns (result, shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._leaders += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self._coalesced += 1
+                leader = False
+
+        if not leader:
+            return self._wait(key, call, timeout), True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result, False
+
+    def _wait(self, key: str, call: _Call, timeout: Optional[float]):
+        try:
+            finished = call.event.wait(timeout)
+        finally:
+            with self._lock:
+                call.waiters -= 1
+        if not finished:
+            with self._lock:
+                self._timeouts += 1
+            raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for in-flight call {key[:12]}")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def waiters(self, key: str) -> int:
+        """Number of callers currently waiting on the in-flight call for key"""
+        with self._lock:
+            call = self._calls.get(key)
+            return call.waiters if call else 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'waiting': sum(call.waiters for call in self._calls.values()),
+                'leaders': self._leaders,
+                'coalesced': self._coalesced,
+                'timeouts': self._timeouts
+            }
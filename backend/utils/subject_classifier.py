@@ -1,82 +1,179 @@
+import json
 import re
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Union
 
-def classify_subject(query):
-    """Classify the subject area based on query content"""
-    
-    query_lower = query.lower()
-    
-    # Programming keywords
-    programming_keywords = [
+# Built-in keywords per subject; every keyword has weight 1 unless a keyword file overrides it.
+# Subject order matters: it breaks ties between equal scores.
+SUBJECT_KEYWORDS = {
+    'programming': [
         'code', 'python', 'java', 'javascript', 'html', 'css', 'react', 'angular',
         'vue', 'node', 'api', 'database', 'sql', 'algorithm', 'data structure',
         'function', 'class', 'object', 'variable', 'loop', 'array', 'string',
         'programming', 'software', 'development', 'debugging', 'error', 'syntax',
         'framework', 'library', 'package', 'import', 'export', 'git', 'github'
-    ]
-    
-    # Mathematics keywords
-    math_keywords = [
+    ],
+    'mathematics': [
         'equation', 'calculate', 'solve', 'mathematics', 'algebra', 'calculus',
         'geometry', 'trigonometry', 'statistics', 'probability', 'derivative',
         'integral', 'matrix', 'vector', 'graph', 'function', 'formula',
         'theorem', 'proof', 'number', 'prime', 'factorial', 'logarithm',
         'exponential', 'polynomial', 'quadratic', 'linear', 'differential'
-    ]
-    
-    # Science keywords
-    science_keywords = [
+    ],
+    'science': [
         'chemistry', 'physics', 'biology', 'experiment', 'theory', 'molecular',
         'atom', 'electron', 'proton', 'neutron', 'chemical', 'reaction',
         'element', 'compound', 'mixture', 'solution', 'acid', 'base',
         'cell', 'dna', 'rna', 'protein', 'enzyme', 'organism', 'ecosystem',
         'evolution', 'genetics', 'photosynthesis', 'respiration', 'force',
         'energy', 'motion', 'velocity', 'acceleration', 'gravity', 'wave'
-    ]
-    
-    # Literature keywords
-    literature_keywords = [
+    ],
+    'literature': [
         'literature', 'poem', 'poetry', 'novel', 'story', 'character',
         'plot', 'theme', 'metaphor', 'simile', 'symbolism', 'irony',
         'author', 'writer', 'book', 'essay', 'analysis', 'critique',
         'narrative', 'dialogue', 'setting', 'conflict', 'climax',
         'shakespeare', 'dickens', 'prose', 'verse', 'stanza', 'rhyme'
-    ]
-    
-    # History keywords
-    history_keywords = [
+    ],
+    'history': [
         'history', 'historical', 'ancient', 'medieval', 'modern', 'war',
         'battle', 'empire', 'kingdom', 'civilization', 'revolution',
         'independence', 'freedom', 'colonial', 'mughal', 'british',
         'gandhi', 'nehru', 'partition', 'constitution', 'democracy'
     ]
-    
-    # Count matches for each subject
-    programming_score = sum(1 for keyword in programming_keywords if keyword in query_lower)
-    math_score = sum(1 for keyword in math_keywords if keyword in query_lower)
-    science_score = sum(1 for keyword in science_keywords if keyword in query_lower)
-    literature_score = sum(1 for keyword in literature_keywords if keyword in query_lower)
-    history_score = sum(1 for keyword in history_keywords if keyword in query_lower)
-    
-    # Determine the subject with highest score
-    scores = {
-        'programming': programming_score,
-        'mathematics': math_score,
-        'science': science_score,
-        'literature': literature_score,
-        'history': history_score
-    }
-    
-    max_score = max(scores.values())
-    
-    if max_score == 0:
-        return 'general'
-    
-    # Return the subject with the highest score
-    for subject, score in scores.items():
-        if score == max_score:
-            return subject
-    
-    return 'general'
+}
+
+KeywordSpec = Mapping[str, Union[Iterable[str], Mapping[str, float]]]
+
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def _surface_forms(keyword: str):
+    """A keyword and the plural forms that should match it"""
+    return (keyword, keyword + 's', keyword + 'es')
+
+
+class SubjectClassifier:
+    """Keyword scorer compiled once into word-level lookup tables.
+
+    The query is tokenized in one regex pass and its distinct tokens are
+    intersected with a precomputed table of keyword surface forms (plurals
+    included), so cost is linear in the query and independent of the number
+    of keywords. Matching is on whole words: 'base' no longer matches inside
+    'database'. Multi-word keywords are checked only where their first word
+    occurs. Each distinct keyword adds its weight to every subject listing it.
+    """
+
+    def __init__(self, keywords: KeywordSpec = SUBJECT_KEYWORDS):
+        self.subjects = []
+        self.weights: Dict[str, Dict[str, float]] = {}
+        for subject, entries in keywords.items():
+            self.add_keywords(subject, entries, compile_tables=False)
+        self._compile()
+
+    def add_keywords(self, subject: str, entries, compile_tables: bool = True):
+        """Add or reweight keywords for a subject (list => weight 1, mapping => explicit weights)"""
+        if subject not in self.subjects:
+            self.subjects.append(subject)
+        if not isinstance(entries, Mapping):
+            entries = {keyword: 1.0 for keyword in entries}
+        for keyword, weight in entries.items():
+            keyword = ' '.join(_WORD.findall(keyword.lower()))
+            if keyword:
+                self.weights.setdefault(keyword, {})[subject] = float(weight)
+        if compile_tables:
+            self._compile()
+
+    def _compile(self):
+        self._words: Dict[str, str] = {}
+        self._phrases: Dict[str, list] = {}
+        for keyword in self.weights:
+            words = keyword.split(' ')
+            if len(words) == 1:
+                for form in _surface_forms(keyword):
+                    self._words.setdefault(form, keyword)
+            else:
+                # Phrases are indexed by their first word and verified in place
+                for form in _surface_forms(words[0]):
+                    self._phrases.setdefault(form, []).append((keyword, words[1:]))
+
+    def match(self, query: str) -> Set[str]:
+        """Distinct keywords present in the query"""
+        return self.match_tokens(tokenize(query))
+
+    def match_tokens(self, tokens: List[str]) -> Set[str]:
+        """Distinct keywords present in an already tokenized, lowercased query"""
+        distinct = set(tokens)
+        matched = {self._words[token] for token in distinct.intersection(self._words)}
+
+        for first in distinct.intersection(self._phrases):
+            for keyword, rest in self._phrases[first]:
+                if keyword in matched:
+                    continue
+                for index, token in enumerate(tokens):
+                    tail = tokens[index + 1:index + 1 + len(rest)]
+                    if token == first and len(tail) == len(rest) and all(
+                        token_form in _surface_forms(word) for word, token_form in zip(rest, tail)
+                    ):
+                        matched.add(keyword)
+                        break
+        return matched
+
+    def score(self, query: str) -> Dict[str, float]:
+        """Score every subject in one pass over the query"""
+        scores = dict.fromkeys(self.subjects, 0.0)
+        for keyword in self.match(query):
+            for subject, weight in self.weights[keyword].items():
+                scores[subject] += weight
+        return scores
+
+    def classify(self, query: str) -> str:
+        scores = self.score(query)
+        best_subject, best_score = 'general', 0.0
+        for subject in self.subjects:
+            if scores[subject] > best_score:
+                best_subject, best_score = subject, scores[subject]
+        return best_subject
+
+
+def load_keyword_file(path: str, base: Optional[KeywordSpec] = None) -> SubjectClassifier:
+    """Build a classifier from the built-in keywords extended by a JSON keyword file.
+
+    The file maps subject -> list of keywords or subject -> {keyword: weight};
+    entries add to (or reweight) the built-in set.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        extra = json.load(f)
+    classifier = SubjectClassifier(base if base is not None else SUBJECT_KEYWORDS)
+    for subject, entries in extra.items():
+        classifier.add_keywords(subject, entries, compile_tables=False)
+    classifier._compile()
+    return classifier
+
+
+_default_classifier = SubjectClassifier()
+
+
+def use_keyword_file(path: str):
+    """Replace the module classifier with one extended by a keyword file"""
+    global _default_classifier
+    _default_classifier = load_keyword_file(path)
+    return _default_classifier
+
+
+def get_classifier() -> SubjectClassifier:
+    return _default_classifier
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens as used for keyword matching"""
+    return _WORD.findall((text or '').lower())
+
+
+def classify_subject(query):
+    """Classify the subject area based on query content"""
+    return _default_classifier.classify(query)
+
 
 def get_subject_icon(subject):
     """Get emoji icon for subject"""
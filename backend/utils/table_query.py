@@ -0,0 +1,438 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_KEY = '__manifest__'
+
+
+def save_tables(path: str, tables: Dict[str, Dict[str, np.ndarray]]):
+    """Write sheet name -> column name -> array as one .npz, atomically.
+
+    Column names go in a JSON manifest so the archive keys stay simple and
+    the file loads without pickle. Object (text) columns are stored as their
+    UTF-8 bytes end to end plus an array of end offsets, so a column costs
+    what its text does rather than rows times its longest cell.
+    """
+    arrays = {}
+    manifest = []
+    for sheet_index, (sheet, columns) in enumerate(tables.items()):
+        names = []
+        text = []
+        for column_index, (name, array) in enumerate(columns.items()):
+            key = f's{sheet_index}c{column_index}'
+            if array.dtype == object:
+                encoded = [('' if value is None else str(value)).encode('utf-8') for value in array.tolist()]
+                arrays[key] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+                arrays[key + 'o'] = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+                text.append(column_index)
+            else:
+                arrays[key] = array
+            names.append(name)
+        manifest.append({'sheet': sheet, 'columns': names, 'text': text})
+    arrays[MANIFEST_KEY] = np.array(json.dumps(manifest))
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _load_column(archive, key: str, text: bool) -> np.ndarray:
+    if not text:
+        return archive[key]
+    data = archive[key].tobytes()
+    ends = archive[key + 'o'].tolist()
+    return np.array([data[start:end].decode('utf-8') for start, end in zip([0] + ends, ends)], dtype=object)
+
+
+class TableStore:
+    """Content-addressed .npz files of parsed spreadsheet columns.
+
+    Files are named <sha256 of the upload>.npz and written by the parse
+    worker; the same bytes uploaded again reuse them. Loaded workbooks are
+    kept as pandas DataFrames in a small LRU so follow-up questions about
+    the same sheet don't reload it. Files unused for ttl seconds are swept.
+    """
+
+    def __init__(self, directory: str, ttl: float = 7 * 86400, max_loaded: int = 4):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_loaded = max_loaded
+        self._lock = threading.Lock()
+        self._loaded: 'OrderedDict[str, Dict]' = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        self.sweep()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npz')
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def load(self, key: str):
+        """Sheet name -> DataFrame for key, or None if the file is gone"""
+        import pandas as pd
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+                return self._loaded[key]
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                manifest = json.loads(str(archive[MANIFEST_KEY]))
+                tables = {
+                    entry['sheet']: pd.DataFrame({
+                        name: _load_column(archive, f's{sheet_index}c{column_index}',
+                                           column_index in entry.get('text', ()))
+                        for column_index, name in enumerate(entry['columns'])
+                    })
+                    for sheet_index, entry in enumerate(manifest)
+                }
+            os.utime(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load tables {key}: {e}")
+            return None
+        with self._lock:
+            self._loaded[key] = tables
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return tables
+
+    def sweep(self):
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+
+class TableQuery(NamedTuple):
+    sheet: str
+    aggregate: str                # mean, sum, count, min, max, median
+    column: Optional[str]         # None for a row count
+    group_by: Optional[str]
+    filters: Tuple[Tuple[str, str, object], ...]  # (column, operator, value)
+    order: Optional[str]          # 'asc', 'desc' or None (group order)
+    limit: Optional[int]
+
+
+AGGREGATE_WORDS = [
+    ('mean', r'average|avg|mean'),
+    ('median', r'median'),
+    ('sum', r'total|sum'),
+    ('count', r'how many|count|number of'),
+    ('max', r'maximum|max|highest|largest|biggest'),
+    ('min', r'minimum|min|lowest|smallest')
+]
+# Questions about method rather than a number go to the model ("how do I calculate the average")
+HOW_TO = re.compile(r"\b(?:how\s+(?:do|does|did|can|could|should|would|to)|ways?\s+to|steps?\s+to|"
+                    r"explain|formula|why)\b")
+# Most words allowed between an aggregate word and the column it applies to ("average of the marks")
+AGGREGATE_GAP_WORDS = 3
+AGGREGATE_LABELS = {'mean': 'average', 'median': 'median', 'sum': 'total', 'count': 'count',
+                    'max': 'maximum', 'min': 'minimum'}
+OPERATORS = [
+    ('>=', r'>=|at least|no less than'),
+    ('<=', r'<=|at most|no more than'),
+    ('>', r'>|above|over|more than|greater than|higher than'),
+    ('<', r'<|below|under|less than|lower than'),
+    ('!=', r'!=|is not|isn\'t|not'),
+    ('==', r'==|=|equals|equal to|is')
+]
+GROUP_WORDS = r'per|by|for each|for every|in each|across|grouped by|broken down by'
+_VALUE = r'"([^"]+)"|\'([^\']+)\'|(-?\d+(?:\.\d+)?)\b|([\w.-]+)'
+
+
+# Left in a question after everything understood is removed, these mean it asked for more
+UNHANDLED = re.compile(r"\d|[<>=]|\b(?:where|with|whose|when|if|only|except|excluding|without|between|"
+                       r"above|below|over|under|more than|less than|greater than|at least|at most|"
+                       r"not|named|called|this|that|these|those|last|next|compare|versus|vs|and|or)\b")
+
+
+def _column_pattern(name: str) -> str:
+    name = name.lower()
+    # Tolerate the singular or plural of the last word
+    stem, plural = (name[:-1], 's?') if name.endswith('s') else (name, '(?:e?s)?')
+    words = r'[\s_]+'.join(re.escape(word) for word in stem.split(' '))
+    return rf'(?<!\w){words}{plural}(?!\w)'
+
+
+def _find_columns(text: str, columns: List[str]) -> List[Tuple[int, int, str]]:
+    """(start, end, column) for every column mentioned, longest names winning overlaps"""
+    found = []
+    taken = set()
+    for name in sorted(columns, key=len, reverse=True):
+        for match in re.finditer(_column_pattern(name), text):
+            span = set(range(match.start(), match.end()))
+            if span & taken:
+                continue
+            taken |= span
+            found.append((match.start(), match.end(), name))
+    return sorted(found)
+
+
+def _gap(text: str, start: int, end: int) -> int:
+    """Number of words between two positions of the question"""
+    return len(text[start:end].split())
+
+
+def _value(match, offset):
+    quoted = match.group(offset) or match.group(offset + 1)
+    if quoted is not None:
+        return quoted
+    if match.group(offset + 2) is not None:
+        return float(match.group(offset + 2))
+    return match.group(offset + 3)
+
+
+def parse_table_question(question: str, sheets: Dict[str, List[str]],
+                         numeric: Dict[str, List[str]]) -> Optional[TableQuery]:
+    """Recognise an aggregate question about a sheet, or return None.
+
+    sheets maps sheet name -> column names and numeric the numeric columns
+    of each. A question qualifies when it names an aggregate ("average",
+    "total", "how many", "highest"...) and, except for counts, a numeric
+    column to aggregate. "per"/"by" a column groups, "where <column> is
+    <value>" / "<column> above <n>" or "in <column> <value>" filters, and
+    "top N" limits the groups. "how many <column>" counts its distinct
+    values. Anything that looks like a condition but wasn't understood, or a
+    column mentioned without a part in the query, makes the whole question
+    fall back to the model rather than be answered wrongly.
+    """
+    text = ' '.join(question.lower().rstrip('?.! ').split())
+    if HOW_TO.search(text):
+        return None
+    aggregates = [(match.start(), match.end(), name) for name, pattern in AGGREGATE_WORDS
+                  for match in re.finditer(rf'\b(?:{pattern})\b', text)]
+    if not aggregates:
+        return None
+    aggregates.sort()
+
+    best = None
+    for sheet, columns in sheets.items():
+        mentions = _find_columns(text, columns)
+        if mentions and (best is None or len(mentions) > len(best[1])):
+            best = (sheet, mentions)
+    if best is None:
+        return None
+    sheet, mentions = best
+    numeric_columns = set(numeric.get(sheet, []))
+    consumed = [(start, end) for start, end, _ in aggregates]
+
+    group_by = None
+    group_at = None
+    ranked = False
+    for start, end, name in mentions:
+        group = re.search(rf'\b(?:{GROUP_WORDS})\s+(?:the\s+|each\s+)?$', text[:start])
+        which = re.search(r'\bwhich\s+$', text[:start])
+        if group or which:
+            group_by, group_at = name, start
+            ranked = bool(which)
+            consumed.append(((group or which).start(), end))
+            break
+
+    filters = []
+    filter_mentions = set()
+    operator_pattern = '|'.join(f'(?:{pattern})' for _, pattern in OPERATORS)
+    for start, end, name in mentions:
+        if name == group_by:
+            continue
+        condition = re.match(rf'\s*(?:is\s+|was\s+|scored\s+|of\s+)?({operator_pattern})\s*(?:{_VALUE})',
+                             text[end:])
+        lead = re.search(r'\b(?:where|with|when|if|whose|and)\s+(?:the\s+)?$', text[:start])
+        shorthand = re.search(r'\b(?:in|for|from)\s+(?:the\s+)?$', text[:start])
+        value = _value(condition, 2) if condition else None
+        if name in numeric_columns and not isinstance(value, float):
+            condition = None  # "marks is what": not a numeric condition
+        if condition and (lead or name in numeric_columns):
+            operator = next(op for op, pattern in OPERATORS if re.fullmatch(pattern, condition.group(1)))
+            filters.append((name, operator, value))
+            filter_mentions.add(start)
+            consumed.append((lead.start() if lead else start, end + condition.end()))
+        elif shorthand:
+            value = re.match(rf'\s+(?:{_VALUE})', text[end:])
+            if value:
+                filters.append((name, '==', _value(value, 1)))
+                filter_mentions.add(start)
+                consumed.append((shorthand.start(), end + value.end()))
+
+    order = None
+    limit = None
+    top = re.search(r'\b(top|bottom|first|last)\s+(\d+)\b', text)
+    if top:
+        if group_by is None:
+            return None  # "top 2 students" needs rows, not an aggregate
+        order = 'desc' if top.group(1) in ('top', 'first') else 'asc'
+        limit = int(top.group(2))
+        consumed.append(top.span())
+
+    leftover = list(text)
+    for start, end in consumed:
+        leftover[start:end] = ' ' * (end - start)
+    if UNHANDLED.search(''.join(leftover)):
+        return None
+
+    # The aggregated column is a numeric column with an aggregate word right next to it,
+    # and the aggregate is the word closest to it; a count needs no column
+    candidates = [(start, end, name) for start, end, name in mentions
+                  if name in numeric_columns and name != group_by and start not in filter_mentions]
+    column, column_at, chosen = None, None, None
+    for start, end, name in candidates:
+        # (words in between, aggregate after the column, aggregate): a word before the column wins a tie
+        near = sorted((_gap(text, a_end, start) if a_end <= start else _gap(text, end, a_start), a_end > start,
+                       (a_start, a_end, a_name)) for a_start, a_end, a_name in aggregates)
+        close = [item for gap, _, item in near if gap <= AGGREGATE_GAP_WORDS]
+        if close:
+            # With groups, "lowest marks total" ranks by the total, so max/min yields to a metric word
+            metrics = [item for item in close if item[2] not in ('max', 'min')] if group_by else []
+            column, column_at, chosen = name, start, (metrics or close)[0]
+            break
+    if chosen is None:
+        chosen = next((item for item in aggregates if item[2] == 'count'), None)
+        if chosen is None:
+            return None
+        # "how many students", "number of sections": the distinct values of the column named next
+        counted = [(start, name) for start, end, name in mentions
+                   if start >= chosen[1] and start != group_at and start not in filter_mentions
+                   and _gap(text, chosen[1], start) <= AGGREGATE_GAP_WORDS]
+        if counted:
+            column_at, column = counted[0]
+    aggregate = chosen[2]
+
+    # Every column named must be the aggregated one, the group or a filter
+    if any(start not in (column_at, group_at) and start not in filter_mentions for start, _, _ in mentions):
+        return None
+    others = [item for item in aggregates if item != chosen and item[2] in ('max', 'min')]
+
+    if group_by and (others or (ranked and aggregate in ('max', 'min'))):
+        # "which section has the highest average marks": rank the groups by the
+        # aggregate, using the other max/min word for the direction
+        direction = others[0][2] if others else aggregate
+        order = 'desc' if direction == 'max' else 'asc'
+        limit = limit or 1
+    elif re.search(r'\b(descending|highest first|largest first)\b', text):
+        order = 'desc'
+    elif re.search(r'\b(ascending|lowest first|smallest first)\b', text):
+        order = 'asc'
+
+    return TableQuery(sheet, aggregate, column, group_by, tuple(filters), order, limit)
+
+
+def _condition(series, operator, value):
+    if series.dtype.kind == 'f':
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return series.notna() & False
+    elif series.dtype.kind == 'M':
+        import pandas as pd
+        value = pd.Timestamp(str(value))
+    else:
+        series = series.str.lower()
+        value = str(value if not isinstance(value, float) or not value.is_integer() else int(value)).lower()
+    return {
+        '==': lambda: series == value,
+        '!=': lambda: series != value,
+        '>': lambda: series > value,
+        '<': lambda: series < value,
+        '>=': lambda: series >= value,
+        '<=': lambda: series <= value
+    }[operator]()
+
+
+def run_table_query(frame, query: TableQuery):
+    """Evaluate query against a DataFrame; returns a (small) DataFrame"""
+    import pandas as pd
+    for column, operator, value in query.filters:
+        frame = frame[_condition(frame[column], operator, value)]
+
+    label = describe_value(query)
+    if query.group_by:
+        frame = frame[frame[query.group_by] != '']
+    if query.aggregate == 'count' and query.column is not None:
+        # Distinct non-empty values; NaN and NaT are already left out by nunique
+        if frame[query.column].dtype == object:
+            frame = frame[frame[query.column] != '']
+        aggregate = 'nunique'
+    else:
+        aggregate = query.aggregate
+    if query.group_by:
+        groups = frame.groupby(query.group_by, sort=True)
+        result = groups.size() if query.column is None else groups[query.column].agg(aggregate)
+        result = result.rename(label).reset_index()
+    else:
+        value = len(frame) if query.column is None else frame[query.column].agg(aggregate)
+        result = pd.DataFrame({label: [value]})
+
+    if query.order:
+        result = result.sort_values(label, ascending=query.order == 'asc', kind='stable')
+    if query.limit:
+        result = result.head(query.limit)
+    return result.reset_index(drop=True)
+
+
+def describe_value(query: TableQuery) -> str:
+    if query.column is None:
+        return 'count of rows'
+    if query.aggregate == 'count':
+        return f"number of distinct {query.column}"
+    return f"{AGGREGATE_LABELS[query.aggregate]} {query.column}"
+
+
+def describe_query(query: TableQuery) -> str:
+    text = describe_value(query)
+    if query.group_by:
+        text += f" per {query.group_by}"
+    conditions = [f"{column} {operator} {value:g}" if isinstance(value, float) else f"{column} {operator} {value}"
+                  for column, operator, value in query.filters]
+    if conditions:
+        text += ' where ' + ' and '.join(conditions)
+    if query.limit:
+        text += f" ({'top' if query.order == 'desc' else 'bottom'} {query.limit})"
+    return f"{text} in sheet '{query.sheet}'"
+
+
+def _format_cell(value):
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return ''
+        return f"{value:,.2f}".rstrip('0').rstrip('.') if not float(value).is_integer() else f"{int(value):,}"
+    return str(value)
+
+
+def format_table(result, max_rows: int = 50) -> str:
+    """Markdown table of a query result"""
+    header = [str(column) for column in result.columns]
+    lines = ['| ' + ' | '.join(header) + ' |', '|' + '---|' * len(header)]
+    for row in result.head(max_rows).itertuples(index=False, name=None):
+        lines.append('| ' + ' | '.join(_format_cell(value) for value in row) + ' |')
+    if len(result) > max_rows:
+        lines.append(f"({len(result) - max_rows} more rows)")
+    return '\n'.join(lines)
+
+
+def numeric_columns(tables) -> Dict[str, List[str]]:
+    return {sheet: [name for name in frame.columns if frame[name].dtype.kind == 'f']
+            for sheet, frame in tables.items()}
@@ -1,7 +1,13 @@
 const API_BASE_URL = 'http://localhost:5000/api';
+// Single-request uploads are capped at 16MB by the server
+const CHUNKED_UPLOAD_THRESHOLD = 15 * 1024 * 1024;
 
 class ApiService {
   async uploadFile(file, sessionId) {
+    // Large files go through the resumable chunked protocol
+    if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+      return this.uploadFileChunked(file);
+    }
     try {
       const formData = new FormData();
       formData.append('file', file);
@@ -27,20 +33,96 @@ class ApiService {
         throw new Error(errorData.error || `Upload failed with status ${response.status}`);
       }
 
-      return await response.json();
+      const upload = await response.json();
+      // Parsing runs in a background job; wait for it to finish
+      return upload.job_id ? await this.waitForParseJob(upload) : upload;
     } catch (error) {
       console.error('File Upload Error:', error);
       throw error;
     }
   }
 
-  async sendMessage(message, sessionId, fileContent = null) {
+  async uploadFileChunked(file, maxRetries = 3) {
+    const json = async (response) => {
+      const body = await response.json().catch(() => ({ error: 'Upload failed' }));
+      if (!response.ok && response.status !== 409) {
+        throw new Error(body.error || `Upload failed with status ${response.status}`);
+      }
+      return body;
+    };
+
+    const upload = await json(await fetch(`${API_BASE_URL}/files/uploads`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ filename: file.name, size: file.size }),
+      credentials: 'include',
+    }));
+
+    const uploadUrl = `${API_BASE_URL}/files/uploads/${upload.upload_id}`;
+    let offset = 0;
+    let failures = 0;
+    while (offset < file.size) {
+      try {
+        const chunk = file.slice(offset, offset + upload.chunk_size);
+        const result = await json(await fetch(`${uploadUrl}?offset=${offset}`, {
+          method: 'PUT',
+          headers: { 'Content-Type': 'application/octet-stream' },
+          body: chunk,
+          credentials: 'include',
+        }));
+        // 409 carries the offset the server has; continue from there
+        offset = result.offset;
+        failures = 0;
+      } catch (error) {
+        if (++failures > maxRetries) throw error;
+        const status = await json(await fetch(uploadUrl, { credentials: 'include' }));
+        offset = status.offset;
+      }
+    }
+
+    const finalized = await json(await fetch(`${uploadUrl}/finalize`, {
+      method: 'POST',
+      credentials: 'include',
+    }));
+    return finalized.job_id ? await this.waitForParseJob(finalized) : finalized;
+  }
+
+  async waitForParseJob(upload, intervalMs = 500) {
+    for (;;) {
+      const response = await fetch(`${API_BASE_URL}/files/jobs/${upload.job_id}`, {
+        credentials: 'include',
+      });
+      const job = await response.json().catch(() => ({ error: 'Processing failed' }));
+      if (!response.ok) {
+        throw new Error(job.error || `Processing failed with status ${response.status}`);
+      }
+      if (job.status === 'done') {
+        return { ...upload, ...job, success: true };
+      }
+      if (job.status === 'failed') {
+        // A failed job may still carry partial content; it is not a usable upload
+        return { ...upload, ...job, success: false, error: job.error || job.content?.error || 'Processing failed' };
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  }
+
+  async getDocumentPages(fileId, start = 1, end = start) {
+    return this.request(`/files/${fileId}/pages?start=${start}&end=${end}`, { method: 'GET' });
+  }
+
+  async getDocumentSlide(fileId, slideNumber) {
+    return this.request(`/files/${fileId}/slides/${slideNumber}`, { method: 'GET' });
+  }
+
+  async sendMessage(message, sessionId, fileContent = null, fileId = null) {
     return this.request('/chat', {
       method: 'POST',
       body: JSON.stringify({
         message,
         session_id: sessionId,
-        file_content: fileContent
+        file_content: fileContent,
+        file_id: fileId
       }),
     });
   }
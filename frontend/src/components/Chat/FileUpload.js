@@ -37,8 +37,8 @@ const FileUpload = ({ onFileProcessed, theme, isLoading: parentLoading, sessionI
       return;
     }
 
-    if (file.size > 16 * 1024 * 1024) {
-      setUploadError(`File size ${(file.size / (1024 * 1024)).toFixed(2)}MB is too large! Please upload files smaller than 16MB.`);
+    if (file.size > 512 * 1024 * 1024) {
+      setUploadError(`File size ${(file.size / (1024 * 1024)).toFixed(2)}MB is too large! Please upload files smaller than 512MB.`);
       return;
     }
 
@@ -210,7 +210,7 @@ const FileUpload = ({ onFileProcessed, theme, isLoading: parentLoading, sessionI
             <span>📽️ PowerPoint</span>
             <span>🖼️ Images</span>
           </div>
-          <p className="file-limit">Max size: 16MB</p>
+          <p className="file-limit">Max size: 512MB</p>
         </div>
       </div>
     </div>
@@ -69,9 +69,12 @@ const useChat = () => {
 
     try {
       let fileContent = null;
+      let fileId = null;
 
-      // Extract file content for AI processing
-      if (uploadedFile && uploadedFile.content) {
+      // Parsed documents stay on the server; refer to them by file_id
+      if (uploadedFile && uploadedFile.file_id && uploadedFile.status === 'done') {
+        fileId = uploadedFile.file_id;
+      } else if (uploadedFile && uploadedFile.content) {
         if (uploadedFile.content.text_content) {
           fileContent = uploadedFile.content.text_content;
         } else if (uploadedFile.content.summary) {
@@ -81,7 +84,7 @@ const useChat = () => {
         }
       }
 
-      const response = await ApiService.sendMessage(currentMessage, sessionId, fileContent);
+      const response = await ApiService.sendMessage(currentMessage, sessionId, fileContent, fileId);
       
       setTimeout(() => {
         const botMessage = {